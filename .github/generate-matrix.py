@@ -1,7 +1,10 @@
 """Script to generate the matrix for the GitHub Workflow"""
 
 from pathlib import Path
+import heapq
 import json
+import os
+import statistics
 import sys
 import logging
 from packaging.version import Version
@@ -25,6 +28,14 @@ DEFAULT_EXTRA_PARAMS = {
 
 OS_ONLY_WORKLOADS = {"vectorsearch-faiss", "vectorsearch-nmslib"}
 
+WORKLOAD_PARAMS_DEFAULT_PATH = Path(__file__).parent.resolve() / "../infra/workload_params_default/"
+
+# Duration of jobs without history, in seconds
+DEFAULT_DURATION = 3600
+
+# Number of jobs run at the same time, as set by max-parallel in the workflows
+DEFAULT_MAX_PARALLEL = 12
+
 def get_available_cluster_types(cluster_types: list[str]) -> list[str]:
     """Get the cluster types"""
     return [
@@ -38,37 +49,95 @@ def _cluster_part(cluster_type: str) -> str:
     return "es" if cluster_type.lower() == "elasticsearch" else "os"
 
 
-def get_workload_params(
-    cluster_type: str, version: str, workload_name: str, overwrite_workload_params: dict
-) -> dict | None:
-    """Generate the workload parameters"""
-    cluster_part = _cluster_part(cluster_type)
-    if f"{workload_name}-{cluster_part}-{version}" in overwrite_workload_params:
-        return overwrite_workload_params.get(f"{workload_name}-{cluster_part}-{version}", {})
-    elif f"{workload_name}-{cluster_part}" in overwrite_workload_params:
-        return overwrite_workload_params.get(f"{workload_name}-{cluster_part}", {})
-    elif workload_name in overwrite_workload_params:
-        return overwrite_workload_params.get(workload_name, {})
-    else:
-        return read_default_workload_params(cluster_type, workload_name)
-
-
-def read_default_workload_params(cluster_type: str, workload_name: str) -> dict | None:
-    """Read the default workload parameters"""
-    # Get the script path (with Path)
-    script_path = Path(__file__).parent.resolve()
-    workload_params_path = script_path / "../infra/workload_params_default/"
-    cluster_part = _cluster_part(cluster_type)
-    if (workload_params_path / f"{workload_name}.json").exists():
-        return json.load(open(workload_params_path / f"{workload_name}.json"))
-    elif (workload_params_path / f"{workload_name}-{cluster_part}.json").exists():
-        return json.load(
-            open(workload_params_path / f"{workload_name}-{cluster_part}.json")
-        )
-    else:
+class WorkloadParamsError(ValueError):
+    """Raised when workload parameters are not a JSON object."""
+
+
+def _validate_params(params: object, source: str) -> dict:
+    if not isinstance(params, dict):
+        raise WorkloadParamsError(f"Workload parameters of {source} must be a JSON object, not {type(params).__name__}")
+    return params
+
+
+class WorkloadParamsResolver:
+    """Resolve the workload parameters of each cluster type, version and workload.
+
+    Overrides are looked up by <workload>-<os|es>-<version>, then <workload>-<os|es>, then <workload>.
+    Without an override, the defaults are read from <workload>.json, then <workload>-<os|es>.json.
+    All the defaults are read and validated once, and resolved parameters are memoized.
+    """
+
+    def __init__(self, overrides: dict, defaults_path: Path = WORKLOAD_PARAMS_DEFAULT_PATH) -> None:
+        self.overrides = {
+            key: _validate_params(params, f"override {key}") for key, params in _validate_params(overrides, "overrides").items()
+        }
+        self.defaults = {}
+        for path in sorted(defaults_path.glob("*.json")):
+            with path.open() as file:
+                self.defaults[path.stem] = _validate_params(json.load(file), path.name)
+        self._resolved: dict[tuple[str, str, str], dict | None] = {}
+
+    def resolve(self, cluster_type: str, version: str, workload_name: str) -> dict | None:
+        """Return the workload parameters, None if there are neither overrides nor defaults."""
+        cluster_part = _cluster_part(cluster_type)
+        key = (cluster_part, version, workload_name)
+        if key not in self._resolved:
+            self._resolved[key] = self._lookup(cluster_part, version, workload_name)
+        return self._resolved[key]
+
+    def _lookup(self, cluster_part: str, version: str, workload_name: str) -> dict | None:
+        for override in (f"{workload_name}-{cluster_part}-{version}", f"{workload_name}-{cluster_part}", workload_name):
+            if override in self.overrides:
+                return self.overrides[override]
+        for default in (workload_name, f"{workload_name}-{cluster_part}"):
+            if default in self.defaults:
+                return self.defaults[default]
         return None
 
 
+def estimate_duration(entry: dict, durations: dict, default: float) -> float:
+    """Estimate the duration of a matrix entry in seconds, from the most specific historical duration.
+
+    durations is keyed like the workload parameters overrides: <workload>-<os|es>-<version>,
+    <workload>-<os|es> or <workload>.
+    """
+    cluster_part = _cluster_part(entry["cluster_type"])
+    version = entry["es_version"] if cluster_part == "es" else entry["os_version"]
+    name = entry["name"]
+    for key in (f"{name}-{cluster_part}-{version}", f"{name}-{cluster_part}", name):
+        if key in durations:
+            return float(durations[key])
+    return default
+
+
+def makespan(costs: list[float], max_parallel: int) -> float:
+    """Return when the last job ends, if jobs start in order as soon as one of max_parallel slots is free."""
+    slots = [0.0] * min(max_parallel, len(costs))
+    for cost in costs:
+        heapq.heappush(slots, heapq.heappop(slots) + cost)
+    return max(slots, default=0.0)
+
+
+def schedule(includes: list[dict], durations: dict, max_parallel: int) -> list[dict]:
+    """Order the matrix entries longest first, so the longest jobs do not start last.
+
+    GitHub starts the jobs of a matrix in order as slots free up, so this is a longest processing time
+    first schedule. Entries without history are estimated with the median of the known durations,
+    and entries of equal cost keep their order.
+    """
+    default = statistics.median(durations.values()) if durations else DEFAULT_DURATION
+    costs = [estimate_duration(entry, durations, default) for entry in includes]
+    order = sorted(range(len(includes)), key=lambda i: -costs[i])
+
+    before = makespan(costs, max_parallel)
+    after = makespan([costs[i] for i in order], max_parallel)
+    print(
+        f"Estimated duration with {max_parallel} parallel jobs: {after / 60:.0f} min (unordered: {before / 60:.0f} min)",
+        file=sys.stderr,
+    )
+    return [includes[i] for i in order]
+
+
 def main() -> None:
     workloads = [x.lower() for x in sys.argv[1].split(",")]
     overwrite_workload_params = json.loads(sys.argv[2])
@@ -88,6 +157,12 @@ def main() -> None:
         print("Invalid benchmark type. Must be one of: dev, official")
         sys.exit(1)
 
+    try:
+        resolver = WorkloadParamsResolver(overwrite_workload_params)
+    except ValueError as e:
+        print(f"Invalid workload parameters: {e}")
+        sys.exit(1)
+
     cluster_versions = {
         "OpenSearch": ("os_version", os_versions),
         "ElasticSearch": ("es_version", es_versions),
@@ -124,9 +199,7 @@ def main() -> None:
                 if cluster_type == "OpenSearch" and workload_name == "vectorsearch-nmslib" and Version(version) >= Version("3.0.0"):
                     continue
 
-                params = get_workload_params(
-                    cluster_type, version, workload_name, overwrite_workload_params
-                )
+                params = resolver.resolve(cluster_type, version, workload_name)
                 if params is None:
                     logger.warning(
                         f"Workload parameters not found for {cluster_type}/{version}/{workload_name}"
@@ -146,6 +219,11 @@ def main() -> None:
                     }
                 )
 
+    # Historical durations in seconds, like {"big5-os": 7200, "pmc": 1800}
+    durations = json.loads(os.environ.get("JOB_DURATIONS") or "{}")
+    max_parallel = int(os.environ.get("MAX_PARALLEL") or DEFAULT_MAX_PARALLEL)
+    includes = schedule(includes, durations, max_parallel)
+
     output = {
         "include": includes,
     }
@@ -1,11 +1,12 @@
 #!/bin/bash
 
-if [ "$#" -ne 2 ]; then
-    echo "usage: $0 /benchmarkA/ /benchmarkB/"
+if [ "$#" -lt 2 ]; then
+    echo "usage: $0 /benchmarkA/ /benchmarkB/ [--json out.json] [--junit out.xml] [--max-ratio RATIO]"
     exit 1
 fi
 
 make run ARGS=" diff \
     --a $1 \
-    --b $2
+    --b $2 \
+    ${*:3}
 "
@@ -3,17 +3,93 @@
 import argparse
 import logging
 import os
+import sys
+from collections.abc import Callable
 from datetime import datetime
 from pathlib import Path
+from typing import Any
 from zoneinfo import ZoneInfo
 
-from report_gen.diff import diff_folders
-from report_gen.download import Source, download, dump_csv_files
-from report_gen.sheets import create_report
+from report_gen.cache import DEFAULT_CACHE_DIR, ParsedFileCache
+from report_gen.runs import WARMUP_RUN, RunSelection
+from report_gen.sheets.ratelimit import DEFAULT_REQUESTS_PER_MINUTE, MIN_REQUESTS_PER_MINUTE
+from report_gen.sheets.stages import DEFAULT_WORKERS
 
 from . import __version__
 
 
+def int_parser(minimum: int) -> Callable[[str], int]:
+    """Return an argument type parsing integers no smaller than minimum."""
+
+    def parse(user_input: str) -> int:
+        try:
+            value = int(user_input)
+        except ValueError:
+            msg = f"Not an integer: {user_input}"
+            raise argparse.ArgumentTypeError(msg) from None
+        if value < minimum:
+            msg = f"Must be at least {minimum}: {user_input}"
+            raise argparse.ArgumentTypeError(msg)
+        return value
+
+    return parse
+
+
+def build_cache_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--cache-dir",
+        help="Folder to cache parsed benchmark data files in (default: %(default)s)",
+        type=Path,
+        default=DEFAULT_CACHE_DIR,
+    )
+    parser.add_argument(
+        "--no-cache",
+        help="Parse the benchmark data files without reading or updating the cache",
+        action="store_true",
+    )
+
+
+def cache_from_args(args: argparse.Namespace) -> ParsedFileCache | None:
+    if args.no_cache:
+        return None
+    return ParsedFileCache(directory=args.cache_dir)
+
+
+def build_run_selection_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--skip-runs",
+        help="Number of runs to exclude at the start of each benchmark, after the warmup run (default: %(default)s)",
+        type=int_parser(0),
+        default=0,
+    )
+    parser.add_argument(
+        "--include-warmup",
+        help="Use the warmup run, tagged as run 0, like the other runs",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--keep-last-runs",
+        help="Only use the last N runs of each benchmark, after skipping runs (default: all)",
+        type=int_parser(0),
+        default=None,
+    )
+    parser.add_argument(
+        "--trim-runs",
+        help="Exclude the N fastest and N slowest runs of each operation (default: %(default)s)",
+        type=int_parser(0),
+        default=0,
+    )
+
+
+def runs_from_args(args: argparse.Namespace) -> RunSelection:
+    return RunSelection(
+        warmup_run=None if args.include_warmup else WARMUP_RUN,
+        skip_first=args.skip_runs,
+        keep_last=args.keep_last_runs,
+        trim=args.trim_runs,
+    )
+
+
 def build_diff_args(diff_parser: argparse.ArgumentParser) -> None:
     def directory_path_parser(user_input: str) -> Path:
         if Path(user_input).is_dir():
@@ -35,14 +111,92 @@ def build_diff_args(diff_parser: argparse.ArgumentParser) -> None:
         type=directory_path_parser,
     )
 
+    diff_parser.add_argument(
+        "--metric",
+        help="Comma separated list of metrics to compare. throughput is read from the throughput files "
+        "and compared on its median (default: %(default)s)",
+        dest="metrics",
+        type=lambda user_input: user_input.split(","),
+        default=["service_time"],
+    )
+
+    diff_parser.add_argument(
+        "--percentile",
+        help="Comma separated list of percentiles to compare (default: %(default)s)",
+        dest="percentiles",
+        type=lambda user_input: user_input.split(","),
+        default=["90"],
+    )
+
+    diff_parser.add_argument(
+        "--json",
+        help="Path to write the diff results to as JSON",
+        type=Path,
+        default=None,
+    )
+
+    diff_parser.add_argument(
+        "--junit",
+        help="Path to write the diff results to as JUnit XML",
+        type=Path,
+        default=None,
+    )
+
+    diff_parser.add_argument(
+        "--max-ratio",
+        help="Mark operations as regressions when the B/A median ratio is larger than this value "
+        "and exit with a non-zero code (default: %(default)s)",
+        type=float,
+        default=None,
+    )
+
+    diff_parser.add_argument(
+        "--fail-on-outlier",
+        help="Exit with a non-zero code when the outlier detector flags an operation",
+        action="store_true",
+    )
+
+    build_run_selection_args(diff_parser)
+    build_cache_args(diff_parser)
+
+
+def diff_command(args: argparse.Namespace) -> bool:
+    from report_gen.diff import diff_folders
 
-def diff_command(args: argparse.Namespace) -> None:
     folder_a: Path = args.a
     folder_b: Path = args.b
-    diff_folders(folder_a, folder_b)
+    report = diff_folders(
+        folder_a,
+        folder_b,
+        max_ratio=args.max_ratio,
+        metrics=args.metrics,
+        percentiles=args.percentiles,
+        runs=runs_from_args(args),
+        cache=cache_from_args(args),
+    )
 
+    if args.json is not None:
+        args.json.write_text(report.to_json())
+    if args.junit is not None:
+        args.junit.write_text(report.to_junit())
 
-def build_download_args(download_parser: argparse.ArgumentParser) -> None:
+    if not report.operations:
+        print(
+            f"No operations were compared between {folder_a} and {folder_b}, "
+            "check that the folders hold matching files and the --metric and --percentile values"
+        )
+        # Gating on an empty report would always pass
+        return args.max_ratio is None and not args.fail_on_outlier
+    if report.regressions:
+        print(f"{len(report.regressions)} operations regressed by more than {args.max_ratio}x")
+        return False
+    if args.fail_on_outlier and report.outliers:
+        print(f"{len(report.outliers)} operations have outliers")
+        return False
+    return True
+
+
+def build_datastore_args(download_parser: argparse.ArgumentParser) -> None:
     download_parser.add_argument(
         "--host",
         help="Hostname of the datastore to download the benchmark results from",
@@ -55,12 +209,6 @@ def build_download_args(download_parser: argparse.ArgumentParser) -> None:
         type=int,
         default=443,
     )
-    download_parser.add_argument(
-        "--benchmark-data",
-        help="Path to an existing folder to download the benchmark data to",
-        type=Path,
-        required=True,
-    )
     download_parser.add_argument(
         "--from",
         help="Download results starting from this date (inclusive). " "Format is YYYY-MM-DD or YYYY-MM-DD hh:mm:ssZ",
@@ -112,15 +260,32 @@ def build_download_args(download_parser: argparse.ArgumentParser) -> None:
     )
 
 
-def download_command(args: argparse.Namespace) -> None:
+def build_download_args(download_parser: argparse.ArgumentParser) -> None:
+    build_datastore_args(download_parser)
+    download_parser.add_argument(
+        "--benchmark-data",
+        help="Path to an existing folder to download the benchmark data to",
+        type=Path,
+        required=True,
+    )
+    download_parser.add_argument(
+        "--pagination",
+        help="How to page through results which do not fit in a single response: "
+        "a scroll or a point in time (default: %(default)s)",
+        choices=["scroll", "pit"],
+        default="scroll",
+    )
+
+
+def datastore_args_to_kwargs(args: argparse.Namespace) -> dict[str, Any] | None:
+    """Return the arguments selecting the runs to download, or None after printing why they are wrong."""
+    # opensearch-py is slow to import, only load it when downloading
+    from report_gen.download import Source
+
     password = os.environ.get("DS_PASSWORD")
     if password is None:
         print("Datastore password missing, please pass it as the DS_PASSWORD environment variable")
-        return
-
-    benchmark_data_folder: Path = args.benchmark_data
-    if not benchmark_data_folder.exists():
-        print(f"Could not find the provided benchmark data folder at {benchmark_data_folder}")
+        return None
 
     def validate_date(date_str: str) -> datetime:
         if "T" not in date_str:
@@ -133,7 +298,7 @@ def download_command(args: argparse.Namespace) -> None:
         print(
             "Wrong format for the 'from' parameter, " "please use a date in YYYY-MM-DD or YYYY-MM-DD hh:mm:ssZ format"
         )
-        return
+        return None
 
     if args.to_arg is None:
         end_date = datetime.now(tz=ZoneInfo("UTC"))
@@ -144,35 +309,219 @@ def download_command(args: argparse.Namespace) -> None:
             print(
                 "Wrong format for the 'to' parameter, " "please use a date in YYYY-MM-DD or YYYY-MM-DD hh:mm:ssZ format"
             )
-            return
+            return None
 
     if start_date > end_date:
         print("Wrong date range. The date in --from needs to be the same or before the one in --to")
-        return
+        return None
 
     src_map = {
         "ci-scheduled": Source.Scheduled,
         "ci-manual": Source.Manual,
         "other": Source.Other,
     }
-    sources = [src_map[s] for s in args.source]
 
-    benchmark_results = download(
-        start_date=start_date,
-        end_date=end_date,
-        host=args.host,
-        port=args.port,
-        password=password,
-        environment=args.environment,
-        run_type=args.run_type,
-        engine_type=args.engine_type,
-        distribution_version=args.distribution_version,
-        sources=sources,
-    )
+    return {
+        "start_date": start_date,
+        "end_date": end_date,
+        "host": args.host,
+        "port": args.port,
+        "password": password,
+        "environment": args.environment,
+        "run_type": args.run_type,
+        "engine_type": args.engine_type,
+        "distribution_version": args.distribution_version,
+        "sources": [src_map[s] for s in args.source],
+    }
+
+
+def download_command(args: argparse.Namespace) -> None:
+    from report_gen.download import Pagination, download, dump_csv_files
+
+    benchmark_data_folder: Path = args.benchmark_data
+    if not benchmark_data_folder.exists():
+        print(f"Could not find the provided benchmark data folder at {benchmark_data_folder}")
+
+    kwargs = datastore_args_to_kwargs(args)
+    if kwargs is None:
+        return
+
+    benchmark_results = download(**kwargs, pagination=Pagination(args.pagination))
 
     dump_csv_files(benchmark_results, benchmark_data_folder)
 
 
+def build_download_metrics_args(download_metrics_parser: argparse.ArgumentParser) -> None:
+    build_datastore_args(download_metrics_parser)
+    download_metrics_parser.add_argument(
+        "--metrics-data",
+        help="Path to an existing folder to download the node stats, the time window and the throughput "
+        "of each operation to",
+        type=Path,
+        required=True,
+    )
+    download_metrics_parser.add_argument(
+        "--interval",
+        help="Length of the time buckets the node stats are aggregated over, like 10s or 1m (default: %(default)s)",
+        type=str,
+        default="30s",
+    )
+
+
+def download_metrics_command(args: argparse.Namespace) -> None:
+    from report_gen.metrics import (
+        download_metrics,
+        download_operation_windows,
+        dump_metrics_csv_files,
+        dump_operation_csv_files,
+    )
+    from report_gen.saturation import download_throughput, dump_throughput_csv_files
+
+    metrics_data_folder: Path = args.metrics_data
+    if not metrics_data_folder.exists():
+        print(f"Could not find the provided metrics data folder at {metrics_data_folder}")
+        return
+
+    kwargs = datastore_args_to_kwargs(args)
+    if kwargs is None:
+        return
+
+    try:
+        samples = download_metrics(**kwargs, interval=args.interval)
+        dump_metrics_csv_files(samples, metrics_data_folder)
+        dump_operation_csv_files(download_operation_windows(**kwargs), metrics_data_folder)
+        dump_throughput_csv_files(download_throughput(**kwargs), metrics_data_folder)
+    except ValueError as e:
+        print(e)
+
+
+def build_download_samples_args(download_samples_parser: argparse.ArgumentParser) -> None:
+    build_datastore_args(download_samples_parser)
+    download_samples_parser.add_argument(
+        "--samples-data",
+        help="Path to an existing folder to write the sketches and percentiles of each benchmark to",
+        type=Path,
+        required=True,
+    )
+    download_samples_parser.add_argument(
+        "--percentiles",
+        help="Space separated list of the percentiles to compute (default: %(default)s)",
+        nargs="+",
+        type=float,
+        default=[50, 90, 99, 99.9],
+    )
+    download_samples_parser.add_argument(
+        "--relative-accuracy",
+        help="Relative accuracy of the estimated percentiles (default: %(default)s)",
+        type=float,
+        default=0.01,
+    )
+    download_samples_parser.add_argument(
+        "--pagination",
+        help="How to page through the samples: a scroll or a point in time (default: %(default)s)",
+        choices=["scroll", "pit"],
+        default="scroll",
+    )
+    download_samples_parser.add_argument(
+        "--archive",
+        help="Also write the samples of each run to a memory-mapped archive file in the samples data folder",
+        action="store_true",
+    )
+    build_run_selection_args(download_samples_parser)
+
+
+def download_samples_command(args: argparse.Namespace) -> None:
+    from report_gen.download import Pagination
+    from report_gen.samples import download_sketches, dump_percentile_csv_files, dump_sketch_files, merge_runs
+
+    samples_data_folder: Path = args.samples_data
+    if not samples_data_folder.exists():
+        print(f"Could not find the provided samples data folder at {samples_data_folder}")
+        return
+
+    if any(not 0 <= percentile <= 100 for percentile in args.percentiles):  # noqa: PLR2004
+        print("Wrong percentiles, they need to be between 0 and 100")
+        return
+
+    kwargs = datastore_args_to_kwargs(args)
+    if kwargs is None:
+        return
+
+    try:
+        sketches = download_sketches(
+            **kwargs,
+            pagination=Pagination(args.pagination),
+            relative_accuracy=args.relative_accuracy,
+            archive=samples_data_folder if args.archive else None,
+        )
+    except ValueError as e:
+        print(e)
+        return
+
+    dump_sketch_files(sketches, samples_data_folder)
+    dump_percentile_csv_files(merge_runs(sketches, runs_from_args(args)), samples_data_folder, args.percentiles)
+
+
+def build_fetch_run_group_args(fetch_parser: argparse.ArgumentParser) -> None:
+    fetch_parser.add_argument("run_group", help="ID of the run group to fetch, like 2024_09_20_13_56_42")
+    fetch_parser.add_argument(
+        "--host",
+        help="Hostname of the datastore to fetch the run group from",
+        required=True,
+        type=str,
+    )
+    fetch_parser.add_argument(
+        "--port",
+        help="Port of the datastore to fetch the run group from (default: %(default)s)",
+        type=int,
+        default=443,
+    )
+    fetch_parser.add_argument(
+        "--output",
+        help="Path to the folder to write the documents of each run to. It is created if missing",
+        type=Path,
+        required=True,
+    )
+    fetch_parser.add_argument(
+        "--pagination",
+        help="How to page through the documents: a scroll or a point in time (default: %(default)s)",
+        choices=["scroll", "pit"],
+        default="scroll",
+    )
+
+
+def fetch_run_group_command(args: argparse.Namespace) -> bool:
+    from report_gen.download import DEFAULT_USERNAME, Pagination
+    from report_gen.fetch import dump_run_group, fetch_run_group
+
+    password = os.environ.get("DS_PASSWORD")
+    if password is None:
+        print("Datastore password missing, please pass it as the DS_PASSWORD environment variable")
+        return False
+
+    try:
+        test_executions, results = fetch_run_group(
+            args.run_group,
+            host=args.host,
+            port=args.port,
+            password=password,
+            username=os.environ.get("DS_USERNAME", DEFAULT_USERNAME),
+            pagination=Pagination(args.pagination),
+        )
+    except ValueError as e:
+        print(e)
+        return False
+
+    if not test_executions and not results:
+        print(f"Could not find run group {args.run_group}")
+        return False
+
+    output: Path = args.output
+    output.mkdir(parents=True, exist_ok=True)
+    dump_run_group(test_executions, results, output)
+    return True
+
+
 def build_create_args(create_parser: argparse.ArgumentParser) -> None:
     def directory_path_parser(user_input: str) -> Path:
         if Path(user_input).is_dir():
@@ -206,10 +555,62 @@ def build_create_args(create_parser: argparse.ArgumentParser) -> None:
         type=directory_path_parser,
     )
 
+    create_parser.add_argument(
+        "--metrics-data",
+        help="Path to a folder of node stats downloaded by download-metrics, "
+        "to compare the resources used by each operation in a Resources sheet "
+        "and flag the operations which did not reach their target throughput in a Saturation sheet",
+        type=directory_path_parser,
+        default=None,
+    )
+
+    create_parser.add_argument(
+        "--categories",
+        help="Path to a JSON file mapping the operations of each workload to categories. "
+        "Defaults to the built-in map",
+        type=existing_file_path_parser,
+        default=None,
+    )
+    create_parser.add_argument(
+        "--workers",
+        help=f"Number of sheets created concurrently. Defaults to {DEFAULT_WORKERS}",
+        type=int_parser(1),
+        default=DEFAULT_WORKERS,
+    )
+    create_parser.add_argument(
+        "--requests-per-minute",
+        help="Maximum number of Google Sheets API requests sent per minute. "
+        f"Defaults to the default quota of {DEFAULT_REQUESTS_PER_MINUTE}",
+        type=int_parser(MIN_REQUESTS_PER_MINUTE),
+        default=DEFAULT_REQUESTS_PER_MINUTE,
+    )
+    create_parser.add_argument(
+        "--resume",
+        help="ID of a spreadsheet whose creation failed, to complete it instead of creating a new spreadsheet. "
+        "The ID is printed when the creation fails",
+        metavar="SPREADSHEET_ID",
+        default=None,
+    )
+    create_parser.add_argument(
+        "--trace",
+        help="Write the Google Sheets API requests sent by each stage to this file, "
+        "in the Chrome trace format (open it in chrome://tracing or https://ui.perfetto.dev)",
+        type=Path,
+        default=None,
+    )
+
+    build_run_selection_args(create_parser)
+    build_cache_args(create_parser)
+
     create_parser.add_argument("--version", action="version", version=f"%(prog)s {__version__}")
 
 
 def create_command(args: argparse.Namespace) -> bool:
+    # The Google API client is slow to import, only load it when creating a report
+    from report_gen.sheets import ReportOptions, create_report
+    from report_gen.sheets.categories import CategoryIndex, get_category_index
+    from report_gen.sheets.instrumentation import ApiStats
+
     benchmark_data = Path(args.benchmark_data)
     if not benchmark_data.is_dir():
         print(f"benchmark data '{benchmark_data}' is not a directory")
@@ -227,7 +628,32 @@ def create_command(args: argparse.Namespace) -> bool:
             print(f"token path '{credential_path}' is not a file")
             return False
 
-    return create_report(benchmark_data, token_path, credential_path) is not None
+    categories = get_category_index() if args.categories is None else CategoryIndex.from_file(args.categories)
+    stats = ApiStats()
+
+    spreadsheet_id = create_report(
+        benchmark_data,
+        token_path,
+        credential_path,
+        ReportOptions(
+            cache=cache_from_args(args),
+            runs=runs_from_args(args),
+            categories=categories,
+            workers=args.workers,
+            requests_per_minute=args.requests_per_minute,
+            stats=stats,
+            checkpoint_dir=args.cache_dir / "checkpoints",
+            resume=args.resume,
+            metrics_data=args.metrics_data,
+        ),
+    )
+
+    print(stats.summary())
+    if args.trace is not None:
+        stats.write_trace(args.trace)
+        print(f"Wrote trace to {args.trace}")
+
+    return spreadsheet_id is not None
 
 
 def main() -> None:
@@ -242,6 +668,29 @@ def main() -> None:
     )
     build_download_args(download_parser)
 
+    download_metrics_parser = subparser.add_parser(
+        "download-metrics",
+        help="Downloads the node stats recorded during benchmark runs from an OpenSearch datastore, "
+        "aggregated over time buckets, as CSVs with the format "
+        "<run-group>-<engine>-<engine version>-<workload>-<run>-node-stats.csv into a provided folder",
+    )
+    build_download_metrics_args(download_metrics_parser)
+
+    download_samples_parser = subparser.add_parser(
+        "download-samples",
+        help="Downloads the latency and service time of each request of benchmark runs from an OpenSearch datastore "
+        "into mergeable sketches, and writes the percentiles of the selected runs of each run group as CSVs "
+        "with the format <run-group>-<engine>-<engine version>-<workload>-percentiles.csv into a provided folder",
+    )
+    build_download_samples_args(download_samples_parser)
+
+    fetch_run_group_parser = subparser.add_parser(
+        "fetch-run-group",
+        help="Fetches the test execution and the results of each run of a run group, including the warmup run, "
+        "as res-<run>.json and res-<run>-results.json files into a provided folder",
+    )
+    build_fetch_run_group_args(fetch_run_group_parser)
+
     create_parser = subparser.add_parser(
         "create",
         help="Creates a google sheet report from downloaded benchmark data",
@@ -258,9 +707,19 @@ def main() -> None:
 
     logging.basicConfig(level=logging.INFO)
 
+    succeeded = True
     if args.command == "download":
         download_command(args)
+    elif args.command == "download-metrics":
+        download_metrics_command(args)
+    elif args.command == "download-samples":
+        download_samples_command(args)
+    elif args.command == "fetch-run-group":
+        succeeded = fetch_run_group_command(args)
     elif args.command == "create":
-        create_command(args)
+        succeeded = create_command(args)
     elif args.command == "diff":
-        diff_command(args)
+        succeeded = diff_command(args)
+
+    if not succeeded:
+        sys.exit(1)
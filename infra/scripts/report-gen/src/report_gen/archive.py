@@ -0,0 +1,166 @@
+"""Binary archive of the per-request samples of a run, read back memory-mapped.
+
+An archive file holds the samples of one run:
+
+    8 bytes   MAGIC
+    8 bytes   length of the header, little-endian unsigned integer
+    header    JSON object with the run fields, the number of samples, the offsets of the arrays
+              and the index of the samples of each metric and operation
+    padding   to ALIGNMENT bytes
+    int64     timestamp of each sample, in milliseconds since the epoch
+    float64   value of each sample
+
+The samples of each metric and operation are contiguous and ordered by timestamp, so they are sliced
+out of the memory-mapped arrays without copying or loading the other samples.
+"""
+
+import json
+import logging
+import struct
+from array import array
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"RGSAMPL1"
+ALIGNMENT = 64
+SUFFIX = ".samples"
+
+_LENGTH = struct.Struct("<Q")
+TIMESTAMP_DTYPE = np.dtype("<i8")
+VALUE_DTYPE = np.dtype("<f8")
+
+
+@dataclass
+class ArchiveWriter:
+    """Buffer the samples of a run, to write them to an archive file.
+
+    Samples are buffered in compact arrays of 16 bytes per sample rather than Python objects.
+    """
+
+    run: dict[str, str]
+    _timestamps: dict[tuple[str, str], array] = field(default_factory=dict)
+    _values: dict[tuple[str, str], array] = field(default_factory=dict)
+
+    def add(self, metric: str, operation: str, timestamp: int, value: float) -> None:
+        """Add a sample of a metric of an operation, with its timestamp in milliseconds since the epoch."""
+        key = (metric, operation)
+        if key not in self._timestamps:
+            self._timestamps[key] = array("q")
+            self._values[key] = array("d")
+        self._timestamps[key].append(timestamp)
+        self._values[key].append(value)
+
+    def __len__(self) -> int:
+        """Return the number of samples added."""
+        return sum(len(timestamps) for timestamps in self._timestamps.values())
+
+    def write(self, path: Path) -> None:
+        """Write the samples to an archive file, replacing it atomically."""
+        count = len(self)
+        index: dict[str, dict[str, list[int]]] = {}
+        start = 0
+        for metric, operation in sorted(self._timestamps):
+            stop = start + len(self._timestamps[metric, operation])
+            index.setdefault(metric, {})[operation] = [start, stop]
+            start = stop
+
+        # The offsets depend on the length of the header, which includes them, so they are padded to a fixed width
+        header: dict[str, Any] = {
+            "run": self.run,
+            "count": count,
+            "timestamps_offset": f"{0:020d}",
+            "values_offset": f"{0:020d}",
+            "index": index,
+        }
+        header_length = len(json.dumps(header).encode())
+        timestamps_offset = _align(len(MAGIC) + _LENGTH.size + header_length)
+        values_offset = timestamps_offset + count * TIMESTAMP_DTYPE.itemsize
+        header["timestamps_offset"] = f"{timestamps_offset:020d}"
+        header["values_offset"] = f"{values_offset:020d}"
+        encoded = json.dumps(header).encode()
+
+        temporary = path.with_name(f".{path.name}.tmp")
+        with temporary.open("wb") as file:
+            file.write(MAGIC)
+            file.write(_LENGTH.pack(len(encoded)))
+            file.write(encoded)
+            file.write(b"\0" * (timestamps_offset - file.tell()))
+
+            # Sort each series by timestamp, keeping the values next to their timestamps
+            orders = {}
+            for key in sorted(self._timestamps):
+                timestamps = np.frombuffer(self._timestamps[key], dtype=np.int64)
+                orders[key] = np.argsort(timestamps, kind="stable")
+                file.write(timestamps[orders[key]].astype(TIMESTAMP_DTYPE).tobytes())
+            for key in sorted(self._values):
+                values = np.frombuffer(self._values[key], dtype=np.float64)
+                file.write(values[orders[key]].astype(VALUE_DTYPE).tobytes())
+        temporary.replace(path)
+
+
+def _align(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+@dataclass(frozen=True)
+class SampleArchive:
+    """Samples of a run, memory-mapped from an archive file."""
+
+    path: Path
+    run: dict[str, str]
+    index: dict[str, dict[str, tuple[int, int]]]
+    timestamps: np.ndarray
+    measurements: np.ndarray
+
+    @classmethod
+    def open(cls, path: Path) -> "SampleArchive":
+        """Map an archive file in memory. The samples are read from the file when they are accessed."""
+        with path.open("rb") as file:
+            magic = file.read(len(MAGIC))
+            if magic != MAGIC:
+                msg = f"{path} is not a samples archive"
+                raise ValueError(msg)
+            (header_length,) = _LENGTH.unpack(file.read(_LENGTH.size))
+            header = json.loads(file.read(header_length))
+
+        count = header["count"]
+        if count == 0:
+            timestamps, values = np.empty(0, TIMESTAMP_DTYPE), np.empty(0, VALUE_DTYPE)
+        else:
+            timestamps = np.memmap(path, TIMESTAMP_DTYPE, "r", int(header["timestamps_offset"]), (count,))
+            values = np.memmap(path, VALUE_DTYPE, "r", int(header["values_offset"]), (count,))
+
+        return cls(
+            path=path,
+            run=header["run"],
+            index={
+                metric: {operation: (bounds[0], bounds[1]) for operation, bounds in operations.items()}
+                for metric, operations in header["index"].items()
+            },
+            timestamps=timestamps,
+            measurements=values,
+        )
+
+    def __len__(self) -> int:
+        """Return the number of samples in the archive."""
+        return len(self.measurements)
+
+    def series(self) -> Iterator[tuple[str, str]]:
+        """Yield the metric and operation of each series of samples in the archive."""
+        for metric, operations in self.index.items():
+            for operation in operations:
+                yield metric, operation
+
+    def samples(self, operation: str, metric: str = "service_time") -> tuple[np.ndarray, np.ndarray]:
+        """Return views of the timestamps and values of the samples of a metric of an operation, ordered by time.
+
+        The views are empty if the operation has no such samples.
+        """
+        start, stop = self.index.get(metric, {}).get(operation, (0, 0))
+        return self.timestamps[start:stop], self.measurements[start:stop]
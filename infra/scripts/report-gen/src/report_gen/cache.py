@@ -0,0 +1,98 @@
+"""On-disk cache for parsed benchmark data files."""
+
+import hashlib
+import logging
+import os
+import pickle
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+DEFAULT_CACHE_DIR = Path(".report-gen-cache")
+
+# 256 MiB
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+
+# Bump when the format of cached values changes, to invalidate old entries
+CACHE_VERSION = 1
+
+
+@dataclass
+class ParsedFileCache:
+    """Cache the result of parsing a file, keyed by the file path, modification time and size.
+
+    Entries are pickled into the cache directory. When the directory grows over max_size bytes,
+    the least recently used entries are removed.
+    """
+
+    directory: Path = DEFAULT_CACHE_DIR
+    max_size: int = DEFAULT_MAX_SIZE
+
+    def key(self, file: Path, namespace: str) -> str:
+        """Return the cache key for a file parsed by the parser identified by namespace."""
+        stat = file.stat()
+        raw_key = f"{CACHE_VERSION}:{namespace}:{file.resolve()}:{stat.st_mtime_ns}:{stat.st_size}"
+        return hashlib.sha256(raw_key.encode()).hexdigest()
+
+    def load(self, file: Path, namespace: str, parser: Callable[[Path], T]) -> T:
+        """Return the parsed file from the cache, or parse it and store the result.
+
+        The namespace must identify the parser and any parameters which change its output.
+        """
+        entry = self.directory / f"{self.key(file, namespace)}.pickle"
+
+        try:
+            with entry.open("rb") as cache_file:
+                value: T = pickle.load(cache_file)  # noqa: S301
+        except FileNotFoundError:
+            pass
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            logger.warning(f"Ignoring corrupted cache entry {entry}")
+            entry.unlink(missing_ok=True)
+        else:
+            # Mark the entry as recently used
+            os.utime(entry)
+            return value
+
+        value = parser(file)
+        self.store(entry, value)
+        return value
+
+    def store(self, entry: Path, value: object) -> None:
+        """Store a value in the cache and evict old entries if needed."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        # Write to a temporary file first, so concurrent readers never see a partial entry
+        tmp_entry = entry.with_suffix(f".{os.getpid()}.tmp")
+        with tmp_entry.open("wb") as cache_file:
+            pickle.dump(value, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_entry.replace(entry)
+
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove the least recently used entries until the cache fits in max_size."""
+        entries: list[tuple[float, int, Path]] = []
+        for entry in self.directory.glob("*.pickle"):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            entry.unlink(missing_ok=True)
+            total_size -= size
+
+    def clear(self) -> None:
+        """Remove all entries from the cache."""
+        for entry in self.directory.glob("*.pickle"):
+            entry.unlink(missing_ok=True)
@@ -1,15 +1,172 @@
 """Helpers for diffing folders of benchmark results."""
 
 import csv
+import json
 import logging
+import math
+import statistics
+import xml.etree.ElementTree as ET
 from collections import defaultdict
+from dataclasses import asdict, dataclass, field
 from pathlib import Path
 
+from report_gen.cache import ParsedFileCache
+from report_gen.run_files import (
+    NODE_STATS_SUFFIX,
+    OPERATIONS_SUFFIX,
+    THROUGHPUT_SUFFIX,
+    OperationThroughput,
+    read_throughput_files,
+    run_file_prefix,
+)
+from report_gen.runs import RunSelection, to_float
+
 logger = logging.getLogger(__name__)
 
 
-def get_service_times(file: Path) -> dict[str, list[float]]:
-    """Retrieve service_times for each operation from file."""
+@dataclass
+class OperationDiff:
+    """Comparison of a single operation between two benchmark results."""
+
+    workload: str
+    operation: str
+    metric: str
+    percentile: str
+    file_a: str
+    file_b: str
+    samples_a: int
+    samples_b: int
+    median_a: float
+    median_b: float
+    # Median of B divided by median of A, infinite if only the median of A is 0
+    ratio: float
+    # Whether the outlier detector flagged the operation
+    outlier: bool
+    # Whether B is worse than A by more than the regression threshold
+    regression: bool
+
+    @property
+    def verdict(self) -> str:
+        """Return a short description of the comparison outcome."""
+        if self.regression:
+            return "regression"
+        if self.outlier:
+            return "outlier"
+        return "ok"
+
+
+@dataclass
+class DiffReport:
+    """Result of diffing two folders of benchmark results."""
+
+    folder_a: str
+    folder_b: str
+    max_ratio: float | None = None
+    operations: list[OperationDiff] = field(default_factory=list)
+
+    @property
+    def outlier_workloads(self) -> set[str]:
+        """Return the workloads with at least one outlier."""
+        return {op.workload for op in self.operations if op.outlier}
+
+    @property
+    def regressions(self) -> list[OperationDiff]:
+        """Return the operations whose ratio exceeded the regression threshold."""
+        return [op for op in self.operations if op.regression]
+
+    @property
+    def outliers(self) -> list[OperationDiff]:
+        """Return the operations flagged by the outlier detector."""
+        return [op for op in self.operations if op.outlier]
+
+    def to_json(self) -> str:
+        """Serialize the report to JSON."""
+        # Infinity is not valid JSON, so an infinite ratio is written as null
+        operations = [
+            asdict(op) | {"ratio": op.ratio if math.isfinite(op.ratio) else None, "verdict": op.verdict}
+            for op in self.operations
+        ]
+        report = {
+            "folder_a": self.folder_a,
+            "folder_b": self.folder_b,
+            "max_ratio": self.max_ratio,
+            "outlier_workloads": sorted(self.outlier_workloads),
+            "operations": operations,
+        }
+        return json.dumps(report, indent=2, allow_nan=False)
+
+    def to_junit(self) -> str:
+        """Serialize the report to JUnit XML.
+
+        Each pair of compared files is a test suite and each operation is a test case.
+        Regressions are reported as failures, outliers without a regression are only reported in the output.
+        """
+        suites: dict[tuple[str, str], list[OperationDiff]] = defaultdict(list)
+        for op in self.operations:
+            suites[op.file_a, op.file_b].append(op)
+
+        root = ET.Element(
+            "testsuites",
+            name="report-gen diff",
+            tests=str(len(self.operations)),
+            failures=str(len(self.regressions)),
+        )
+        for (file_a, file_b), operations in suites.items():
+            suite = ET.SubElement(
+                root,
+                "testsuite",
+                name=f"{file_a} vs {file_b}",
+                tests=str(len(operations)),
+                failures=str(sum(op.regression for op in operations)),
+            )
+            for op in operations:
+                case = ET.SubElement(
+                    suite, "testcase", classname=op.workload, name=f"{op.operation} {op.metric} p{op.percentile}"
+                )
+                details = (
+                    f"median A: {op.median_a} ({op.samples_a} samples), "
+                    f"median B: {op.median_b} ({op.samples_b} samples), "
+                    f"ratio B/A: {op.ratio:.3f}, outlier: {op.outlier}"
+                )
+                if op.regression:
+                    message = (
+                        f"B/A ratio {op.ratio:.3f} is below the 1/{self.max_ratio}x threshold"
+                        if op.metric in HIGHER_IS_BETTER_METRICS
+                        else f"B/A ratio {op.ratio:.3f} exceeds the {self.max_ratio}x threshold"
+                    )
+                    failure = ET.SubElement(case, "failure", message=message, type="regression")
+                    failure.text = details
+                else:
+                    ET.SubElement(case, "system-out").text = details
+
+        ET.indent(root)
+        return ET.tostring(root, encoding="unicode", xml_declaration=True)
+
+
+# Metrics where a larger value is better. For all others a larger value is a slowdown
+HIGHER_IS_BETTER_METRICS = {"throughput"}
+
+# Files written for each run by download-metrics, which are not benchmark results
+RUN_FILE_SUFFIXES = (NODE_STATS_SUFFIX, OPERATIONS_SUFFIX, THROUGHPUT_SUFFIX)
+
+
+def percentile_column(percentile: str) -> str:
+    r"""Return the CSV column holding the given percentile (e.g. 90 -> value\.90_0, 99.9 -> value\.99_9)."""
+    whole, _, fraction = percentile.partition(".")
+    return f"value\\.{whole}_{fraction or '0'}"
+
+
+def get_metrics(
+    file: Path, metrics: list[str], percentiles: list[str], runs: RunSelection | None = None
+) -> dict[tuple[str, str], dict[str, list[float]]]:
+    """Retrieve the values of each metric and percentile for each operation from file.
+
+    The file is read once and the result is keyed by (metric, percentile).
+    Only the runs selected by runs are kept, by default all runs but the warmup run.
+    """
+    if runs is None:
+        runs = RunSelection()
+
     row_list: list[list[str]]
     with file.open() as csv_file:
         csv_reader = csv.reader(csv_file)
@@ -17,43 +174,134 @@ def get_service_times(file: Path) -> dict[str, list[float]]:
 
     input_columns: dict[str, int] = {header_column: index for index, header_column in enumerate(row_list[0])}
 
-    # When changing this, make sure to update the formulas
-    output_column_order: list[str] = [
-        "operation",
-        "value\\.90_0",
-    ]
+    run_column = input_columns.get("user-tags\\.run")
+    name_column = input_columns.get("name")
+    operation_column = input_columns.get("operation")
+    if run_column is None or name_column is None or operation_column is None:
+        logger.warning("Missing run, name or operation columns in %s", file)
+        return {}
 
-    data = defaultdict(list)
-
-    for row_index, row in enumerate(row_list):
-        if row_index == 0:
+    value_columns: dict[str, int] = {}
+    for percentile in percentiles:
+        column = input_columns.get(percentile_column(percentile))
+        if column is None:
+            logger.warning("Percentile %s not found in %s", percentile, file)
             continue
+        value_columns[percentile] = column
 
-        # Ignore run 0 (warmup)
-        source_column_index: int | None = input_columns.get("user-tags\\.run")
-        if not source_column_index:
-            continue
-        if row[source_column_index] == "0":
-            continue
+    wanted_metrics = set(metrics)
+    metric_rows = [row for row in row_list[1:] if row[name_column] in wanted_metrics]
 
-        # Get service_time row
-        source_column_index = input_columns.get("name")
-        if not source_column_index:
-            continue
-        if row[source_column_index] != "service_time":
-            continue
+    # Select runs, trimming on the p90 values when available
+    trim_column = input_columns.get(percentile_column("90"), next(iter(value_columns.values()), run_column))
+    metric_rows = runs.filter_rows(
+        metric_rows,
+        run=lambda row: row[run_column],
+        series=lambda row: (row[name_column], row[operation_column]),
+        value=lambda row: to_float(row[trim_column]),
+    )
+
+    data: dict[tuple[str, str], dict[str, list[float]]] = defaultdict(lambda: defaultdict(list))
+
+    for row in metric_rows:
+        metric = row[name_column]
+        operation = row[operation_column]
+        for percentile, column in value_columns.items():
+            if row[column]:
+                data[metric, percentile][operation].append(float(row[column]))
+
+    # Convert to plain dicts so the result can be cached
+    return {selection: dict(operations) for selection, operations in data.items()}
+
+
+def load_metrics(
+    file: Path,
+    metrics: list[str],
+    percentiles: list[str],
+    runs: RunSelection | None = None,
+    cache: ParsedFileCache | None = None,
+) -> dict[tuple[str, str], dict[str, list[float]]]:
+    """Retrieve the metrics from file, going through the parsed file cache if one is provided."""
+    if runs is None:
+        runs = RunSelection()
+    if cache is None:
+        return get_metrics(file, metrics, percentiles, runs)
+    namespace = f"diff-metrics:{','.join(metrics)}:{','.join(percentiles)}:{runs}"
+    return cache.load(file, namespace, lambda path: get_metrics(path, metrics, percentiles, runs))
+
+
+ThroughputBenchmark = tuple[str, str, str, str]
+
+
+def get_throughputs(
+    folder: Path, runs: RunSelection | None = None
+) -> dict[ThroughputBenchmark, dict[str, list[float]]]:
+    """Retrieve the median throughput of each run of each operation from the throughput files in folder.
+
+    The result is keyed by the name of the benchmark, made of its run group, engine, engine version and workload.
+    Only the runs selected by runs are kept, by default all runs but the warmup run.
+    """
+    if runs is None:
+        runs = RunSelection()
 
-        # Get p90 service_time values for each operation
-        processed_row: list[str] = []
-        for column_name in output_column_order:
-            source_column_index = input_columns.get(column_name)
-            column_value: str = "(null)" if source_column_index is None else row[source_column_index]
-            processed_row.append(column_value)
-        data[processed_row[0]].append(float(processed_row[1]))
+    benchmarks: dict[ThroughputBenchmark, list[OperationThroughput]] = defaultdict(list)
+    for throughput in read_throughput_files(folder):
+        # Names the benchmark like its throughput files, without the run
+        name = run_file_prefix(throughput.run_key()).rsplit("-", 1)[0]
+        benchmarks[name, throughput.engine, throughput.engine_version, throughput.workload].append(throughput)
 
+    data: dict[ThroughputBenchmark, dict[str, list[float]]] = {}
+    for benchmark, throughputs in benchmarks.items():
+        selected = runs.filter_rows(
+            throughputs,
+            run=lambda throughput: throughput.run,
+            series=lambda throughput: throughput.operation,
+            value=lambda throughput: math.nan if throughput.median is None else throughput.median,
+        )
+        operations: dict[str, list[float]] = defaultdict(list)
+        for throughput in selected:
+            if throughput.median is not None:
+                operations[throughput.operation].append(throughput.median)
+        data[benchmark] = dict(operations)
     return data
 
 
+def diff_throughputs(
+    folder_a: Path, folder_b: Path, max_ratio: float | None, runs: RunSelection | None = None
+) -> list[OperationDiff]:
+    """Compare the median throughput of the operations of the benchmarks of the same engine and workload."""
+    throughputs_a = get_throughputs(folder_a, runs)
+    throughputs_b = get_throughputs(folder_b, runs)
+
+    rv: list[OperationDiff] = []
+    for (name_a, *benchmark_a), data_a in sorted(throughputs_a.items()):
+        matches = [
+            (name_b, data_b) for (name_b, *benchmark_b), data_b in throughputs_b.items() if benchmark_b == benchmark_a
+        ]
+        if not matches:
+            logger.warning("Throughput of %s not found in %s", name_a, folder_b)
+        for name_b, data_b in sorted(matches):
+            # The median throughput is the 50th percentile of the throughput samples of a run
+            rv.extend(
+                compare_operations(
+                    benchmark_a[-1],
+                    "throughput",
+                    "50",
+                    folder_a / f"{name_a}{THROUGHPUT_SUFFIX}",
+                    folder_b / f"{name_b}{THROUGHPUT_SUFFIX}",
+                    data_a,
+                    data_b,
+                    max_ratio,
+                )
+            )
+    return rv
+
+
+def get_service_times(file: Path) -> dict[str, list[float]]:
+    """Retrieve p90 service_times for each operation from file."""
+    return get_metrics(file, ["service_time"], ["90"]).get(("service_time", "90"), {})
+
+
 def similar(file_name: str, folder: Path) -> list[Path]:
     """Find similar files in a folder."""
     rv: list[Path] = []
@@ -67,6 +315,8 @@ def match(folder_a: Path, folder_b: Path) -> list[tuple[Path, Path]]:
     """Match files to compare from folders."""
     files = []
     for file_a in folder_a.iterdir():
+        if file_a.name.endswith(RUN_FILE_SUFFIXES):
+            continue
         file_name = "-".join(file_a.name.split("-")[3:])
         files_b = similar(file_name, folder_b)
         if files_b:
@@ -76,46 +326,130 @@ def match(folder_a: Path, folder_b: Path) -> list[tuple[Path, Path]]:
     return files
 
 
-def diff_folders(folder_a: Path, folder_b: Path) -> None:
-    """Diffs two folders of benchmark results."""
-    logger.info("Diffing folders %s and %s", folder_a, folder_b)
+def _get_bounds(data: list[float]) -> tuple[float, float]:
+    """Get lower and upper bounds."""
+    return 0, max(data) * 1.5
 
-    # Match files to compare from folders
-    files = match(folder_a, folder_b)
 
-    def get_bounds(data: list[float]) -> tuple[float, float]:
-        """Get lower and upper bounds."""
-        return 0, max(data) * 1.5
-
-    def is_outlier(data: list[float], lower_bound: float, upper_bound: float) -> bool:
-        """Check if data contains an outlier."""
-        outliers = [x for x in data if x < lower_bound or x > upper_bound]
-        if len(outliers) > 0:
-            logger.info("Data B: %s", data)
-            logger.info("Lower bound: %s | Upper bound: %s", lower_bound, upper_bound)
-        return len(outliers) > 0
-
-    def has_outlier(file_a: Path, file_b: Path, data_a: dict[str, list[float]], data_b: dict[str, list[float]]) -> bool:
-        """Check if data_a has outliers compared to data_b."""
-        rv: bool = False
-
-        # For each operation
-        for operation, values_a in data_a.items():
-            if operation not in data_b:
-                continue
+def _is_outlier(data: list[float], lower_bound: float, upper_bound: float) -> bool:
+    """Check if data contains an outlier."""
+    outliers = [x for x in data if x < lower_bound or x > upper_bound]
+    if len(outliers) > 0:
+        logger.info("Data B: %s", data)
+        logger.info("Lower bound: %s | Upper bound: %s", lower_bound, upper_bound)
+    return len(outliers) > 0
+
+
+def _has_outlier(file_a: Path, file_b: Path, operation: str, values_a: list[float], values_b: list[float]) -> bool:
+    """Check if values_b has outliers compared to values_a."""
+    if _is_outlier(values_b, *_get_bounds(values_a)):
+        logger.info("Data A: %s", values_a)
+        logger.warning("Outlier detected for %s in %s (B) compared to %s (A)", operation, file_b.name, file_a.name)
+        logger.info("+" * 100)
+        return True
+    return False
+
+
+def _ratio(median_a: float, median_b: float) -> float:
+    """Return the B/A ratio, 1.0 if both medians are 0 and infinite if only A is 0."""
+    if median_a:
+        return median_b / median_a
+    return float("inf") if median_b else 1.0
+
+
+def is_regression(metric: str, ratio: float, max_ratio: float) -> bool:
+    """Check if a B/A ratio is worse than the allowed ratio, given the direction of the metric."""
+    if metric in HIGHER_IS_BETTER_METRICS:
+        return ratio * max_ratio < 1
+    return ratio > max_ratio
 
-            # Check if data_b has outliers compared to data_a
-            values_b = data_b[operation]
-            if is_outlier(values_b, *get_bounds(values_a)):
-                logger.info("Data A: %s", values_a)
-                logger.warning(
-                    "Outlier detected for %s in %s (B) compared to %s (A)", operation, file_b.name, file_a.name
-                )
-                logger.info("+" * 100)
-                rv = True
-        return rv
 
-    workloads: set = set()
+def compare_operations(  # noqa: PLR0913
+    workload: str,
+    metric: str,
+    percentile: str,
+    file_a: Path,
+    file_b: Path,
+    data_a: dict[str, list[float]],
+    data_b: dict[str, list[float]],
+    max_ratio: float | None,
+) -> list[OperationDiff]:
+    """Compare the operations found in both files."""
+    rv: list[OperationDiff] = []
+
+    for operation, values_a in data_a.items():
+        values_b = data_b.get(operation)
+        if not values_a or not values_b:
+            continue
+
+        # Check if either side has outliers compared to the other
+        outlier = _has_outlier(file_a, file_b, operation, values_a, values_b)
+        outlier = _has_outlier(file_b, file_a, operation, values_b, values_a) or outlier
+
+        median_a = statistics.median(values_a)
+        median_b = statistics.median(values_b)
+        ratio = _ratio(median_a, median_b)
+        regression = max_ratio is not None and is_regression(metric, ratio, max_ratio)
+        if regression:
+            logger.warning(
+                "Regression detected for %s %s p%s in %s (B) compared to %s (A): ratio %.3f",
+                operation,
+                metric,
+                percentile,
+                file_b.name,
+                file_a.name,
+                ratio,
+            )
+
+        rv.append(
+            OperationDiff(
+                workload=workload,
+                operation=operation,
+                metric=metric,
+                percentile=percentile,
+                file_a=file_a.name,
+                file_b=file_b.name,
+                samples_a=len(values_a),
+                samples_b=len(values_b),
+                median_a=median_a,
+                median_b=median_b,
+                ratio=ratio,
+                outlier=outlier,
+                regression=regression,
+            )
+        )
+
+    return rv
+
+
+def diff_folders(  # noqa: PLR0913
+    folder_a: Path,
+    folder_b: Path,
+    max_ratio: float | None = None,
+    metrics: list[str] | None = None,
+    percentiles: list[str] | None = None,
+    runs: RunSelection | None = None,
+    cache: ParsedFileCache | None = None,
+) -> DiffReport:
+    """Diffs two folders of benchmark results.
+
+    By default the p90 service_time is compared. If max_ratio is set, operations whose median in B is
+    worse than the median in A by more than max_ratio times are marked as regressions.
+    The throughput is read from the throughput files written by download-metrics, and compared on its median.
+    runs selects the runs used from each file, by default all runs but the warmup run.
+    If a cache is provided, parsed files are reused between invocations.
+    """
+    if metrics is None:
+        metrics = ["service_time"]
+    if percentiles is None:
+        percentiles = ["90"]
+
+    logger.info("Diffing folders %s and %s", folder_a, folder_b)
+
+    report = DiffReport(folder_a=str(folder_a), folder_b=str(folder_b), max_ratio=max_ratio)
+
+    # Match files to compare from folders
+    files = match(folder_a, folder_b)
 
     # For each file (a benchmark test) to compare
     for file_a, file_b in files:
@@ -123,11 +457,31 @@ def diff_folders(folder_a: Path, folder_b: Path) -> None:
         workload = file_a.name.split("-")[5]
 
         # Retrieve data from files
-        data_a = get_service_times(file_a)
-        data_b = get_service_times(file_b)
+        data_a = load_metrics(file_a, metrics, percentiles, runs, cache)
+        data_b = load_metrics(file_b, metrics, percentiles, runs, cache)
+
+        for metric in metrics:
+            if metric == "throughput":
+                continue
+            for percentile in percentiles:
+                report.operations.extend(
+                    compare_operations(
+                        workload,
+                        metric,
+                        percentile,
+                        file_a,
+                        file_b,
+                        data_a.get((metric, percentile), {}),
+                        data_b.get((metric, percentile), {}),
+                        max_ratio,
+                    )
+                )
+
+    if "throughput" in metrics:
+        report.operations.extend(diff_throughputs(folder_a, folder_b, max_ratio, runs))
 
-        # Check if data_b has outliers compared to data_a
-        if has_outlier(file_a, file_b, data_a, data_b) or has_outlier(file_b, file_a, data_b, data_a):
-            workloads.add(workload)
+    logger.info("Summary: Workloads with outliers detected: %s", report.outlier_workloads)
+    if max_ratio is not None:
+        logger.info("Summary: Operations with regressions detected: %s", len(report.regressions))
 
-    logger.info("Summary: Workloads with outliers detected: %s", workloads)
+    return report
@@ -4,7 +4,7 @@ import csv
 import itertools
 import json
 import logging
-from collections.abc import Collection, Mapping
+from collections.abc import Collection, Iterator, Mapping
 from datetime import datetime
 from enum import Enum
 from operator import attrgetter
@@ -120,6 +120,25 @@ class Source(Enum):
     Other = "not-used"
 
 
+class Pagination(Enum):
+    """Ways to page through results which do not fit in a single search response."""
+
+    Scroll = "scroll"
+    PointInTime = "pit"
+
+
+RESULTS_INDEX = "benchmark-results*"
+
+# User the datastore clients authenticate as, unless told otherwise
+DEFAULT_USERNAME = "admin"
+
+# Maximum number of documents returned by a search request
+MAX_PAGE_SIZE = 10000
+
+# How long the datastore keeps a scroll or point in time open between requests
+KEEP_ALIVE = "1m"
+
+
 def download(  # noqa: PLR0913
     *,
     start_date: datetime,
@@ -127,111 +146,186 @@ def download(  # noqa: PLR0913
     host: str,
     port: int = 443,
     password: str,
+    use_ssl: bool = True,
     environment: str = "",
     run_type: str = "official",
     engine_type: str | None,
     distribution_version: str | None,
     sources: list[Source],
+    pagination: Pagination = Pagination.Scroll,
+    page_size: int = MAX_PAGE_SIZE,
 ) -> list[BenchmarkResult]:
-    """Download the specified benchmark results."""
+    """Download the specified benchmark results.
+
+    Results which do not fit in a single search response of page_size documents are paged through
+    with the given pagination.
+    """
+    query: dict[str, Any] = {
+        "query": results_query(
+            start_date=start_date,
+            end_date=end_date,
+            environment=environment,
+            run_type=run_type,
+            engine_type=engine_type,
+            distribution_version=distribution_version,
+            sources=sources,
+        )
+    }
+    query["query"]["bool"]["must"].extend([{"exists": {"field": "value.50_0"}}, {"exists": {"field": "value.90_0"}}])
+
+    client = create_client(host, port, password, use_ssl=use_ssl)
+
+    response = client.count(body=query, index=RESULTS_INDEX)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(json.dumps(response))
+
+    documents_count = response["count"]
+    logger.info(f"Found {documents_count} documents to download")
+
+    if documents_count == 0:
+        return []
+
+    query.update({"size": page_size})
+
+    # If all the documents fit in one response use the normal search
+    if documents_count < page_size:
+        response = client.search(body=query, index=RESULTS_INDEX)
+        results = _handle_results_response(response)
+    else:
+        results = [
+            result
+            for response in search_pages(client, query, RESULTS_INDEX, pagination)
+            for result in _handle_results_response(response)
+        ]
+
+    results_count = len(results)
+    logger.info(f"Received {results_count} results")
+
+    sorted_benchmark_results: list[BenchmarkResult] = sorted(results, key=attrgetter(*FIELDS_SORT_PRIORITY))
+
+    return sorted_benchmark_results
+
+
+def results_query(  # noqa: PLR0913
+    *,
+    start_date: datetime,
+    end_date: datetime,
+    environment: str,
+    run_type: str,
+    engine_type: str | None,
+    distribution_version: str | None,
+    sources: list[Source],
+) -> dict[str, Any]:
+    """Return the query matching the results documents of the operations of the specified runs."""
     if start_date > end_date:
         msg = f"Wrong date range. start date {start_date} is after end date {end_date}."
         raise ValueError(msg)
 
-    query: dict[str, Any] = {
-        "query": {
-            "bool": {
-                "must": [
-                    {
-                        "range": {
-                            "test-execution-timestamp": {
-                                "gte": start_date.isoformat(timespec="seconds"),
-                                "lte": end_date.isoformat(timespec="seconds"),
-                                "format": "strict_date_time_no_millis",
-                            }
-                        }
-                    },
-                    {"prefix": {"environment": {"value": environment}}},
-                    {"terms": {"user-tags.run-type": [run_type]}},
-                    {"exists": {"field": "operation"}},
-                    {"exists": {"field": "value.50_0"}},
-                    {"exists": {"field": "value.90_0"}},
-                    {"exists": {"field": "user-tags.run-group"}},
-                    {"exists": {"field": "user-tags.run"}},
-                    {"exists": {"field": "user-tags.engine-type"}},
-                    {"exists": {"field": "user-tags.shard-count"}},
-                    {"exists": {"field": "user-tags.replica-count"}},
-                ],
-            },
+    must: list[dict[str, Any]] = [
+        {
+            "range": {
+                "test-execution-timestamp": {
+                    "gte": start_date.isoformat(timespec="seconds"),
+                    "lte": end_date.isoformat(timespec="seconds"),
+                    "format": "strict_date_time_no_millis",
+                }
+            }
         },
-    }
+        {"prefix": {"environment": {"value": environment}}},
+        {"terms": {"user-tags.run-type": [run_type]}},
+        {"exists": {"field": "operation"}},
+        {"exists": {"field": "user-tags.run-group"}},
+        {"exists": {"field": "user-tags.run"}},
+        {"exists": {"field": "user-tags.engine-type"}},
+        {"exists": {"field": "user-tags.shard-count"}},
+        {"exists": {"field": "user-tags.replica-count"}},
+    ]
 
     if engine_type is not None:
-        query["query"]["bool"]["must"].append({"term": {"user-tags.engine-type": {"value": engine_type}}})
+        must.append({"term": {"user-tags.engine-type": {"value": engine_type}}})
 
     if distribution_version is not None:
-        query["query"]["bool"]["must"].append({"term": {"distribution-version": {"value": distribution_version}}})
+        must.append({"term": {"distribution-version": {"value": distribution_version}}})
+
+    return {"bool": {"must": must, **build_source_query(sources)}}
 
-    query["query"]["bool"].update(_build_source_query(sources))
 
+def create_client(
+    host: str, port: int, password: str, *, username: str = DEFAULT_USERNAME, use_ssl: bool = True
+) -> OpenSearch:
+    """Return a client of the datastore, authenticated as username."""
     transport_class = VerboseTransport if logger.isEnabledFor(logging.DEBUG) else Transport
 
-    client = OpenSearch(
+    return OpenSearch(
         hosts=[{"host": host, "port": port}],
         http_compress=True,
-        http_auth=("admin", password),
-        use_ssl=True,
+        http_auth=(username, password),
+        use_ssl=use_ssl,
         verify_certs=False,
         ssl_assert_hostname=False,
         ssl_show_warn=False,
         transport_class=transport_class,
     )
 
-    response = client.count(body=query)
-    logger.debug(json.dumps(response))
 
-    documents_count = response["count"]
-    logger.info(f"Found {documents_count} documents to download")
+def search_pages(
+    client: OpenSearch, query: dict[str, Any], index: str, pagination: Pagination = Pagination.Scroll
+) -> Iterator[dict[str, Any]]:
+    """Yield the search responses of the pages of documents matching the query, of query["size"] documents.
 
-    if documents_count == 0:
-        return []
+    The scroll or point in time is released once all the pages were yielded, or the generator is closed.
+    """
+    if pagination is Pagination.PointInTime:
+        yield from _search_point_in_time(client, query, index)
+    else:
+        yield from _search_scroll(client, query, index)
 
-    # Request batches of 10000 documents, which is the maximum
-    query.update({"size": 10000})
 
-    results: list[BenchmarkResult] = []
+def _search_scroll(client: OpenSearch, query: dict[str, Any], index: str) -> Iterator[dict[str, Any]]:
+    response = client.search(body=query, scroll=KEEP_ALIVE, index=index)
+    scroll_id = response["_scroll_id"]
 
-    # If we have less than 10000 documents use the normal search
-    if documents_count < 10000:  # noqa: PLR2004
-        response = client.search(body=query, index="benchmark-results*")
-        results = _handle_results_response(response)
-    else:
-        # Otherwise use the scroll request
-        response = client.search(body=query, scroll="1m", index="benchmark-results*")
-        results = _handle_results_response(response)
-        pagination_id = response["_scroll_id"]
+    try:
         while len(response["hits"]["hits"]) > 0:
-            response = client.scroll(scroll_id=pagination_id, scroll="1m")
-            results += _handle_results_response(response)
+            yield response
+            response = client.scroll(scroll_id=scroll_id, scroll=KEEP_ALIVE)
+            scroll_id = response.get("_scroll_id", scroll_id)
+    finally:
+        client.clear_scroll(scroll_id=scroll_id, ignore=(404,))
 
-    results_count = len(results)
-    logger.info(f"Received {results_count} results")
 
-    sorted_benchmark_results: list[BenchmarkResult] = sorted(results, key=attrgetter(*FIELDS_SORT_PRIORITY))
+def _search_point_in_time(client: OpenSearch, query: dict[str, Any], index: str) -> Iterator[dict[str, Any]]:
+    pit_id = client.create_pit(index=index, keep_alive=KEEP_ALIVE)["pit_id"]
 
-    return sorted_benchmark_results
+    # Pages are requested after the last document of the previous page, so the documents need a unique sort order.
+    # _shard_doc is the tiebreaker of points in time: unlike _id, it does not load a field of every document
+    query = {**query, "pit": {"id": pit_id, "keep_alive": KEEP_ALIVE}, "sort": [{"_shard_doc": "asc"}]}
+
+    try:
+        while True:
+            response = client.search(body=query)
+            yield response
+
+            documents = response["hits"]["hits"]
+            if len(documents) < query["size"]:
+                break
+            query["search_after"] = documents[-1]["sort"]
+            query["pit"]["id"] = pit_id = response.get("pit_id", pit_id)
+    finally:
+        client.delete_pit(body={"pit_id": [pit_id]}, ignore=(404,))
 
 
-def _build_source_query(sources: list[Source]) -> dict[str, Any]:
+def build_source_query(sources: list[Source], ci_field: str = "user-tags.ci") -> dict[str, Any]:
+    """Return the bool query clauses matching documents from the given sources."""
     should_clauses: list[dict[str, Any]] = []
 
     if Source.Other in sources:
-        # user-tags.ci not exists OR
+        # ci tag not exists OR
         should_clauses.append(
-            {"bool": {"must_not": {"exists": {"field": "user-tags.ci"}}}},
+            {"bool": {"must_not": {"exists": {"field": ci_field}}}},
         )
 
-    should_clauses.append({"terms": {"user-tags.ci": [source.value for source in sources]}})
+    should_clauses.append({"terms": {ci_field: [source.value for source in sources]}})
 
     return {"should": should_clauses, "minimum_should_match": 1}
 
@@ -256,7 +350,8 @@ def _handle_results_response(
         raise ValueError(msg)
 
     logger.debug(f"Documents: {len(documents)}")
-    logger.debug("%s", json.dumps(response))
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("%s", json.dumps(response))
 
     results = []
     for document in documents:
@@ -393,7 +488,7 @@ def dump_csv_files(results: list[BenchmarkResult], folder: Path) -> None:
             if csv_file is not None:
                 csv_file.close()
             csv_file_path = (
-                folder / f"{current_run_group.strftime("%Y-%m-%dT%H%M%SZ")}-{current_engine}"
+                folder / f"{current_run_group.strftime('%Y-%m-%dT%H%M%SZ')}-{current_engine}"
                 f"-{current_engine_version}-{current_workload}-{current_workload_subtype}-{current_test_procedure}.csv"
             )
             csv_file = csv_file_path.open("w", newline="")
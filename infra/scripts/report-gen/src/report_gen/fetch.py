@@ -0,0 +1,113 @@
+"""Helpers for fetching all the documents of a run group from an OpenSearch datastore, to debug its runs.
+
+OpenSearch Benchmark stores a test execution document per run in benchmark-test-*, holding the results
+of the run like its test_execution.json, and a document per metric of each operation in benchmark-results*.
+Both indices are paged through concurrently, and the documents of each run are written to their own files.
+"""
+
+import json
+import logging
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from opensearchpy import OpenSearch
+
+from .download import DEFAULT_USERNAME, MAX_PAGE_SIZE, RESULTS_INDEX, Pagination, create_client, search_pages
+from .runs import run_sort_key
+
+logger = logging.getLogger(__name__)
+
+TEST_EXECUTIONS_INDEX = "benchmark-test-*"
+
+# Names of the files written for each run, like those written by get_results.sh
+TEST_EXECUTION_FILE = "res-{run}.json"
+RESULTS_FILE = "res-{run}-results.json"
+
+RUN_GROUP_FORMAT = "%Y_%m_%d_%H_%M_%S"
+
+
+def validate_run_group(run_group: str) -> str:
+    """Return the run group ID, raising a ValueError if it is not like 2024_09_20_13_56_42."""
+    try:
+        datetime.strptime(run_group, RUN_GROUP_FORMAT)  # noqa: DTZ007
+    except ValueError:
+        msg = f"Wrong run group {run_group}. Expected a run group ID like 2024_09_20_13_56_42."
+        raise ValueError(msg) from None
+    return run_group
+
+
+def _sources(client: OpenSearch, index: str, run_group: str, pagination: Pagination, page_size: int) -> Iterator[dict]:
+    body = {"query": {"term": {"user-tags.run-group": run_group}}, "size": page_size}
+    for response in search_pages(client, body, index, pagination):
+        for document in response["hits"]["hits"]:
+            yield document["_source"]
+
+
+def _by_run(client: OpenSearch, index: str, run_group: str, pagination: Pagination, page_size: int) -> dict[str, list]:
+    runs: dict[str, list[dict]] = {}
+    for source in _sources(client, index, run_group, pagination, page_size):
+        run = source.get("user-tags", {}).get("run")
+        if run is None:
+            logger.warning(f"Skipping a document of {index} without a run tag")
+            continue
+        runs.setdefault(str(run), []).append(source)
+    return runs
+
+
+def fetch_run_group(  # noqa: PLR0913
+    run_group: str,
+    *,
+    host: str,
+    port: int = 443,
+    password: str,
+    username: str = DEFAULT_USERNAME,
+    use_ssl: bool = True,
+    pagination: Pagination = Pagination.Scroll,
+    page_size: int = MAX_PAGE_SIZE,
+) -> tuple[dict[str, dict], dict[str, list[dict]]]:
+    """Return the test execution and the results documents of each run of a run group, including the warmup run.
+
+    The test executions and the results are paged through concurrently, in pages of page_size documents.
+    """
+    validate_run_group(run_group)
+    client = create_client(host, port, password, username=username, use_ssl=use_ssl)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        test_executions = executor.submit(_by_run, client, TEST_EXECUTIONS_INDEX, run_group, pagination, page_size)
+        results = executor.submit(_by_run, client, RESULTS_INDEX, run_group, pagination, page_size)
+
+    executions: dict[str, dict] = {}
+    for run, documents in test_executions.result().items():
+        if len(documents) > 1:
+            logger.warning(f"Found {len(documents)} test executions of run {run}, keeping the last one")
+        executions[run] = documents[-1]
+
+    run_results = results.result()
+    logger.info(
+        f"Received {len(executions)} test executions and "
+        f"{sum(len(documents) for documents in run_results.values())} results of run group {run_group}"
+    )
+    return executions, run_results
+
+
+def dump_run_group(test_executions: dict[str, dict], results: dict[str, list[dict]], folder: Path) -> int:
+    """Write the test execution and the results of each run to JSON files in the folder.
+
+    Return the number of runs written.
+    """
+    runs = sorted(test_executions.keys() | results.keys(), key=run_sort_key)
+    for run in runs:
+        if run in test_executions:
+            with (folder / TEST_EXECUTION_FILE.format(run=run)).open("w") as json_file:
+                json.dump(test_executions[run], json_file, indent=2)
+        else:
+            logger.warning(f"Missing the test execution of run {run}")
+        if run in results:
+            with (folder / RESULTS_FILE.format(run=run)).open("w") as json_file:
+                json.dump(results[run], json_file, indent=2)
+
+    if runs:
+        logger.info(f"Written {len(runs)} runs to {folder}")
+    return len(runs)
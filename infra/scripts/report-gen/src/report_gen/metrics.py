@@ -0,0 +1,368 @@
+"""Helpers for downloading the node-stats telemetry of benchmark runs from an OpenSearch datastore.
+
+OpenSearch Benchmark records node-stats documents in benchmark-metrics* every few seconds.
+They are downsampled by the datastore into time buckets with a composite aggregation, which is
+paged through, so the documents themselves are never downloaded. The time window of each
+operation is aggregated from its service_time samples the same way, so the node stats can be
+attributed to the operations running at the time.
+"""
+
+import csv
+import itertools
+import logging
+import re
+from collections.abc import Collection, Iterable, Iterator
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from opensearchpy import OpenSearch
+
+from .download import Source, build_source_query, create_client
+from .run_files import NODE_STATS_SUFFIX, OPERATIONS_SUFFIX, RunKey, run_file_prefix
+
+logger = logging.getLogger(__name__)
+
+METRICS_INDEX = "benchmark-metrics*"
+
+DEFAULT_INTERVAL = "30s"
+
+# Number of buckets requested at once
+PAGE_SIZE = 1000
+
+# Fields identifying a run, in the order of the buckets
+RUN_FIELDS: dict[str, str] = {
+    "run_group": "meta.tag_run-group",
+    "engine": "meta.tag_engine-type",
+    "engine_version": "meta.distribution_version",
+    "workload": "workload",
+    "run": "meta.tag_run",
+}
+
+# Columns of the time series, with the aggregation and node-stats field they are computed from
+NODE_STATS_COLUMNS: dict[str, tuple[str, str]] = {
+    "heap_used_percent": ("max", "jvm_mem_heap_used_percent"),
+    "heap_used_bytes": ("max", "jvm_mem_heap_used_in_bytes"),
+    "young_gc_count": ("max", "jvm_gc_collectors_young_collection_count"),
+    "young_gc_millis": ("max", "jvm_gc_collectors_young_collection_time_in_millis"),
+    "old_gc_count": ("max", "jvm_gc_collectors_old_collection_count"),
+    "old_gc_millis": ("max", "jvm_gc_collectors_old_collection_time_in_millis"),
+    "search_threads_active": ("max", "thread_pool_search_active"),
+    "search_queue": ("max", "thread_pool_search_queue"),
+    "search_rejected": ("max", "thread_pool_search_rejected"),
+    "write_queue": ("max", "thread_pool_write_queue"),
+    "write_rejected": ("max", "thread_pool_write_rejected"),
+    "process_cpu_percent": ("avg", "process_cpu_percent"),
+    "segments_count": ("max", "indices_segments_count"),
+}
+
+# Counters which only increase while a node runs, written as their increase since the previous bucket
+CUMULATIVE_COLUMNS = frozenset(
+    {"young_gc_count", "young_gc_millis", "old_gc_count", "old_gc_millis", "search_rejected", "write_rejected"}
+)
+
+_INTERVAL = re.compile(r"(\d+)([smhd])")
+_UNIT_SECONDS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def interval_seconds(interval: str) -> int:
+    """Return the length of an interval like 30s or 1m, in seconds."""
+    match = _INTERVAL.fullmatch(interval)
+    if match is None:
+        msg = f"Wrong interval {interval}. Expected a number followed by s, m, h or d, like 30s."
+        raise ValueError(msg)
+    return int(match[1]) * _UNIT_SECONDS[match[2]]
+
+
+@dataclass(frozen=True)
+class NodeStatsSample:
+    """Node stats of a node during one time bucket of a run."""
+
+    run_group: datetime
+    engine: str
+    engine_version: str
+    workload: str
+    run: str
+    node: str
+    timestamp: datetime
+    # Length of the bucket starting at timestamp
+    seconds: int
+    # Number of node-stats documents in the bucket
+    documents: int
+    stats: dict[str, float | None]
+
+    def run_key(self) -> RunKey:
+        """Return the fields identifying the run of the sample."""
+        return self.run_group, self.engine, self.engine_version, self.workload, self.run
+
+
+@dataclass(frozen=True)
+class OperationWindow:
+    """Time window over which the requests of an operation were measured during a run."""
+
+    run_group: datetime
+    engine: str
+    engine_version: str
+    workload: str
+    run: str
+    operation: str
+    start: datetime
+    end: datetime
+    # Number of requests measured
+    count: int
+
+    def run_key(self) -> RunKey:
+        """Return the fields identifying the run of the window."""
+        return self.run_group, self.engine, self.engine_version, self.workload, self.run
+
+
+def runs_query(  # noqa: PLR0913
+    names: Collection[str],
+    *,
+    start_date: datetime,
+    end_date: datetime,
+    environment: str,
+    run_type: str,
+    engine_type: str | None,
+    distribution_version: str | None,
+    sources: list[Source],
+) -> dict[str, Any]:
+    """Return the query matching the metrics documents with one of the given names of the specified runs."""
+    if start_date > end_date:
+        msg = f"Wrong date range. start date {start_date} is after end date {end_date}."
+        raise ValueError(msg)
+
+    must: list[dict[str, Any]] = [
+        {"terms": {"name": list(names)}},
+        {
+            "range": {
+                "test-execution-timestamp": {
+                    "gte": start_date.isoformat(timespec="seconds"),
+                    "lte": end_date.isoformat(timespec="seconds"),
+                    "format": "strict_date_time_no_millis",
+                }
+            }
+        },
+        {"prefix": {"environment": {"value": environment}}},
+        {"terms": {"meta.tag_run-type": [run_type]}},
+        *({"exists": {"field": field}} for field in RUN_FIELDS.values()),
+    ]
+
+    if engine_type is not None:
+        must.append({"term": {"meta.tag_engine-type": {"value": engine_type}}})
+
+    if distribution_version is not None:
+        must.append({"term": {"meta.distribution_version": {"value": distribution_version}}})
+
+    return {"bool": {"must": must, **build_source_query(sources, "meta.tag_ci")}}
+
+
+def composite_buckets(client: OpenSearch, query: dict, sources: list[dict], aggs: dict) -> Iterator[dict]:
+    """Yield the buckets of a composite aggregation, requesting PAGE_SIZE buckets at a time."""
+    composite: dict[str, Any] = {"size": PAGE_SIZE, "sources": sources}
+    body = {"size": 0, "query": query, "aggs": {"buckets": {"composite": composite, "aggs": aggs}}}
+
+    while True:
+        response = client.search(body=body, index=METRICS_INDEX)
+        aggregation = response["aggregations"]["buckets"]
+        buckets = aggregation["buckets"]
+        yield from buckets
+
+        after_key = aggregation.get("after_key")
+        if len(buckets) < PAGE_SIZE or after_key is None:
+            return
+        composite["after"] = after_key
+
+
+def run_from_key(key: dict[str, Any]) -> dict[str, Any]:
+    """Return the fields of the run identified by the key of a bucket of RUN_FIELDS."""
+    return {
+        "run_group": datetime.strptime(key["run_group"], "%Y_%m_%d_%H_%M_%S"),  # noqa: DTZ007
+        "engine": key["engine"],
+        "engine_version": key["engine_version"],
+        "workload": key["workload"],
+        "run": str(key["run"]),
+    }
+
+
+def _from_millis(millis: float) -> datetime:
+    return datetime.fromtimestamp(millis / 1000, tz=UTC)
+
+
+def download_metrics(  # noqa: PLR0913
+    *,
+    start_date: datetime,
+    end_date: datetime,
+    host: str,
+    port: int = 443,
+    password: str,
+    use_ssl: bool = True,
+    environment: str = "",
+    run_type: str = "official",
+    engine_type: str | None,
+    distribution_version: str | None,
+    sources: list[Source],
+    interval: str = DEFAULT_INTERVAL,
+) -> Iterator[NodeStatsSample]:
+    """Yield the node stats of the specified runs, aggregated per node and time interval.
+
+    The samples are ordered by run, then node, then time.
+    """
+    seconds = interval_seconds(interval)
+    query = runs_query(
+        ["node-stats"],
+        start_date=start_date,
+        end_date=end_date,
+        environment=environment,
+        run_type=run_type,
+        engine_type=engine_type,
+        distribution_version=distribution_version,
+        sources=sources,
+    )
+    composite_sources = [
+        *({name: {"terms": {"field": field}}} for name, field in RUN_FIELDS.items()),
+        {"node": {"terms": {"field": "meta.node_name"}}},
+        {"timestamp": {"date_histogram": {"field": "@timestamp", "fixed_interval": interval}}},
+    ]
+    aggs = {column: {aggregation: {"field": field}} for column, (aggregation, field) in NODE_STATS_COLUMNS.items()}
+
+    client = create_client(host, port, password, use_ssl=use_ssl)
+
+    samples = 0
+    for bucket in composite_buckets(client, query, composite_sources, aggs):
+        key = bucket["key"]
+        yield NodeStatsSample(
+            **run_from_key(key),
+            node=key["node"],
+            timestamp=_from_millis(key["timestamp"]),
+            seconds=seconds,
+            documents=bucket["doc_count"],
+            stats={column: bucket[column]["value"] for column in NODE_STATS_COLUMNS},
+        )
+        samples += 1
+
+    logger.info(f"Received {samples} node stats samples")
+
+
+def download_operation_windows(  # noqa: PLR0913
+    *,
+    start_date: datetime,
+    end_date: datetime,
+    host: str,
+    port: int = 443,
+    password: str,
+    use_ssl: bool = True,
+    environment: str = "",
+    run_type: str = "official",
+    engine_type: str | None,
+    distribution_version: str | None,
+    sources: list[Source],
+) -> Iterator[OperationWindow]:
+    """Yield the time window of each operation of the specified runs, excluding warmup requests.
+
+    The windows are ordered by run, then operation.
+    """
+    query = runs_query(
+        ["service_time"],
+        start_date=start_date,
+        end_date=end_date,
+        environment=environment,
+        run_type=run_type,
+        engine_type=engine_type,
+        distribution_version=distribution_version,
+        sources=sources,
+    )
+    query["bool"]["must"].append({"term": {"sample-type": "normal"}})
+    composite_sources = [
+        *({name: {"terms": {"field": field}}} for name, field in RUN_FIELDS.items()),
+        {"operation": {"terms": {"field": "operation"}}},
+    ]
+    aggs = {"start": {"min": {"field": "@timestamp"}}, "end": {"max": {"field": "@timestamp"}}}
+
+    client = create_client(host, port, password, use_ssl=use_ssl)
+
+    for bucket in composite_buckets(client, query, composite_sources, aggs):
+        key = bucket["key"]
+        yield OperationWindow(
+            **run_from_key(key),
+            operation=key["operation"],
+            start=_from_millis(bucket["start"]["value"]),
+            end=_from_millis(bucket["end"]["value"]),
+            count=bucket["doc_count"],
+        )
+
+
+def _format(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else f"{value:.2f}"
+
+
+def _format_time(timestamp: datetime) -> str:
+    return timestamp.isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def dump_metrics_csv_files(samples: Iterable[NodeStatsSample], folder: Path) -> int:
+    """Write the samples of each run to a CSV file in the folder, and return the number of files written.
+
+    The samples must be ordered by run and node, as returned by download_metrics, so each file is written in turn.
+    """
+    header = ["timestamp", "seconds", "node", "documents", *NODE_STATS_COLUMNS]
+    files = 0
+
+    for run_key, run_samples in itertools.groupby(samples, key=NodeStatsSample.run_key):
+        path = folder / f"{run_file_prefix(run_key)}{NODE_STATS_SUFFIX}"
+        with path.open("w", newline="") as csv_file:
+            csv_writer = csv.writer(csv_file)
+            csv_writer.writerow(header)
+
+            # Counters are compared to the previous sample of the same node
+            previous: NodeStatsSample | None = None
+            for sample in run_samples:
+                if previous is not None and previous.node != sample.node:
+                    previous = None
+                row: list[object] = [_format_time(sample.timestamp), sample.seconds, sample.node, sample.documents]
+                for column in NODE_STATS_COLUMNS:
+                    value = sample.stats[column]
+                    if column in CUMULATIVE_COLUMNS:
+                        last = previous.stats[column] if previous is not None else None
+                        value = value - last if value is not None and last is not None else None
+                    row.append("" if value is None else _format(value))
+                csv_writer.writerow(row)
+                previous = sample
+        files += 1
+
+    if files > 0:
+        logger.info(f"Written node stats of {files} runs to {folder}")
+    return files
+
+
+def dump_operation_csv_files(windows: Iterable[OperationWindow], folder: Path) -> int:
+    """Write the operation windows of each run to a CSV file in the folder, next to its node stats.
+
+    Return the number of files written. The windows must be ordered by run, as returned by download_operation_windows.
+    """
+    header = ["run_group", "engine", "engine_version", "workload", "run", "operation", "start", "end", "count"]
+    files = 0
+
+    for run_key, run_windows in itertools.groupby(windows, key=OperationWindow.run_key):
+        path = folder / f"{run_file_prefix(run_key)}{OPERATIONS_SUFFIX}"
+        with path.open("w", newline="") as csv_file:
+            csv_writer = csv.writer(csv_file)
+            csv_writer.writerow(header)
+            csv_writer.writerows(
+                [
+                    window.run_group.strftime("%Y_%m_%d_%H_%M_%S"),
+                    window.engine,
+                    window.engine_version,
+                    window.workload,
+                    window.run,
+                    window.operation,
+                    _format_time(window.start),
+                    _format_time(window.end),
+                    window.count,
+                ]
+                for window in run_windows
+            )
+        files += 1
+
+    return files
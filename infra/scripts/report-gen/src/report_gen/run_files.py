@@ -0,0 +1,122 @@
+"""Names of the files written for each run by download-metrics, and readers of those the report uses.
+
+The report reads the metrics data folder without the datastore client, so this module must not import
+opensearch-py, which is slow to import.
+"""
+
+import csv
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+
+RunKey = tuple[datetime, str, str, str, str]
+
+# Format of the run group tag of the runs
+RUN_GROUP_FORMAT = "%Y_%m_%d_%H_%M_%S"
+
+# Suffixes of the files written for each run
+NODE_STATS_SUFFIX = "-node-stats.csv"
+OPERATIONS_SUFFIX = "-operations.csv"
+THROUGHPUT_SUFFIX = "-throughput.csv"
+
+# Operations achieving less than this share of their target throughput are saturated
+DEFAULT_TOLERANCE = 0.95
+
+THROUGHPUT_HEADER = [
+    "run_group",
+    "engine",
+    "engine_version",
+    "workload",
+    "run",
+    "operation",
+    "target",
+    "median",
+    "mean",
+    "samples",
+    "samples_min",
+    "samples_mean",
+]
+
+
+def run_file_prefix(run_key: RunKey) -> str:
+    """Return the start of the name of the files written for a run."""
+    run_group, engine, engine_version, workload, run = run_key
+    return f"{run_group.strftime('%Y-%m-%dT%H%M%SZ')}-{engine}-{engine_version}-{workload}-{run}"
+
+
+@dataclass(frozen=True)
+class OperationThroughput:
+    """Throughput achieved by an operation during a run, and its target."""
+
+    run_group: datetime
+    engine: str
+    engine_version: str
+    workload: str
+    run: str
+    operation: str
+    # Target throughput in operations per second, None if the operation is not throttled
+    target: float | None
+    # Median and mean throughput in the results of the run
+    median: float | None
+    mean: float | None
+    # Number, minimum and mean of the throughput samples recorded during the run
+    samples: int = 0
+    samples_min: float | None = None
+    samples_mean: float | None = None
+
+    def run_key(self) -> RunKey:
+        """Return the fields identifying the run of the operation."""
+        return self.run_group, self.engine, self.engine_version, self.workload, self.run
+
+    @property
+    def achieved(self) -> float | None:
+        """Return the throughput achieved, from the results or else from the samples."""
+        return self.median if self.median is not None else self.samples_mean
+
+    @property
+    def ratio(self) -> float | None:
+        """Return the achieved throughput as a share of the target, None if the operation is not throttled."""
+        if self.target is None or self.achieved is None:
+            return None
+        return self.achieved / self.target
+
+    @property
+    def min_ratio(self) -> float | None:
+        """Return the lowest throughput sample as a share of the target."""
+        if self.target is None or self.samples_min is None:
+            return None
+        return self.samples_min / self.target
+
+    def saturated(self, tolerance: float = DEFAULT_TOLERANCE) -> bool:
+        """Return whether the operation achieved less than tolerance of its target throughput."""
+        ratio = self.ratio
+        return ratio is not None and ratio < tolerance
+
+
+def _read_number(value: str) -> float | None:
+    return float(value) if value else None
+
+
+def read_throughput_files(folder: Path) -> list[OperationThroughput]:
+    """Read the throughputs written to the folder by dump_throughput_csv_files."""
+    throughputs: list[OperationThroughput] = []
+    for path in sorted(folder.glob(f"*{THROUGHPUT_SUFFIX}")):
+        with path.open(newline="") as csv_file:
+            throughputs.extend(
+                OperationThroughput(
+                    run_group=datetime.strptime(row["run_group"], RUN_GROUP_FORMAT),  # noqa: DTZ007
+                    engine=row["engine"],
+                    engine_version=row["engine_version"],
+                    workload=row["workload"],
+                    run=row["run"],
+                    operation=row["operation"],
+                    target=_read_number(row["target"]),
+                    median=_read_number(row["median"]),
+                    mean=_read_number(row["mean"]),
+                    samples=int(row["samples"]),
+                    samples_min=_read_number(row["samples_min"]),
+                    samples_mean=_read_number(row["samples_mean"]),
+                )
+                for row in csv.DictReader(csv_file)
+            )
+    return throughputs
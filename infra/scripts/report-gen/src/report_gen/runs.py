@@ -0,0 +1,101 @@
+"""Selection of the runs of a benchmark used to compute statistics."""
+
+import logging
+import math
+from collections import defaultdict
+from collections.abc import Callable, Hashable, Iterable
+from dataclasses import dataclass
+from typing import TypeVar
+
+logger = logging.getLogger(__name__)
+
+R = TypeVar("R")
+
+# Run tag of the warmup run of each benchmark
+WARMUP_RUN = "0"
+
+
+def run_sort_key(run: str) -> tuple[int, int | str]:
+    """Sort runs numerically, falling back to string order for non numeric run tags."""
+    if run.isdigit():
+        return 0, int(run)
+    return 1, run
+
+
+def _value_key(value: float) -> tuple[bool, float]:
+    """Sort values, placing missing (NaN) values last."""
+    return math.isnan(value), value
+
+
+@dataclass(frozen=True)
+class RunSelection:
+    """Policy selecting which runs of a benchmark are used in statistics.
+
+    The runs of each benchmark file (one run group) are ordered by run number, then:
+      1. the warmup run, tagged warmup_run, is dropped, and so are the first skip_first remaining runs,
+      2. if keep_last is set, only the last keep_last remaining runs are kept,
+      3. if trim is set, for each series (e.g. metric and operation) the trim runs with the smallest
+         and the trim runs with the largest values are dropped.
+    """
+
+    warmup_run: str | None = WARMUP_RUN
+    skip_first: int = 0
+    keep_last: int | None = None
+    trim: int = 0
+
+    def __post_init__(self) -> None:
+        """Reject negative counts, which would select runs from the other end."""
+        if self.skip_first < 0 or (self.keep_last is not None and self.keep_last < 0) or self.trim < 0:
+            msg = f"Run selection counts must not be negative: {self}"
+            raise ValueError(msg)
+
+    def __str__(self) -> str:
+        """Describe the selection. Used to identify cached results."""
+        return f"warmup_run={self.warmup_run},skip_first={self.skip_first},keep_last={self.keep_last},trim={self.trim}"
+
+    def select(self, runs: Iterable[str]) -> set[str]:
+        """Return the selected runs out of all the runs of a benchmark."""
+        ordered = sorted(set(runs) - {self.warmup_run}, key=run_sort_key)[self.skip_first :]
+        if self.keep_last is not None:
+            ordered = ordered[len(ordered) - self.keep_last :] if self.keep_last > 0 else []
+        return set(ordered)
+
+    def filter_rows(
+        self,
+        rows: list[R],
+        run: Callable[[R], str],
+        series: Callable[[R], Hashable],
+        value: Callable[[R], float],
+    ) -> list[R]:
+        """Return the rows belonging to the selected runs, preserving their order.
+
+        run, series and value extract the run number, the series and the value used for trimming from a row.
+        """
+        selected = self.select(run(row) for row in rows)
+        rows = [row for row in rows if run(row) in selected]
+
+        if self.trim <= 0:
+            return rows
+
+        grouped: dict[Hashable, list[int]] = defaultdict(list)
+        for index, row in enumerate(rows):
+            grouped[series(row)].append(index)
+
+        dropped: set[int] = set()
+        for key, indices in grouped.items():
+            if len(indices) <= 2 * self.trim:
+                logger.warning(f"Not enough runs to trim {self.trim} runs from each end of {key}")
+                continue
+            ordered = sorted(indices, key=lambda index: _value_key(value(rows[index])))
+            dropped.update(ordered[: self.trim])
+            dropped.update(ordered[-self.trim :])
+
+        return [row for index, row in enumerate(rows) if index not in dropped]
+
+
+def to_float(value: str) -> float:
+    """Convert a CSV value to a float, returning NaN for missing values."""
+    try:
+        return float(value)
+    except ValueError:
+        return math.nan
@@ -0,0 +1,304 @@
+"""Helpers for summarizing the per-request samples of benchmark runs with mergeable sketches.
+
+The results of a run only hold a few percentiles, which cannot be combined across runs: the median
+of the p90 of each run is not the p90 of the run group. The latency and service_time of each request,
+recorded in benchmark-metrics*, are instead added to a sketch per run, and the sketches of the selected
+runs of a run group are merged, so any percentile of all their requests can be estimated.
+"""
+
+import csv
+import json
+import logging
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass, replace
+from datetime import datetime
+from operator import itemgetter
+from pathlib import Path
+from typing import Any
+
+from .archive import SUFFIX as ARCHIVE_SUFFIX
+from .archive import ArchiveWriter, SampleArchive
+from .download import MAX_PAGE_SIZE, Pagination, Source, create_client, search_pages
+from .metrics import METRICS_INDEX, runs_query
+from .run_files import run_file_prefix
+from .runs import RunSelection
+from .sketch import DEFAULT_RELATIVE_ACCURACY, LatencySketch
+
+logger = logging.getLogger(__name__)
+
+# Metrics recorded for each request
+SAMPLE_METRICS = ("latency", "service_time")
+
+DEFAULT_PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+
+SKETCHES_SUFFIX = "-sketches.json"
+PERCENTILES_SUFFIX = "-percentiles.csv"
+
+# Fields of the samples read from the datastore
+_SOURCE_FIELDS = [
+    "meta.tag_run-group",
+    "meta.tag_engine-type",
+    "meta.distribution_version",
+    "meta.tag_run",
+    "workload",
+    "operation",
+    "name",
+    "value",
+    "@timestamp",
+]
+
+
+@dataclass(frozen=True, order=True)
+class SeriesKey:
+    """Identify the samples of a metric of an operation, in all the runs of a benchmark."""
+
+    run_group: datetime
+    engine: str
+    engine_version: str
+    workload: str
+    operation: str
+    metric: str
+
+    def benchmark(self) -> tuple[datetime, str, str, str]:
+        """Return the fields identifying the benchmark, whose series are written to the same files."""
+        return self.run_group, self.engine, self.engine_version, self.workload
+
+
+# Sketch of each run of each series
+RunSketches = dict[SeriesKey, dict[str, LatencySketch]]
+
+
+def download_sketches(  # noqa: PLR0913
+    *,
+    start_date: datetime,
+    end_date: datetime,
+    host: str,
+    port: int = 443,
+    password: str,
+    use_ssl: bool = True,
+    environment: str = "",
+    run_type: str = "official",
+    engine_type: str | None,
+    distribution_version: str | None,
+    sources: list[Source],
+    pagination: Pagination = Pagination.Scroll,
+    page_size: int = MAX_PAGE_SIZE,
+    relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY,
+    archive: Path | None = None,
+) -> RunSketches:
+    """Download the per-request samples of the specified runs, excluding warmup requests, into a sketch per run.
+
+    The samples are streamed in pages of page_size documents, so memory only grows with the number of sketches.
+    If archive is set to a folder, the samples of each run are also written to an archive file in it,
+    which requires buffering 16 bytes per sample until the download completes.
+    """
+    query = runs_query(
+        SAMPLE_METRICS,
+        start_date=start_date,
+        end_date=end_date,
+        environment=environment,
+        run_type=run_type,
+        engine_type=engine_type,
+        distribution_version=distribution_version,
+        sources=sources,
+    )
+    query["bool"]["must"].extend(
+        [{"term": {"sample-type": "normal"}}, {"exists": {"field": "operation"}}, {"exists": {"field": "value"}}]
+    )
+    body = {"query": query, "size": page_size, "_source": _SOURCE_FIELDS}
+
+    client = create_client(host, port, password, use_ssl=use_ssl)
+
+    sketches: RunSketches = {}
+    writers: dict[tuple, ArchiveWriter] = {}
+    samples = 0
+    for response in search_pages(client, body, METRICS_INDEX, pagination):
+        for document in response["hits"]["hits"]:
+            source = document["_source"]
+            meta = source["meta"]
+            key = SeriesKey(
+                run_group=datetime.strptime(meta["tag_run-group"], "%Y_%m_%d_%H_%M_%S"),  # noqa: DTZ007
+                engine=meta["tag_engine-type"],
+                engine_version=meta["distribution_version"],
+                workload=source["workload"],
+                operation=source["operation"],
+                metric=source["name"],
+            )
+            runs = sketches.setdefault(key, {})
+            run = str(meta["tag_run"])
+            if run not in runs:
+                runs[run] = LatencySketch(relative_accuracy)
+            value = float(source["value"])
+            runs[run].add(value)
+            samples += 1
+
+            if archive is not None:
+                run_key = (*key.benchmark(), run)
+                if run_key not in writers:
+                    writers[run_key] = ArchiveWriter(
+                        {
+                            "run_group": meta["tag_run-group"],
+                            "engine": key.engine,
+                            "engine_version": key.engine_version,
+                            "workload": key.workload,
+                            "run": run,
+                        }
+                    )
+                writers[run_key].add(key.metric, key.operation, _epoch_millis(source["@timestamp"]), value)
+
+    logger.info(f"Received {samples} samples of {len(sketches)} operation metrics")
+
+    if archive is not None:
+        for run_key, writer in writers.items():
+            writer.write(archive / f"{run_file_prefix(run_key)}{ARCHIVE_SUFFIX}")
+        logger.info(f"Archived the samples of {len(writers)} runs to {archive}")
+
+    return sketches
+
+
+def _epoch_millis(timestamp: float | str) -> int:
+    if isinstance(timestamp, str):
+        return int(datetime.fromisoformat(timestamp).timestamp() * 1000)
+    return int(timestamp)
+
+
+def sketches_from_archives(paths: Iterable[Path], relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY) -> RunSketches:
+    """Build the sketch of each run from the samples archived by download_sketches."""
+    sketches: RunSketches = {}
+    for path in paths:
+        archive = SampleArchive.open(path)
+        run = archive.run
+        for metric, operation in archive.series():
+            key = SeriesKey(
+                run_group=datetime.strptime(run["run_group"], "%Y_%m_%d_%H_%M_%S"),  # noqa: DTZ007
+                engine=run["engine"],
+                engine_version=run["engine_version"],
+                workload=run["workload"],
+                operation=operation,
+                metric=metric,
+            )
+            sketch = sketches.setdefault(key, {}).setdefault(run["run"], LatencySketch(relative_accuracy))
+            _, values = archive.samples(operation, metric)
+            sketch.add_array(values)
+
+    return sketches
+
+
+def merge_runs(sketches: RunSketches, selection: RunSelection | None = None) -> dict[SeriesKey, LatencySketch]:
+    """Merge the sketches of the selected runs of each series.
+
+    Runs are selected out of all the runs of the benchmark, as for the results. If the selection trims runs,
+    the runs with the lowest and highest p90 of each series are dropped.
+    """
+    selection = selection or RunSelection()
+
+    benchmark_runs: dict[tuple, set[str]] = {}
+    for key, runs in sketches.items():
+        benchmark_runs.setdefault(key.benchmark(), set()).update(runs)
+    selected = {benchmark: selection.select(runs) for benchmark, runs in benchmark_runs.items()}
+    trim = replace(selection, warmup_run=None, skip_first=0, keep_last=None)
+
+    merged: dict[SeriesKey, LatencySketch] = {}
+    for key, runs in sorted(sketches.items()):
+        run_sketches = [(run, sketch, key) for run, sketch in runs.items() if run in selected[key.benchmark()]]
+        run_sketches = trim.filter_rows(
+            run_sketches,
+            run=itemgetter(0),
+            series=itemgetter(2),
+            value=lambda row: row[1].percentile(90),
+        )
+        if not run_sketches:
+            continue
+
+        sketch = LatencySketch(run_sketches[0][1].relative_accuracy)
+        for _, run_sketch, _ in run_sketches:
+            sketch.merge(run_sketch)
+        merged[key] = sketch
+
+    return merged
+
+
+def _benchmark_prefix(key: SeriesKey) -> str:
+    return f"{key.run_group.strftime('%Y-%m-%dT%H%M%SZ')}-{key.engine}-{key.engine_version}-{key.workload}"
+
+
+def _percentile_name(percentile: float) -> str:
+    return f"p{percentile:g}"
+
+
+def dump_percentile_csv_files(
+    merged: dict[SeriesKey, LatencySketch],
+    folder: Path,
+    percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+) -> int:
+    """Write the percentiles of each series to a CSV file per benchmark, and return the number of files written."""
+    by_benchmark: dict[str, list[list[Any]]] = {}
+    for key, sketch in sorted(merged.items()):
+        row = [key.operation, key.metric, sketch.count]
+        row += [round(sketch.percentile(percentile), 3) for percentile in percentiles]
+        by_benchmark.setdefault(_benchmark_prefix(key), []).append(row)
+
+    header = ["operation", "name", "count", *(_percentile_name(percentile) for percentile in percentiles)]
+    for prefix, rows in by_benchmark.items():
+        path = folder / f"{prefix}{PERCENTILES_SUFFIX}"
+        with path.open("w", newline="") as csv_file:
+            csv_writer = csv.writer(csv_file)
+            csv_writer.writerow(header)
+            csv_writer.writerows(rows)
+
+    if by_benchmark:
+        logger.info(f"Written the percentiles of {len(by_benchmark)} benchmarks to {folder}")
+    return len(by_benchmark)
+
+
+def dump_sketch_files(sketches: RunSketches, folder: Path) -> int:
+    """Write the sketch of each run to a JSON file per benchmark, and return the number of files written.
+
+    The sketches can be loaded back with load_sketch_files, to merge other selections of runs.
+    """
+    by_benchmark: dict[str, list[dict[str, Any]]] = {}
+    for key, runs in sorted(sketches.items()):
+        by_benchmark.setdefault(_benchmark_prefix(key), []).append(
+            {
+                "run_group": key.run_group.strftime("%Y_%m_%d_%H_%M_%S"),
+                "engine": key.engine,
+                "engine_version": key.engine_version,
+                "workload": key.workload,
+                "operation": key.operation,
+                "name": key.metric,
+                "runs": {run: sketch.to_dict() for run, sketch in runs.items()},
+            }
+        )
+
+    for prefix, series in by_benchmark.items():
+        with (folder / f"{prefix}{SKETCHES_SUFFIX}").open("w") as json_file:
+            json.dump(series, json_file)
+
+    return len(by_benchmark)
+
+
+def load_sketch_files(paths: Iterable[Path]) -> RunSketches:
+    """Read the sketches written by dump_sketch_files, merging the runs of series found in several files."""
+    sketches: RunSketches = {}
+    for path in paths:
+        with path.open() as json_file:
+            series_list = json.load(json_file)
+
+        for series in series_list:
+            key = SeriesKey(
+                run_group=datetime.strptime(series["run_group"], "%Y_%m_%d_%H_%M_%S"),  # noqa: DTZ007
+                engine=series["engine"],
+                engine_version=series["engine_version"],
+                workload=series["workload"],
+                operation=series["operation"],
+                metric=series["name"],
+            )
+            runs = sketches.setdefault(key, {})
+            for run, data in series["runs"].items():
+                sketch = LatencySketch.from_dict(data)
+                if run in runs:
+                    runs[run].merge(sketch)
+                else:
+                    runs[run] = sketch
+
+    return sketches
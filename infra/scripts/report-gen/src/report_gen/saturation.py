@@ -0,0 +1,181 @@
+"""Helpers for detecting the operations of benchmark runs which did not reach their target throughput.
+
+Search operations are throttled to the target_throughput workload parameter, so their latency
+only measures the cluster while it keeps up with the target. When the load generator or the
+cluster saturates, requests queue up and the latency grows with the length of the run instead,
+so it cannot be compared between engines. The throughput achieved by each operation is read from
+its results, and from the throughput samples recorded over the run when they are available, and
+compared to the target.
+"""
+
+import csv
+import itertools
+import logging
+from collections.abc import Iterable, Iterator
+from dataclasses import replace
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from opensearchpy import OpenSearch
+
+from .download import MAX_PAGE_SIZE, RESULTS_INDEX, Pagination, Source, create_client, results_query, search_pages
+from .metrics import RUN_FIELDS, composite_buckets, run_from_key, runs_query
+from .run_files import THROUGHPUT_HEADER, THROUGHPUT_SUFFIX, OperationThroughput, run_file_prefix
+
+logger = logging.getLogger(__name__)
+
+# Unit of the throughput of the operations throttled by target_throughput.
+# Bulk operations report documents per second and are never throttled.
+THROTTLED_UNIT = "ops/s"
+
+# Fields of the results read from the datastore
+_SOURCE_FIELDS = ["user-tags", "distribution-version", "workload", "workload-params", "operation", "unit", "value"]
+
+
+def target_throughput(workload_params: dict[str, Any]) -> float | None:
+    """Return the target throughput of the workload parameters of a run, None if operations are not throttled.
+
+    Workloads only throttle operations when target_throughput is set to a positive number.
+    """
+    value = workload_params.get("target_throughput")
+    try:
+        target = float(value) if value is not None else 0.0
+    except ValueError:
+        logger.warning(f"Ignoring target_throughput {value!r}, which is not a number")
+        return None
+    return target if target > 0 else None
+
+
+def _number(value: Any) -> float | None:
+    return None if value is None else float(value)
+
+
+def _download_results(
+    client: OpenSearch, query: dict[str, Any], pagination: Pagination
+) -> Iterator[OperationThroughput]:
+    body = {"query": query, "size": MAX_PAGE_SIZE, "_source": _SOURCE_FIELDS}
+    for response in search_pages(client, body, RESULTS_INDEX, pagination):
+        for document in response["hits"]["hits"]:
+            source = document["_source"]
+            user_tags = source["user-tags"]
+            value = source.get("value", {})
+            throttled = source.get("unit", THROTTLED_UNIT) == THROTTLED_UNIT
+            yield OperationThroughput(
+                run_group=datetime.strptime(user_tags["run-group"], "%Y_%m_%d_%H_%M_%S"),  # noqa: DTZ007
+                engine=user_tags["engine-type"],
+                engine_version=source["distribution-version"],
+                workload=source["workload"],
+                run=str(user_tags["run"]),
+                operation=source["operation"],
+                target=target_throughput(source.get("workload-params", {})) if throttled else None,
+                median=_number(value.get("median")),
+                mean=_number(value.get("mean")),
+            )
+
+
+def download_throughput(  # noqa: PLR0913
+    *,
+    start_date: datetime,
+    end_date: datetime,
+    host: str,
+    port: int = 443,
+    password: str,
+    use_ssl: bool = True,
+    environment: str = "",
+    run_type: str = "official",
+    engine_type: str | None,
+    distribution_version: str | None,
+    sources: list[Source],
+    pagination: Pagination = Pagination.Scroll,
+) -> list[OperationThroughput]:
+    """Return the throughput achieved by each operation of the specified runs, ordered by run then operation.
+
+    The throughput samples of each operation, excluding warmup samples, are aggregated by the datastore.
+    Operations with samples but no results are kept without a target, which is only recorded in the results.
+    """
+    filters: dict[str, Any] = {
+        "start_date": start_date,
+        "end_date": end_date,
+        "environment": environment,
+        "run_type": run_type,
+        "engine_type": engine_type,
+        "distribution_version": distribution_version,
+        "sources": sources,
+    }
+    query = results_query(**filters)
+    query["bool"]["must"].append({"term": {"name": "throughput"}})
+
+    client = create_client(host, port, password, use_ssl=use_ssl)
+
+    throughputs = {
+        (*throughput.run_key(), throughput.operation): throughput
+        for throughput in _download_results(client, query, pagination)
+    }
+    logger.info(f"Received the throughput of {len(throughputs)} operations")
+
+    samples_query = runs_query(["throughput"], **filters)
+    samples_query["bool"]["must"].extend([{"term": {"sample-type": "normal"}}, {"exists": {"field": "value"}}])
+    composite_sources = [
+        *({name: {"terms": {"field": field}}} for name, field in RUN_FIELDS.items()),
+        {"operation": {"terms": {"field": "operation"}}},
+    ]
+    aggs = {"min": {"min": {"field": "value"}}, "mean": {"avg": {"field": "value"}}}
+
+    for bucket in composite_buckets(client, samples_query, composite_sources, aggs):
+        fields = run_from_key(bucket["key"])
+        key = (*fields.values(), bucket["key"]["operation"])
+        throughput = throughputs.get(key)
+        samples = {
+            "samples": bucket["doc_count"],
+            "samples_min": bucket["min"]["value"],
+            "samples_mean": bucket["mean"]["value"],
+        }
+        if throughput is None:
+            throughputs[key] = OperationThroughput(
+                **fields, operation=key[-1], target=None, median=None, mean=None, **samples
+            )
+        else:
+            throughputs[key] = replace(throughput, **samples)
+
+    return [throughputs[key] for key in sorted(throughputs)]
+
+
+def _format(value: float | None) -> str:
+    return "" if value is None else str(value)
+
+
+def dump_throughput_csv_files(throughputs: Iterable[OperationThroughput], folder: Path) -> int:
+    """Write the throughput of the operations of each run to a CSV file in the folder.
+
+    Return the number of files written. The throughputs must be ordered by run, as returned by download_throughput.
+    """
+    files = 0
+
+    for run_key, run_throughputs in itertools.groupby(throughputs, key=OperationThroughput.run_key):
+        path = folder / f"{run_file_prefix(run_key)}{THROUGHPUT_SUFFIX}"
+        with path.open("w", newline="") as csv_file:
+            csv_writer = csv.writer(csv_file)
+            csv_writer.writerow(THROUGHPUT_HEADER)
+            csv_writer.writerows(
+                [
+                    throughput.run_group.strftime("%Y_%m_%d_%H_%M_%S"),
+                    throughput.engine,
+                    throughput.engine_version,
+                    throughput.workload,
+                    throughput.run,
+                    throughput.operation,
+                    _format(throughput.target),
+                    _format(throughput.median),
+                    _format(throughput.mean),
+                    throughput.samples,
+                    _format(throughput.samples_min),
+                    _format(throughput.samples_mean),
+                ]
+                for throughput in run_throughputs
+            )
+        files += 1
+
+    if files > 0:
+        logger.info(f"Written the throughput of {files} runs to {folder}")
+    return files
@@ -0,0 +1,103 @@
+"""Index of the operations and categories of each workload."""
+
+import json
+import logging
+from collections.abc import Mapping
+from functools import cache
+from pathlib import Path
+from types import MappingProxyType
+
+from .common import get_category_operation_map
+
+logger = logging.getLogger(__name__)
+
+
+class CategoryIndex:
+    """Immutable lookup tables for the category/operation map.
+
+    The map is a list of {"workload": str, "categories": {category: [operation, ...]}} specs,
+    as returned by get_category_operation_map().
+    """
+
+    def __init__(self, spec_list: list[dict]) -> None:
+        workloads: dict[str, Mapping[str, tuple[str, ...]]] = {}
+        operation_category: dict[tuple[str, str], str] = {}
+
+        for spec in spec_list:
+            workload: str = spec["workload"]
+            categories = {category: tuple(operations) for category, operations in spec["categories"].items()}
+            workloads[workload] = MappingProxyType(categories)
+
+            for category, operations in categories.items():
+                for operation in operations:
+                    # Like a lookup in the Categories sheet, the first category listed wins
+                    operation_category.setdefault((workload, operation), category)
+
+        self._workloads: Mapping[str, Mapping[str, tuple[str, ...]]] = MappingProxyType(workloads)
+        self._category: Mapping[tuple[str, str], str] = MappingProxyType(operation_category)
+        self._operations: Mapping[str, tuple[str, ...]] = MappingProxyType(
+            {
+                workload: tuple(sorted(operation for operations in categories.values() for operation in operations))
+                for workload, categories in workloads.items()
+            }
+        )
+        self._categories: Mapping[str, tuple[str, ...]] = MappingProxyType(
+            {workload: tuple(sorted(categories)) for workload, categories in workloads.items()}
+        )
+
+    @classmethod
+    def from_file(cls, path: Path) -> "CategoryIndex":
+        """Load the category/operation map from a JSON file."""
+        with path.open() as f:
+            spec_list = json.load(f)
+
+        if not isinstance(spec_list, list):
+            msg = f"Expected a list of workloads in {path}"
+            raise TypeError(msg)
+        for spec in spec_list:
+            if (
+                not isinstance(spec, dict)
+                or not isinstance(spec.get("workload"), str)
+                or not isinstance(spec.get("categories"), dict)
+                or not all(isinstance(operations, list) for operations in spec["categories"].values())
+            ):
+                msg = f"Invalid workload {spec} in {path}, expected {{'workload': str, 'categories': {{str: [str]}}}}"
+                raise TypeError(msg)
+
+        logger.info(f"Loaded categories for {len(spec_list)} workloads from {path}")
+        return cls(spec_list)
+
+    @property
+    def workloads(self) -> tuple[str, ...]:
+        """Return all workloads, in the order of the map."""
+        return tuple(self._workloads)
+
+    def operations(self, workload: str) -> tuple[str, ...]:
+        """Return all the operations for the given workload, sorted."""
+        return self._operations.get(workload, ())
+
+    def categories(self, workload: str) -> tuple[str, ...]:
+        """Return all the operation categories for the given workload, sorted."""
+        return self._categories.get(workload, ())
+
+    def category(self, workload: str, operation: str) -> str | None:
+        """Return the category of an operation of the given workload."""
+        return self._category.get((workload, operation))
+
+    def category_operations(self, workload: str) -> Mapping[str, tuple[str, ...]]:
+        """Return the operations of each category for the given workload, in the order of the map."""
+        return self._workloads.get(workload, MappingProxyType({}))
+
+    def rows(self) -> list[list[str]]:
+        """Return (workload, operation, category) rows for every operation, with a header row."""
+        rows: list[list[str]] = [["Workload", "Operation", "Category"]]
+        for workload, categories in self._workloads.items():
+            for category, operations in categories.items():
+                rows.extend([workload, operation, category] for operation in operations)
+        return rows
+
+
+@cache
+def get_category_index() -> CategoryIndex:
+    """Return the index of the built-in category/operation map."""
+    return CategoryIndex(get_category_operation_map())
@@ -0,0 +1,100 @@
+"""Progress of a report, so an interrupted report can be resumed."""
+
+import json
+import logging
+import os
+import threading
+from collections.abc import Callable
+from pathlib import Path
+
+from report_gen.cache import DEFAULT_CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHECKPOINT_DIR = DEFAULT_CACHE_DIR / "checkpoints"
+
+
+class Checkpoint:
+    """Record the stages and raw data chunks of a spreadsheet which were completed.
+
+    The checkpoint is saved to a JSON file named after the spreadsheet after each update,
+    and removed once the report is complete.
+    """
+
+    def __init__(self, directory: Path, spreadsheet_id: str) -> None:
+        self.path = directory / f"{spreadsheet_id}.json"
+        self._lock = threading.Lock()
+        self._started: set[str] = set()
+        self._stages: set[str] = set()
+        self._chunks: set[str] = set()
+
+        try:
+            with self.path.open() as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (json.JSONDecodeError, OSError):
+            logger.warning(f"Ignoring unreadable checkpoint {self.path}")
+            return
+
+        self._started = set(data.get("started", []))
+        self._stages = set(data.get("stages", []))
+        self._chunks = set(data.get("chunks", []))
+        logger.info(f"Resuming from {self.path}: completed stages {sorted(self._stages)}")
+
+    def started(self, stage: str) -> bool:
+        """Return True if the stage was started by a previous run."""
+        with self._lock:
+            return stage in self._started
+
+    def completed(self, stage: str) -> bool:
+        """Return True if the stage was completed."""
+        with self._lock:
+            return stage in self._stages
+
+    def chunk_uploaded(self, key: str) -> bool:
+        """Return True if the chunk of raw data with the given key was uploaded."""
+        with self._lock:
+            return key in self._chunks
+
+    def add_chunk(self, key: str) -> None:
+        """Record that a chunk of raw data was uploaded."""
+        with self._lock:
+            self._chunks.add(key)
+            self._save()
+
+    def wrap(self, stage: str, run: Callable[[], bool]) -> Callable[[], bool]:
+        """Return a function running the stage unless it was completed, and recording its completion."""
+
+        def run_once() -> bool:
+            if self.completed(stage):
+                logger.info(f"Skipping stage {stage}, completed by a previous run")
+                return True
+
+            with self._lock:
+                self._started.add(stage)
+                self._save()
+
+            if not run():
+                return False
+
+            with self._lock:
+                self._stages.add(stage)
+                self._save()
+            return True
+
+        return run_once
+
+    def remove(self) -> None:
+        """Remove the checkpoint, once the report is complete."""
+        self.path.unlink(missing_ok=True)
+
+    def _save(self) -> None:
+        """Write the checkpoint atomically. Must be called with the lock held."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {"started": sorted(self._started), "stages": sorted(self._stages), "chunks": sorted(self._chunks)}
+
+        tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+        with tmp_path.open("w") as f:
+            json.dump(data, f)
+        tmp_path.replace(self.path)
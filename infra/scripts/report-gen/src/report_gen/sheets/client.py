@@ -0,0 +1,136 @@
+"""Google Sheets API client shared by the report stages."""
+
+import json
+import logging
+import random
+import threading
+import time
+from functools import cache, cached_property, partial
+
+import httplib2
+from google.oauth2.credentials import Credentials
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.discovery import Resource, build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+from googleapiclient.errors import HttpError
+from googleapiclient.http import HttpRequest
+
+from .instrumentation import ApiStats
+from .ratelimit import DEFAULT_BURST, DEFAULT_REQUESTS_PER_MINUTE, MIN_REQUESTS_PER_MINUTE, RateLimiter
+
+logger = logging.getLogger(__name__)
+
+# Retries of a request rejected because the quota is exhausted
+DEFAULT_MAX_RETRIES = 5
+
+# Maximum time to wait before retrying a request, in seconds
+MAX_BACKOFF = 64
+
+HTTP_TOO_MANY_REQUESTS = 429
+
+
+@cache
+def sheets_discovery_document() -> dict:
+    """Return the Sheets v4 discovery document shipped with google-api-python-client.
+
+    It is read and parsed once, instead of each time a service is built.
+    """
+    document = get_static_doc("sheets", "v4")
+    if document is None:
+        msg = "The Sheets v4 discovery document is missing from google-api-python-client"
+        raise RuntimeError(msg)
+    parsed: dict = json.loads(document)
+    return parsed
+
+
+class ApiClient:
+    """Rate limited Sheets API client, safe to use from multiple threads.
+
+    The quota applies to a sliding minute, so the steady rate leaves room for the initial burst:
+    at most requests_per_minute requests are sent in any minute.
+    Requests rejected because the quota is exhausted anyway are retried with an exponential backoff.
+    """
+
+    def __init__(
+        self,
+        credentials: Credentials,
+        requests_per_minute: int = DEFAULT_REQUESTS_PER_MINUTE,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        stats: ApiStats | None = None,
+    ) -> None:
+        self.credentials = credentials
+        self.max_retries = max_retries
+        self.stats = stats or ApiStats()
+
+        if requests_per_minute < MIN_REQUESTS_PER_MINUTE:
+            msg = f"requests_per_minute must be at least {MIN_REQUESTS_PER_MINUTE}, got {requests_per_minute}"
+            raise ValueError(msg)
+        burst = max(1, min(DEFAULT_BURST, requests_per_minute // 2))
+        self.limiter = RateLimiter((requests_per_minute - burst) / 60, burst)
+        self._local = threading.local()
+
+    def http(self) -> AuthorizedHttp:
+        """Return the HTTP transport of the current thread, as httplib2 is not thread safe."""
+        http: AuthorizedHttp | None = getattr(self._local, "http", None)
+        if http is None:
+            http = AuthorizedHttp(self.credentials, http=httplib2.Http())
+            self._local.http = http
+        return http
+
+    @cached_property
+    def service(self) -> Resource:
+        """Return the Sheets API service sending its requests through this client.
+
+        The service is built from the discovery document shipped with google-api-python-client
+        and shared by all the threads using the client.
+        """
+        return build_from_document(
+            sheets_discovery_document(), http=self.http(), requestBuilder=partial(_ClientRequest, self)
+        )
+
+    def execute(self, request: HttpRequest, http: httplib2.Http | None, num_retries: int) -> object:
+        """Send a request once the rate limit allows it, retrying it if the quota is exhausted."""
+        call = self.stats.start_call(request.methodId or request.method)
+        call.request_bytes = len(request.body.encode() if isinstance(request.body, str) else request.body or b"")
+
+        # Record the size of the response before it is parsed
+        postproc = request.postproc
+
+        def record_response(resp: httplib2.Response, content: bytes) -> object:
+            call.response_bytes = len(content)
+            return postproc(resp, content)
+
+        request.postproc = record_response
+
+        while True:
+            call.throttle_wait += self.limiter.acquire()
+            start = time.monotonic()
+            try:
+                response = HttpRequest.execute(request, http=http or self.http(), num_retries=num_retries)
+            except HttpError as e:
+                call.latency += time.monotonic() - start
+                call.status = e.resp.status
+                call.response_bytes = len(e.content or b"")
+                if e.resp.status != HTTP_TOO_MANY_REQUESTS or call.retries >= self.max_retries:
+                    raise
+                delay = min(2**call.retries + random.random(), MAX_BACKOFF)  # noqa: S311
+                logger.warning(f"Quota exceeded for {call.method}, retrying in {delay:.1f} seconds")
+                time.sleep(delay)
+                call.throttle_wait += delay
+                call.retries += 1
+            else:
+                call.latency += time.monotonic() - start
+                call.status = 200
+                return response
+
+
+class _ClientRequest(HttpRequest):
+    """Request executed through an ApiClient."""
+
+    def __init__(self, client: ApiClient, *args: object, **kwargs: object) -> None:
+        super().__init__(*args, **kwargs)
+        self.client = client
+
+    def execute(self, http: httplib2.Http | None = None, num_retries: int = 0) -> object:
+        """Execute the request through the client."""
+        return self.client.execute(self, http, num_retries)
@@ -3,7 +3,7 @@
 import logging
 
 from googleapiclient.discovery import Resource
-from packaging.version import Version
+from packaging.version import InvalidVersion, Version
 
 logger = logging.getLogger(__name__)
 
@@ -184,71 +184,8 @@ def get_category_operation_map() -> list[dict]:
     return spec_list
 
 
-def get_workloads(service: Resource, spreadsheet_id: str) -> dict[str, dict[str, list[str]]]:
-    """Retrieve tuples of (engine,version,workload) for all benchmarks in the spreadsheet."""
-    rv: dict[str, dict[str, list[str]]] = {}
-
-    result: dict = service.spreadsheets().values().get(spreadsheetId=spreadsheet_id, range="raw!C2:E").execute()
-    row_list: list[list[str]] = result.get("values", [])
-    for row in row_list:
-        engine, version, workload = row
-        if workload not in rv:
-            rv[workload] = {}
-        if engine not in rv[workload]:
-            rv[workload][engine] = []
-        if version not in rv[workload][engine]:
-            rv[workload][engine].append(version)
-            rv[workload][engine].sort(key=Version)
-    return rv
-
-
-def get_workload_operations(workload: str) -> list[str]:
-    """Return all the operations for the given workload."""
-    operation_list: list[str] = []
-
-    spec_list: list[dict] = get_category_operation_map()
-    for spec in spec_list:
-        if spec["workload"] == workload:
-            # Combine the operation lists for each category
-            operation_list = sum(spec["categories"].values(), [])  # noqa: RUF017
-            break
-
-    return sorted(operation_list)
-
-
-def get_workload_operation_categories(workload: str) -> list[str]:
-    """Return all the operation categories for the given workload."""
-    category_list: list[str] = []
-
-    spec_list: list[dict] = get_category_operation_map()
-    for spec in spec_list:
-        if spec["workload"] == workload:
-            category_list = list(spec["categories"].keys())
-            break
-
-    return sorted(category_list)
-
-
-def get_sheet_id(service: Resource, spreadsheet_id: str, sheet_name: str) -> tuple[int | None, dict]:
-    """Return the sheet ID for the given sheet name."""
-    # Get the spreadsheet metadata to find the sheetId
-    spreadsheet = service.spreadsheets().get(spreadsheetId=spreadsheet_id).execute()
-
-    # Find the sheetId by sheet name
-    sheet_id = None
-    for sheet in spreadsheet["sheets"]:
-        if sheet["properties"]["title"] == sheet_name:
-            sheet_id = sheet["properties"]["sheetId"]
-            break
-
-    return sheet_id, sheet
-
-
-def adjust_sheet_columns(service: Resource, spreadsheet_id: str, sheet_id: int, sheet: dict) -> None:
+def adjust_sheet_columns(service: Resource, spreadsheet_id: str, sheet_id: int, column_count: int) -> None:
     """Adjust the columns in the given sheet according to their contents."""
-    sheet_properties: dict = sheet["properties"]
-    column_count: int = sheet_properties.get("gridProperties", {}).get("columnCount", 0)
-
     requests: list[dict] = [
         {
             "autoResizeDimensions": {
@@ -265,61 +202,41 @@ def adjust_sheet_columns(service: Resource, spreadsheet_id: str, sheet_id: int,
     service.spreadsheets().batchUpdate(spreadsheetId=spreadsheet_id, body={"requests": requests}).execute()
 
 
-def convert_range_to_dict(range_str: str) -> dict:
-    """Convert range string to dictionary."""
-    # Example updated_range: 'Sheet1!A5:D5'
-    # Split the sheet name from the range
-    _, cell_range = range_str.split("!")
-
-    # Split start and end cells (e.g., 'A5:D5')
-    start_cell, end_cell = cell_range.split(":")
-
-    # Function to convert column letters to index
-    def column_to_index(col: str) -> int:
-        index = 0
-        for char in col:
-            index = index * 26 + (ord(char.upper()) - ord("A")) + 1
-        return index - 1  # Convert to 0-indexed
-
-    rv: dict = {}
-
-    # Extract the column letters and row numbers
-    import re
-
-    m = re.search(r"\d+", start_cell)
-    if m:
-        start_row = int(m.group()) - 1  # Convert to 0-indexed
-        rv["startRowIndex"] = start_row
+def reset_sheet(service: Resource, spreadsheet_id: str, sheet_id: int, start_row: int = 0) -> None:
+    """Remove the values from start_row on, the conditional format rules and the merged cells of a sheet.
+
+    A sheet whose stage was interrupted is reset before it is filled in again, as its rows are appended
+    and its formats added to the existing ones.
+    """
+    spreadsheet = (
+        service.spreadsheets()
+        .get(spreadsheetId=spreadsheet_id, fields="sheets(properties.sheetId,conditionalFormats)")
+        .execute()
+    )
+    rule_count = next(
+        (
+            len(sheet.get("conditionalFormats", []))
+            for sheet in spreadsheet.get("sheets", [])
+            if sheet["properties"]["sheetId"] == sheet_id
+        ),
+        0,
+    )
 
-    m = re.search(r"\d+", end_cell)
-    if m:
-        end_row = int(m.group())  # No need to subtract 1 since it's non-inclusive
-        rv["endRowIndex"] = end_row
-
-    m = re.match(r"[A-Z]+", start_cell)
-    if m:
-        start_col = m.group()
-        start_column_index = column_to_index(start_col)
-        rv["startColumnIndex"] = start_column_index
-
-    m = re.match(r"[A-Z]+", end_cell)
-    if m:
-        end_col = m.group()
-        end_column_index = column_to_index(end_col) + 1  # End is non-inclusive, so add 1
-        rv["endColumnIndex"] = end_column_index
-
-    # Construct the range dictionary
-    return rv
+    requests: list[dict] = [
+        {"updateCells": {"range": {"sheetId": sheet_id, "startRowIndex": start_row}, "fields": "userEnteredValue"}},
+        {"unmergeCells": {"range": {"sheetId": sheet_id}}},
+    ]
+    # Delete the last rules first, as deleting a rule shifts the index of the rules after it
+    requests.extend(
+        {"deleteConditionalFormatRule": {"sheetId": sheet_id, "index": index}} for index in reversed(range(rule_count))
+    )
 
+    service.spreadsheets().batchUpdate(spreadsheetId=spreadsheet_id, body={"requests": requests}).execute()
 
-def column_add(col: str, value: int) -> str:
-    """Increases value to column letter."""
-    cols = list(col)
-    for _ in range(value):
-        if cols[-1] == "Z":
-            cols[-1] = "A"
-            cols.append("A")
-        else:
-            cols[-1] = chr(ord(cols[-1]) + 1)
 
-    return "".join(cols)
+def version_key(version: str) -> tuple[int, Version | str]:
+    """Return a key sorting engine versions in release order, after them any version which cannot be parsed."""
+    try:
+        return 0, Version(version)
+    except InvalidVersion:
+        return 1, version
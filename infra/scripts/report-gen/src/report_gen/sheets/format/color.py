@@ -196,3 +196,19 @@ def color(range_dict: dict, color: dict) -> dict:
             "fields": "userEnteredFormat(backgroundColor)",
         }
     }
+
+
+def saturation(range_dict: dict, tolerance: float) -> dict:
+    """Conditionally formats the achieved share of the target throughput."""
+    return {
+        "addConditionalFormatRule": {
+            "rule": {
+                "ranges": [range_dict],
+                "booleanRule": {
+                    "condition": {"type": "NUMBER_LESS", "values": [{"userEnteredValue": f"{tolerance:g}"}]},
+                    "format": {"backgroundColor": get_light_red()},
+                },
+            },
+            "index": 0,
+        }
+    }
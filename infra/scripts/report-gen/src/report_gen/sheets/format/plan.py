@@ -0,0 +1,54 @@
+"""Functions for reducing the formatting requests sent in a batch update."""
+
+import copy
+import json
+
+
+def _key(value: object) -> str:
+    return json.dumps(value, sort_keys=True)
+
+
+def plan(requests: list[dict]) -> list[dict]:
+    """Return equivalent requests, with conditional format rules merged and duplicates removed.
+
+    Conditional format rules of a sheet which only differ by their ranges are merged into a single rule
+    formatting all the ranges, sent at the position of the first of them. The format functions add the
+    rules of each range in the same order, so the rules applying to a range keep their priority.
+
+    Other requests repeated identically are sent once, at the position of the last of them.
+    """
+    planned: list[dict | None] = []
+    rules: dict[str, dict] = {}
+    positions: dict[str, int] = {}
+
+    for request in requests:
+        add_rule = request.get("addConditionalFormatRule")
+        if add_rule is not None:
+            rule = add_rule["rule"]
+            sheet_ids = sorted({str(range_dict.get("sheetId")) for range_dict in rule["ranges"]})
+            key = _key(
+                {
+                    "rule": {name: value for name, value in rule.items() if name != "ranges"},
+                    "index": add_rule.get("index"),
+                    "sheets": sheet_ids,
+                }
+            )
+
+            merged = rules.get(key)
+            if merged is None:
+                merged = copy.deepcopy(request)
+                rules[key] = merged
+                planned.append(merged)
+                continue
+
+            ranges = merged["addConditionalFormatRule"]["rule"]["ranges"]
+            ranges.extend(range_dict for range_dict in rule["ranges"] if range_dict not in ranges)
+            continue
+
+        key = _key(request)
+        if key in positions:
+            planned[positions[key]] = None
+        positions[key] = len(planned)
+        planned.append(request)
+
+    return [request for request in planned if request is not None]
@@ -0,0 +1,121 @@
+"""Coordinates of the cells and ranges of a sheet."""
+
+import re
+from dataclasses import dataclass
+from functools import cache
+
+# Cell of an A1 range, e.g. A5, $D$2, D (whole column) or 2 (whole row)
+_CELL = re.compile(r"\$?([A-Z]*)\$?(\d*)")
+
+
+@cache
+def column_letter(index: int) -> str:
+    """Return the letters of the column with the given 0-based index, e.g. 0 is A and 26 is AA."""
+    if index < 0:
+        msg = f"Invalid column index {index}"
+        raise ValueError(msg)
+
+    letters = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord("A") + remainder) + letters
+    return letters
+
+
+@cache
+def column_index(letters: str) -> int:
+    """Return the 0-based index of the column with the given letters, e.g. A is 0 and AA is 26."""
+    if not letters.isalpha():
+        msg = f"Invalid column {letters!r}"
+        raise ValueError(msg)
+
+    index = 0
+    for char in letters.upper():
+        index = index * 26 + ord(char) - ord("A") + 1
+    return index - 1
+
+
+def column_add(column: str, value: int) -> str:
+    """Return the letters of the column value columns after the given one."""
+    return column_letter(column_index(column) + value)
+
+
+@dataclass(frozen=True)
+class GridRange:
+    """Range of cells of a sheet, as a GridRange of the Sheets API.
+
+    Indexes are 0-based and ends are exclusive. None stands for an unbounded side,
+    e.g. D2:D has no end row.
+    """
+
+    sheet_id: int | None = None
+    start_row: int | None = None
+    end_row: int | None = None
+    start_column: int | None = None
+    end_column: int | None = None
+
+    @classmethod
+    def from_a1(cls, range_str: str, sheet_id: int | None = None) -> "GridRange":
+        """Return the range of an A1 notation such as Sheet1!A5:D5, D2:D or A1.
+
+        The sheet name is ignored, as a GridRange refers to its sheet by ID.
+        """
+        return _parse_a1(range_str.rsplit("!", 1)[-1], sheet_id)
+
+    @classmethod
+    def cells(cls, row: int, column: int, rows: int = 1, columns: int = 1, sheet_id: int | None = None) -> "GridRange":
+        """Return the range of rows x columns cells whose top left cell has the given 0-based indexes."""
+        return cls(sheet_id, row, row + rows, column, column + columns)
+
+    def a1(self, sheet_name: str | None = None) -> str:
+        """Return the range in A1 notation, prefixed with the sheet name if given."""
+        start = _a1_cell(self.start_column, self.start_row, end=False)
+        end = _a1_cell(self.end_column, self.end_row, end=True)
+        cells = start if start == end else f"{start}:{end}"
+        return f"{sheet_name}!{cells}" if sheet_name is not None else cells
+
+    def to_dict(self) -> dict:
+        """Return the GridRange request object, leaving out unbounded sides."""
+        rv: dict = {}
+        if self.sheet_id is not None:
+            rv["sheetId"] = self.sheet_id
+        if self.start_row is not None:
+            rv["startRowIndex"] = self.start_row
+        if self.end_row is not None:
+            rv["endRowIndex"] = self.end_row
+        if self.start_column is not None:
+            rv["startColumnIndex"] = self.start_column
+        if self.end_column is not None:
+            rv["endColumnIndex"] = self.end_column
+        return rv
+
+
+@cache
+def _parse_a1(cells: str, sheet_id: int | None) -> GridRange:
+    start, _, end = cells.partition(":")
+    end = end or start
+
+    start_match = _CELL.fullmatch(start)
+    end_match = _CELL.fullmatch(end)
+    if start_match is None or end_match is None:
+        msg = f"Invalid A1 range {cells!r}"
+        raise ValueError(msg)
+
+    start_column, start_row = start_match.groups()
+    end_column, end_row = end_match.groups()
+    return GridRange(
+        sheet_id=sheet_id,
+        start_row=int(start_row) - 1 if start_row else None,
+        end_row=int(end_row) if end_row else None,
+        start_column=column_index(start_column) if start_column else None,
+        end_column=column_index(end_column) + 1 if end_column else None,
+    )
+
+
+def _a1_cell(column: int | None, row: int | None, *, end: bool) -> str:
+    # Ends are exclusive in a GridRange, and inclusive in A1 notation
+    offset = 1 if end else 0
+    letters = column_letter(column - offset) if column is not None else ""
+    number = str(row + 1 - offset) if row is not None else ""
+    return letters + number
@@ -1,14 +1,77 @@
 """Class for importing benchmark data."""
 
+import contextvars
 import csv
+import hashlib
+import json
 import logging
-from dataclasses import dataclass
+import math
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
 
 from googleapiclient.discovery import Resource
 
+from report_gen.cache import ParsedFileCache
+from report_gen.runs import RunSelection, to_float
+
+from .checkpoint import Checkpoint
+from .raw_data import RawData
+from .stages import DEFAULT_WORKERS
+
 logger = logging.getLogger(__name__)
 
+# Maximum size of the rows uploaded in one request. Sheets recommends payloads of at most 2MB.
+DEFAULT_CHUNK_BYTES = 1024 * 1024
+
+# Columns of the raw sheet holding numbers
+NUMERIC_COLUMNS = {
+    "user-tags\\.run",
+    "value\\.50_0",
+    "value\\.90_0",
+    "workload\\.target_throughput",
+    "workload\\.number_of_replicas",
+    "workload\\.bulk_indexing_clients",
+    "workload\\.max_num_segments",
+    "user-tags\\.shard-count",
+    "user-tags\\.replica-count",
+}
+
+
+def to_number(value: str) -> str | int | float:
+    """Convert a numeric cell to a number, so it can be uploaded without being parsed by Sheets."""
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        number = float(value)
+    except ValueError:
+        return value
+    # NaN and infinity cannot be sent as JSON numbers
+    return number if math.isfinite(number) else value
+
+
+def chunk_rows(rows: list[list], max_bytes: int) -> list[tuple[int, list[list]]]:
+    """Split rows into chunks of about max_bytes once encoded, returning the first row number of each chunk."""
+    chunks: list[tuple[int, list[list]]] = []
+    chunk: list[list] = []
+    chunk_bytes = 0
+    start = 1
+
+    for row in rows:
+        row_bytes = len(json.dumps(row)) + 1
+        if chunk and chunk_bytes + row_bytes > max_bytes:
+            chunks.append((start, chunk))
+            start += len(chunk)
+            chunk, chunk_bytes = [], 0
+        chunk.append(row)
+        chunk_bytes += row_bytes
+
+    if chunk:
+        chunks.append((start, chunk))
+    return chunks
+
 
 @dataclass
 class ImportData:
@@ -17,6 +80,12 @@ class ImportData:
     service: Resource
     spreadsheet_id: str
     folder: Path
+    cache: ParsedFileCache | None = None
+    runs: RunSelection = field(default_factory=RunSelection)
+    raw_data: RawData | None = None
+    workers: int = DEFAULT_WORKERS
+    chunk_bytes: int = DEFAULT_CHUNK_BYTES
+    checkpoint: Checkpoint | None = None
 
     @staticmethod
     def workload_subtype(processed_row: list[str]) -> str:
@@ -51,7 +120,11 @@ class ImportData:
         return engine_type == "ES" and workload == "noaa_semantic_search"
 
     def read_rows(self, csv_path: Path) -> list[list[str]]:
-        """Read CSV data."""
+        """Read CSV data.
+
+        Only the rows of the runs selected by the run selection policy are returned,
+        so the warmup run is excluded by default.
+        """
         row_list: list[list[str]]
         with csv_path.open() as csv_file:
             csv_reader = csv.reader(csv_file)
@@ -83,7 +156,7 @@ class ImportData:
             "workload\\.target_index_body",
         ]
 
-        processed_row_list: list[list[str]] = [output_column_order]
+        processed_row_list: list[list[str]] = []
 
         for row_index, row in enumerate(row_list):
             if row_index == 0:
@@ -103,19 +176,33 @@ class ImportData:
             processed_row[5] = workload_subtype
             processed_row_list.append(processed_row)
 
-        return processed_row_list
+        # Select runs, trimming on the p90 values
+        processed_row_list = self.runs.filter_rows(
+            processed_row_list,
+            run=lambda row: row[7],
+            series=lambda row: (row[9], row[8]),
+            value=lambda row: to_float(row[11]),
+        )
 
-    def get(self) -> bool:
-        """Import benchmark data into spreadsheet."""
+        return [output_column_order, *processed_row_list]
+
+    def load_rows(self, csv_path: Path) -> list[list[str]]:
+        """Read CSV data, going through the parsed file cache if one is provided."""
+        if self.cache is None:
+            return self.read_rows(csv_path)
+        return self.cache.load(csv_path, f"import-rows:{self.runs}", self.read_rows)
+
+    def read(self) -> RawData:
+        """Read the benchmark data of all the CSV files in the folder."""
         # Get CSV files
-        csv_files = self.folder.glob("*.csv")
+        csv_files = sorted(self.folder.glob("*.csv"))
 
         # Read rows in files
         raw_data: list[list[str]] = []
         for fn in csv_files:
             logging.info(f"Processing {fn.name}")
 
-            rows = self.read_rows(fn)
+            rows = self.load_rows(fn)
 
             # Add the header row
             if not raw_data:
@@ -123,16 +210,62 @@ class ImportData:
             # Add the data rows
             raw_data.extend(rows[1:])
 
-        # Import data to spreadsheet
+        return RawData.from_values(raw_data)
+
+    def typed_values(self, raw_data: RawData) -> list[list]:
+        """Return the rows of the raw sheet, with numbers in the numeric columns."""
+        numeric = [column in NUMERIC_COLUMNS for column in raw_data.columns]
+        return [
+            list(raw_data.columns),
+            *(
+                [to_number(value) if is_numeric else value for value, is_numeric in zip(row, numeric, strict=True)]
+                for row in raw_data.rows
+            ),
+        ]
+
+    def upload_chunk(self, start: int, rows: list[list]) -> None:
+        """Upload rows to the raw sheet, starting at the given row number, unless they already were."""
+        key = hashlib.sha256(json.dumps([start, rows]).encode()).hexdigest()
+        if self.checkpoint is not None and self.checkpoint.chunk_uploaded(key):
+            logger.info(f"Skipping raw rows {start} to {start + len(rows) - 1}, uploaded by a previous run")
+            return
+
+        # The values are already typed, so skip parsing them as if they were typed in
         request_properties: dict = {
             "majorDimension": "ROWS",
-            "values": raw_data,
+            "values": rows,
         }
         self.service.spreadsheets().values().update(
             spreadsheetId=self.spreadsheet_id,
-            range="raw!A1",
-            valueInputOption="USER_ENTERED",
+            range=f"raw!A{start}",
+            valueInputOption="RAW",
             body=request_properties,
         ).execute()
 
+        if self.checkpoint is not None:
+            self.checkpoint.add_chunk(key)
+
+    def get(self) -> bool:
+        """Import benchmark data into spreadsheet.
+
+        The data is read unless raw_data is already set. It is kept in raw_data, for the other sheets to use.
+        The rows are uploaded concurrently in chunks of about chunk_bytes. With a checkpoint,
+        the chunks uploaded by a previous run are skipped.
+        """
+        if self.raw_data is None:
+            self.raw_data = self.read()
+
+        chunks = chunk_rows(self.typed_values(self.raw_data), self.chunk_bytes)
+        logger.info(f"Uploading {len(self.raw_data.rows)} raw rows in {len(chunks)} chunks")
+
+        # Import data to spreadsheet
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="raw") as executor:
+            # Copy the context, so the requests are attributed to the current stage
+            futures = [
+                executor.submit(contextvars.copy_context().run, self.upload_chunk, start, rows)
+                for start, rows in chunks
+            ]
+            for future in futures:
+                future.result()
+
         return True
@@ -0,0 +1,185 @@
+"""Statistics on the Google Sheets API requests sent while creating a report."""
+
+import json
+import statistics
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+
+# Stage requests are sent from, set by run_stages
+current_stage: ContextVar[str] = ContextVar("current_stage", default="setup")
+
+
+@dataclass
+class ApiCall:
+    """A request sent through the ApiClient, including its retries."""
+
+    stage: str
+    method: str
+    thread: int
+    start: float
+    # Time spent waiting for the response, in seconds
+    latency: float = 0.0
+    # Time spent waiting for the rate limiter and before retries, in seconds
+    throttle_wait: float = 0.0
+    request_bytes: int = 0
+    response_bytes: int = 0
+    retries: int = 0
+    status: int | None = None
+
+
+@dataclass
+class StageSpan:
+    """The time a stage ran."""
+
+    stage: str
+    thread: int
+    start: float
+    duration: float
+
+
+@dataclass
+class _Totals:
+    calls: int = 0
+    latencies: list[float] = field(default_factory=list)
+    throttle_wait: float = 0.0
+    request_bytes: int = 0
+    response_bytes: int = 0
+    retries: int = 0
+    errors: int = 0
+
+    def add(self, call: ApiCall) -> None:
+        self.calls += 1
+        self.latencies.append(call.latency)
+        self.throttle_wait += call.throttle_wait
+        self.request_bytes += call.request_bytes
+        self.response_bytes += call.response_bytes
+        self.retries += call.retries
+        self.errors += call.status is None or call.status >= 300  # noqa: PLR2004
+
+    def row(self) -> list[str]:
+        return [
+            str(self.calls),
+            str(self.errors),
+            str(self.retries),
+            f"{sum(self.latencies):.2f}",
+            f"{statistics.mean(self.latencies) * 1000:.0f}",
+            f"{max(self.latencies) * 1000:.0f}",
+            f"{self.throttle_wait:.2f}",
+            f"{self.request_bytes / 1024:.1f}",
+            f"{self.response_bytes / 1024:.1f}",
+        ]
+
+
+@dataclass
+class ApiStats:
+    """Record the requests sent by each stage, safe to use from multiple threads."""
+
+    calls: list[ApiCall] = field(default_factory=list)
+    spans: list[StageSpan] = field(default_factory=list)
+    origin: float = field(default_factory=time.monotonic)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False, compare=False)
+
+    def start_call(self, method: str) -> ApiCall:
+        """Record a new request of the given API method, sent from the current stage."""
+        call = ApiCall(current_stage.get(), method, threading.get_ident(), time.monotonic())
+        with self._lock:
+            self.calls.append(call)
+        return call
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Attribute the requests sent in this context to the given stage and record its duration."""
+        token = current_stage.set(name)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            span = StageSpan(name, threading.get_ident(), start, time.monotonic() - start)
+            with self._lock:
+                self.spans.append(span)
+            current_stage.reset(token)
+
+    def totals(self) -> tuple[dict[tuple[str, str], _Totals], _Totals]:
+        """Return the totals of each (stage, method), and of all the requests."""
+        totals: dict[tuple[str, str], _Totals] = {}
+        overall = _Totals()
+        with self._lock:
+            calls = list(self.calls)
+        for call in calls:
+            totals.setdefault((call.stage, call.method), _Totals()).add(call)
+            overall.add(call)
+        return totals, overall
+
+    def summary(self) -> str:
+        """Return a table of the requests sent by each stage, per API method."""
+        header = ["Stage", "Method", "Calls", "Errors", "Retries", "Latency s", "Mean ms", "Max ms", "Throttle s"]
+        header += ["Sent KiB", "Received KiB"]
+
+        totals, overall = self.totals()
+
+        rows: list[list[str]] = [header]
+        rows.extend([stage, method, *total.row()] for (stage, method), total in sorted(totals.items()))
+        if overall.calls:
+            rows.append(["Total", "", *overall.row()])
+
+        widths = [max(len(row[column]) for row in rows) for column in range(len(header))]
+        return "\n".join(
+            "  ".join(
+                value.ljust(width) if column < 2 else value.rjust(width)  # noqa: PLR2004
+                for column, (value, width) in enumerate(zip(row, widths, strict=True))
+            )
+            for row in rows
+        )
+
+    def trace(self) -> dict:
+        """Return the requests and stages as Chrome trace events, viewable in chrome://tracing or Perfetto."""
+
+        def microseconds(seconds: float) -> int:
+            return round(seconds * 1_000_000)
+
+        with self._lock:
+            calls = list(self.calls)
+            spans = list(self.spans)
+
+        events: list[dict] = [
+            {
+                "name": span.stage,
+                "cat": "stage",
+                "ph": "X",
+                "ts": microseconds(span.start - self.origin),
+                "dur": microseconds(span.duration),
+                "pid": 0,
+                "tid": span.thread,
+            }
+            for span in spans
+        ]
+        events.extend(
+            {
+                "name": call.method,
+                "cat": call.stage,
+                "ph": "X",
+                "ts": microseconds(call.start - self.origin),
+                "dur": microseconds(call.throttle_wait + call.latency),
+                "pid": 0,
+                "tid": call.thread,
+                "args": {
+                    "status": call.status,
+                    "retries": call.retries,
+                    "throttle_wait_ms": round(call.throttle_wait * 1000, 1),
+                    "request_bytes": call.request_bytes,
+                    "response_bytes": call.response_bytes,
+                },
+            }
+            for call in calls
+        )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_trace(self, path: Path) -> None:
+        """Write the Chrome trace to a JSON file."""
+        with path.open("w") as f:
+            json.dump(self.trace(), f)
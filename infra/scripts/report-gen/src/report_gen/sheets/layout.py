@@ -0,0 +1,159 @@
+"""Layout of the sheets of a report spreadsheet."""
+
+from collections.abc import Collection
+from dataclasses import dataclass, replace
+
+from .categories import CategoryIndex
+from .raw_data import RawData
+
+# Default grid size of a new Google sheet
+DEFAULT_ROW_COUNT = 1000
+DEFAULT_COLUMN_COUNT = 26
+
+# Approximate width of a character and the cell padding, in pixels, used to size columns to their contents
+CHARACTER_WIDTH = 7
+COLUMN_PADDING = 14
+
+
+@dataclass(frozen=True)
+class SheetSpec:
+    """Properties of a sheet, set when the spreadsheet is created."""
+
+    title: str
+    sheet_id: int
+    row_count: int = DEFAULT_ROW_COUNT
+    column_count: int = DEFAULT_COLUMN_COUNT
+    frozen_row_count: int = 0
+    frozen_column_count: int = 0
+    # Only created when the report includes it
+    optional: bool = False
+
+    def properties(self) -> dict:
+        """Return the SheetProperties of the sheet."""
+        return {
+            "sheetId": self.sheet_id,
+            "title": self.title,
+            "gridProperties": {
+                "rowCount": self.row_count,
+                "columnCount": self.column_count,
+                "frozenRowCount": self.frozen_row_count,
+                "frozenColumnCount": self.frozen_column_count,
+            },
+        }
+
+
+RESULTS_HEADER: list[str] = [
+    "Workload",
+    "Category",
+    "Operation",
+    "Comparison\nES/OS",
+    "",
+    "OS version",
+    "OS SubType",
+    "OS: STDEV 50",
+    "OS: STDEV 90",
+    "OS: Median 50",
+    "OS: Median 90",
+    "OS: RSD 50",
+    "OS: RSD 90",
+    "",
+    "ES version",
+    "ES SubType",
+    "ES: STDEV 50",
+    "ES: STDEV 90",
+    "ES: Median 50",
+    "ES: Median 90",
+    "ES: RSD 50",
+    "ES: RSD 90",
+]
+
+# Sheets of the report, in display order. The sheet IDs are assigned here rather than by Google,
+# so the sheets can be referenced without fetching the spreadsheet metadata.
+SHEETS: tuple[SheetSpec, ...] = (
+    SheetSpec("Overall Spread", 0, row_count=500, column_count=50),
+    # NOTE: OSVersion fills the sheets of these OS versions
+    SheetSpec("OS 2.19.1", 1),
+    SheetSpec("OS 3.0.0", 2),
+    SheetSpec("Summary", 3),
+    SheetSpec("Results", 4, frozen_row_count=1, frozen_column_count=4),
+    SheetSpec("Resources", 7, frozen_row_count=1, frozen_column_count=4, optional=True),
+    SheetSpec("Saturation", 8, frozen_row_count=1, frozen_column_count=4, optional=True),
+    SheetSpec("Categories", 5),
+    SheetSpec("raw", 6),
+)
+
+
+def get_sheet(sheet_name: str) -> SheetSpec | None:
+    """Return the sheet with the given name."""
+    for sheet in SHEETS:
+        if sheet.title == sheet_name:
+            return sheet
+    return None
+
+
+def _grid_data(rows: list[list[str]]) -> dict:
+    """Return GridData holding the given strings, starting at A1."""
+    return {
+        "startRow": 0,
+        "startColumn": 0,
+        "rowData": [{"values": [{"userEnteredValue": {"stringValue": value}} for value in row]} for row in rows],
+    }
+
+
+def _column_metadata(rows: list[list[str]]) -> list[dict]:
+    """Return the DimensionProperties sizing each column to the longest value in it."""
+    widths: list[int] = []
+    for row in rows:
+        for index, value in enumerate(row):
+            width = max((len(line) for line in value.splitlines()), default=0)
+            if index < len(widths):
+                widths[index] = max(widths[index], width)
+            else:
+                widths.append(width)
+
+    return [{"pixelSize": width * CHARACTER_WIDTH + COLUMN_PADDING} for width in widths]
+
+
+def spreadsheet_body(
+    title: str, categories: CategoryIndex, raw_data: RawData | None = None, optional_sheets: Collection[str] = ()
+) -> dict:
+    """Return the body of the spreadsheets.create request for a new report.
+
+    Besides the sheets, this includes the Results header row and the Categories table.
+    If raw_data is given, the raw sheet is sized to hold it, so it can be uploaded in chunks.
+    Optional sheets are only included if their title is in optional_sheets.
+    """
+    data: dict[str, list[list[str]]] = {
+        "Results": [RESULTS_HEADER],
+        "Categories": categories.rows(),
+    }
+
+    # Make room for all the data
+    sizes: dict[str, tuple[int, int]] = {
+        sheet_name: (len(rows), max(len(row) for row in rows)) for sheet_name, rows in data.items()
+    }
+    if raw_data is not None:
+        sizes["raw"] = (len(raw_data.rows) + 1, len(raw_data.columns))
+
+    sheets: list[dict] = []
+    for sheet in SHEETS:
+        if sheet.optional and sheet.title not in optional_sheets:
+            continue
+        row_count, column_count = sizes.get(sheet.title, (0, 0))
+        sized = replace(
+            sheet,
+            row_count=max(sheet.row_count, row_count),
+            column_count=max(sheet.column_count, column_count),
+        )
+        sheet_body: dict = {"properties": sized.properties()}
+
+        rows = data.get(sheet.title)
+        if rows is not None:
+            grid_data = _grid_data(rows)
+            if sheet.title == "Categories":
+                grid_data["columnMetadata"] = _column_metadata(rows)
+            sheet_body["data"] = [grid_data]
+
+        sheets.append(sheet_body)
+
+    return {"properties": {"title": title}, "sheets": sheets}
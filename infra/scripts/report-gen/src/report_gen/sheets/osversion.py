@@ -1,18 +1,13 @@
 """Class for creating OS Versions sheet."""
 
 import logging
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 from googleapiclient.discovery import Resource
 
+from .categories import CategoryIndex, get_category_index
 from .common import (
     adjust_sheet_columns,
-    convert_range_to_dict,
-    get_category_operation_map,
-    get_sheet_id,
-    get_workload_operation_categories,
-    get_workload_operations,
-    get_workloads,
 )
 from .format.color import (
     color as format_color,
@@ -33,6 +28,12 @@ from .format.merge import (
 from .format.number import (
     format_float as format_number_float,
 )
+from .format.plan import (
+    plan as format_plan,
+)
+from .grid import GridRange
+from .layout import SheetSpec, get_sheet
+from .raw_data import RawData
 
 logger = logging.getLogger(__name__)
 
@@ -43,16 +44,17 @@ class OSVersion:
 
     service: Resource
     spreadsheet_id: str
+    raw_data: RawData
     sheet_name: str | None = None
     sheet_id: int | None = None
-    sheet: dict | None = None
+    sheet: SheetSpec | None = None
+    categories: CategoryIndex = field(default_factory=get_category_index)
 
     def format_headers_merge(self, range_list: list[str], color: dict) -> list[dict]:
         """Format header rows."""
         requests: list[dict] = []
         for range_str in range_list:
-            range_dict = convert_range_to_dict(range_str)
-            range_dict["sheetId"] = self.sheet_id
+            range_dict = GridRange.from_a1(range_str, self.sheet_id).to_dict()
             requests.append(format_font_bold(range_dict))
             requests.append(format_merge(range_dict))
             requests.append(format_color(range_dict, color))
@@ -60,10 +62,10 @@ class OSVersion:
 
     def format(self, requests: list[dict]) -> None:
         """Format summary sheet."""
-        body = {"requests": requests}
+        body = {"requests": format_plan(requests)}
         self.service.spreadsheets().batchUpdate(spreadsheetId=self.spreadsheet_id, body=body).execute()
 
-    def create_header(self, os_version: str, es_version: str, workload_str: str) -> list[dict]:  # noqa: PLR0915
+    def create_header(self, os_version: str, es_version: str, workload_str: str) -> list[dict]:
         """Fill in header rows & column."""
         requests: list[dict] = []
 
@@ -192,19 +194,13 @@ class OSVersion:
         updated_range = result["updates"]["updatedRange"]
 
         # Format header
-        range_dict = convert_range_to_dict(updated_range)
-        range_dict["sheetId"] = self.sheet_id
+        range_dict = GridRange.from_a1(updated_range, self.sheet_id).to_dict()
         requests.append(format_font_bold(range_dict))
         requests.append(format_color(range_dict, get_light_gray()))
 
         # Add first column
-        spec_list: list[dict] = get_category_operation_map()
-        for spec in spec_list:
-            if spec["workload"] == workload_str:
-                break
-
         offset = 3
-        for category, operations in spec["categories"].items():
+        for category, operations in self.categories.category_operations(workload_str).items():
             rows = []
             rows.append([f"{category}"])
             rows.extend([[""]] * (len(operations) - 1))
@@ -256,11 +252,6 @@ class OSVersion:
         # Create header
         requests = self.create_header(os_version, es_version, workload_str)
 
-        spec_list: list[dict] = get_category_operation_map()
-        for spec in spec_list:
-            if spec["workload"] == workload_str:
-                break
-
         logger.info(f"processing {os_version} and {es_version}")
 
         rows: list[list[str]] = []
@@ -281,7 +272,7 @@ class OSVersion:
         # For each category and operation
         category_index = 3
         operation_index = 3
-        for category, operations in spec["categories"].items():
+        for category, operations in self.categories.category_operations(workload_str).items():
             logger.info(f"Processing category {category}")
 
             for operation in operations:
@@ -334,20 +325,17 @@ class OSVersion:
         updated_range = result["updates"]["updatedRange"]
 
         # Format float numbers
-        range_dict = convert_range_to_dict(updated_range)
-        range_dict["sheetId"] = self.sheet_id
+        range_dict = GridRange.from_a1(updated_range, self.sheet_id).to_dict()
         requests.append(format_number_float(range_dict))
 
         # Format Relative Difference colors
         for cells in ["G2:G"]:
-            range_dict = convert_range_to_dict(f"{self.sheet_name}!{cells}")
-            range_dict["sheetId"] = self.sheet_id
+            range_dict = GridRange.from_a1(cells, self.sheet_id).to_dict()
             requests.extend(format_color_relative_difference(range_dict))
 
         # Format ES/OS colors
         for cells in ["H2:H"]:
-            range_dict = convert_range_to_dict(f"{self.sheet_name}!{cells}")
-            range_dict["sheetId"] = self.sheet_id
+            range_dict = GridRange.from_a1(cells, self.sheet_id).to_dict()
             requests.extend(format_color_comparison(range_dict))
 
         return requests
@@ -356,27 +344,27 @@ class OSVersion:
         """Retrieve data to fill in OS Version sheets."""
         workload_str = "big5"
 
-        # NOTE(Evan): These correspond to the OS version sheet names in _create_spreadsheet() in __init__.py
+        # NOTE(Evan): These correspond to the OS version sheet names in SHEETS in layout.py
         os_versions = ["2.19.1", "3.0.0"]
 
         # Map between OS version and ES version to compare
         es_version = {"2.19.1": "8.18.1", "3.0.0": "9.0.1"}
 
         # Retrieve workload to process and compare
-        workloads: dict[str, dict[str, list[str]]] = get_workloads(self.service, self.spreadsheet_id)
+        workloads: dict[str, dict[str, list[str]]] = self.raw_data.workloads()
 
         if workload_str not in workloads:
             logger.error(f"Error, workload {workload_str} not found.")
             return False
 
         # Retrieve operations for workload
-        operations = get_workload_operations(workload_str)
+        operations = self.categories.operations(workload_str)
         if len(operations) == 0:
             logger.error(f"Error, no operations found for workload {workload_str}")
             return False
 
         # Retrieve operations categories for workload
-        categories = get_workload_operation_categories(workload_str)
+        categories = self.categories.categories(workload_str)
         if len(categories) == 0:
             logger.error(f"Error, no operation categories found for workload {workload_str}")
             return False
@@ -388,10 +376,11 @@ class OSVersion:
 
             # Get sheet ID for this OS version sheet
             self.sheet_name = f"OS {osv}"
-            self.sheet_id, self.sheet = get_sheet_id(self.service, self.spreadsheet_id, self.sheet_name)
-            if self.sheet_id is None:
+            self.sheet = get_sheet(self.sheet_name)
+            if self.sheet is None:
                 logger.error(f"Error, sheet {self.sheet_name} not found.")
                 continue
+            self.sheet_id = self.sheet.sheet_id
 
             # Fill OS version sheet
             requests = self.fill(osv, es_version[osv], workload_str)
@@ -400,6 +389,6 @@ class OSVersion:
             self.format(requests)
 
             # Adjust columns
-            adjust_sheet_columns(self.service, self.spreadsheet_id, self.sheet_id, self.sheet)
+            adjust_sheet_columns(self.service, self.spreadsheet_id, self.sheet_id, self.sheet.column_count)
 
         return True
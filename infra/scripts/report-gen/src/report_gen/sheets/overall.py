@@ -1,19 +1,14 @@
 """Class for creating OS Overall Spread sheet."""
 
 import logging
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import cast
 
 from googleapiclient.discovery import Resource
 
+from .categories import CategoryIndex, get_category_index
 from .common import (
     adjust_sheet_columns,
-    convert_range_to_dict,
-    get_category_operation_map,
-    get_sheet_id,
-    get_workload_operation_categories,
-    get_workload_operations,
-    get_workloads,
 )
 from .format.color import (
     color as format_color,
@@ -34,6 +29,12 @@ from .format.merge import (
 from .format.number import (
     format_float as format_number_float,
 )
+from .format.plan import (
+    plan as format_plan,
+)
+from .grid import GridRange, column_add
+from .layout import SheetSpec, get_sheet
+from .raw_data import RawData
 
 logger = logging.getLogger(__name__)
 
@@ -44,9 +45,11 @@ class OverallSheet:
 
     service: Resource
     spreadsheet_id: str
+    raw_data: RawData
     sheet_name: str | None = None
     sheet_id: int | None = None
-    sheet: dict | None = None
+    sheet: SheetSpec | None = None
+    categories: CategoryIndex = field(default_factory=get_category_index)
 
     def format_headers_merge(self, range_list: list[str], color: dict) -> list[dict]:
         """Format header rows."""
@@ -55,8 +58,7 @@ class OverallSheet:
             expected_range_count = 2
             if len(range_str.split(":")) != expected_range_count:
                 continue
-            range_dict = convert_range_to_dict(range_str)
-            range_dict["sheetId"] = self.sheet_id
+            range_dict = GridRange.from_a1(range_str, self.sheet_id).to_dict()
             requests.append(format_font_bold(range_dict))
             requests.append(format_merge(range_dict))
             requests.append(format_color(range_dict, color))
@@ -64,7 +66,7 @@ class OverallSheet:
 
     def format(self, requests: list[dict]) -> None:
         """Format summary sheet."""
-        body = {"requests": requests}
+        body = {"requests": format_plan(requests)}
         self.service.spreadsheets().batchUpdate(spreadsheetId=self.spreadsheet_id, body=body).execute()
 
     def create_header(self, os_versions: list[str], es_version: str, workload_str: str) -> list[dict]:
@@ -108,11 +110,11 @@ class OverallSheet:
         results_width = 3 + len(os_versions)
 
         # one columns for each OS version
-        rel_col = chr(ord(results_col) + results_width)
+        rel_col = column_add(results_col, results_width)
         rel_width = len(os_versions)
 
         # one columns for each OS version
-        ratio_col = chr(ord(rel_col) + rel_width)
+        ratio_col = column_add(rel_col, rel_width)
         ratio_width = len(os_versions)
 
         # Add first row
@@ -130,16 +132,13 @@ class OverallSheet:
                 + [f"Ratio ES {es_version} /\n OS {v}" for v in os_versions]
             ],
         )
-        range_dict = convert_range_to_dict(row2_range)
-        range_dict["sheetId"] = self.sheet_id
+        range_dict = GridRange.from_a1(row2_range, self.sheet_id).to_dict()
         requests.append(format_font_bold(range_dict))
         requests.append(format_color(range_dict, get_light_gray()))
 
         # Fill in first column labels
         row_offset = 3
-        spec = next(spec for spec in get_category_operation_map() if spec["workload"] == workload_str)
-
-        for category, operations in spec["categories"].items():
+        for category, operations in self.categories.category_operations(workload_str).items():
             updated_range = sheet_exec(f"A{row_offset}", [[f"{category}"]] + [[""]] * (len(operations) - 1))
             # Format
             requests.extend(self.format_headers_merge([updated_range], get_light_gray()))
@@ -155,8 +154,7 @@ class OverallSheet:
         os_sheets = {v: f"OS {v}" for v in os_versions}
 
         # Calculating the number of data rows is based on loop to create rows in OsVersion.fill
-        spec = next(spec for spec in get_category_operation_map() if spec["workload"] == workload_str)
-        data_row_count = sum(len(operations) for operations in spec["categories"].values())
+        data_row_count = len(self.categories.operations(workload_str))
 
         # Grab ES data from any sheet. They should all have the same ES data
         any_os_sheet = next(iter(os_sheets.values()))
@@ -192,27 +190,19 @@ class OverallSheet:
         updated_range = result["updates"]["updatedRange"]
 
         # Format float numbers
-        range_dict = convert_range_to_dict(updated_range)
-        range_dict["sheetId"] = self.sheet_id
+        range_dict = GridRange.from_a1(updated_range, self.sheet_id).to_dict()
         requests.append(format_number_float(range_dict))
 
-        def idx2col(idx: int) -> str:
-            return chr(ord("A") + idx)
-
         # Format Relative Difference colors
         start = 3 + len(os_versions)
-        end = start + len(os_versions) - 1
-        relative_diff_range = f"{self.sheet_name}!{idx2col(start)}2:{idx2col(end)}{data_row_count + 3}"
-        range_dict = convert_range_to_dict(relative_diff_range)
-        range_dict["sheetId"] = self.sheet_id
+        end = start + len(os_versions)
+        range_dict = GridRange(self.sheet_id, 1, data_row_count + 3, start, end).to_dict()
         requests.extend(format_color_relative_difference(range_dict))
 
         # Format ES/OS colors
-        start = end + 1
-        end = start + len(os_versions) - 1
-        os_es_range = f"{self.sheet_name}!{idx2col(start)}2:{idx2col(end)}{data_row_count + 3}"
-        range_dict = convert_range_to_dict(os_es_range)
-        range_dict["sheetId"] = self.sheet_id
+        start = end
+        end = start + len(os_versions)
+        range_dict = GridRange(self.sheet_id, 1, data_row_count + 3, start, end).to_dict()
         requests.extend(format_color_comparison(range_dict))
 
         return requests
@@ -221,38 +211,39 @@ class OverallSheet:
         """Retrieve data to fill in OS Version sheets."""
         workload_str = "big5"
         es_version = "9.0.1"
-        # NOTE(Evan): These correspond to the OS version sheet names in _create_spreadsheet() in __init__.py
+        # NOTE(Evan): These correspond to the OS version sheet names in SHEETS in layout.py
         os_versions = ["3.0.0"]
 
         # Retrieve workload to process and compare
-        workloads: dict[str, dict[str, list[str]]] = get_workloads(self.service, self.spreadsheet_id)
+        workloads: dict[str, dict[str, list[str]]] = self.raw_data.workloads()
 
         if workload_str not in workloads:
             logger.error(f"Error, workload {workload_str} not found.")
             return False
 
         # Retrieve operations for workload
-        operations = get_workload_operations(workload_str)
+        operations = self.categories.operations(workload_str)
         if len(operations) == 0:
             logger.error(f"Error, no operations found for workload {workload_str}")
             return False
 
         # Retrieve operations categories for workload
-        categories = get_workload_operation_categories(workload_str)
+        categories = self.categories.categories(workload_str)
         if len(categories) == 0:
             logger.error(f"Error, no operation categories found for workload {workload_str}")
             return False
 
-        # NOTE(Brad): this is form the sheet name in _create_spreadsheet() in __init__.py
+        # NOTE(Brad): this is from the sheet names in SHEETS in layout.py
         self.sheet_name = "Overall Spread"
-        self.sheet_id, self.sheet = get_sheet_id(self.service, self.spreadsheet_id, self.sheet_name)
-        if self.sheet_id is None:
+        self.sheet = get_sheet(self.sheet_name)
+        if self.sheet is None:
             logger.error(f"Error, sheet {self.sheet_name} not found.")
             return False
+        self.sheet_id = self.sheet.sheet_id
 
         requests = self.fill(os_versions, es_version, workload_str)
 
         self.format(requests)
-        adjust_sheet_columns(self.service, self.spreadsheet_id, self.sheet_id, self.sheet)
+        adjust_sheet_columns(self.service, self.spreadsheet_id, self.sheet_id, self.sheet.column_count)
 
         return True
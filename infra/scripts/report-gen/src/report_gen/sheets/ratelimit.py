@@ -0,0 +1,42 @@
+"""Rate limiting of the Google Sheets API requests."""
+
+import threading
+import time
+
+# Default Sheets API quota of requests per minute per user
+DEFAULT_REQUESTS_PER_MINUTE = 60
+
+# At least one request is sent at once and one more at the steady rate
+MIN_REQUESTS_PER_MINUTE = 2
+
+# Requests which can be sent at once, before being limited to the steady rate
+DEFAULT_BURST = 10
+
+
+class RateLimiter:
+    """Token bucket limiting the rate of requests, shared between threads.
+
+    Up to burst requests can be sent at once, after which requests are sent at rate requests per second.
+    """
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Wait until a request can be sent. Return the time waited, in seconds."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+            # Take the token now, waiting for it to be refilled if needed. Holding the lock while
+            # waiting makes the other threads queue up behind this one.
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            if wait > 0:
+                time.sleep(wait)
+            return wait
@@ -0,0 +1,95 @@
+"""In-memory copy of the benchmark data imported into the raw sheet."""
+
+from dataclasses import dataclass
+from datetime import datetime
+from functools import cached_property
+
+from packaging.version import Version
+
+from report_gen.run_files import RUN_GROUP_FORMAT, RunKey
+
+
+def _run_group(value: str) -> datetime:
+    """Parse a run group, written by download like 2024-09-20 13:56:42 or tagged like 2024_09_20_13_56_42."""
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return datetime.strptime(value, RUN_GROUP_FORMAT)  # noqa: DTZ007
+
+
+@dataclass(frozen=True)
+class RawData:
+    """Rows of the raw sheet, as uploaded by ImportData.
+
+    Lets the other sheets look up the imported workloads without reading the raw sheet back from the API.
+    """
+
+    columns: tuple[str, ...]
+    rows: tuple[tuple[str, ...], ...]
+
+    @classmethod
+    def from_values(cls, values: list[list[str]]) -> "RawData":
+        """Create from a header row followed by data rows."""
+        if not values:
+            return cls((), ())
+        return cls(tuple(values[0]), tuple(tuple(row) for row in values[1:]))
+
+    def values(self) -> list[list[str]]:
+        """Return the header row followed by the data rows, as written to the raw sheet."""
+        return [list(self.columns), *(list(row) for row in self.rows)]
+
+    def column(self, name: str) -> tuple[str, ...]:
+        """Return all the values of a column, none if no data was imported."""
+        if not self.columns:
+            return ()
+        index = self.columns.index(name)
+        return tuple(row[index] for row in self.rows)
+
+    @cached_property
+    def _workloads(self) -> dict[str, dict[str, tuple[str, ...]]]:
+        engines_by_workload: dict[str, dict[str, set[str]]] = {}
+        for engine, version, workload in zip(
+            self.column("user-tags\\.engine-type"),
+            self.column("distribution-version"),
+            self.column("workload"),
+            strict=True,
+        ):
+            engines_by_workload.setdefault(workload, {}).setdefault(engine, set()).add(version)
+
+        return {
+            workload: {engine: tuple(sorted(versions, key=Version)) for engine, versions in engines.items()}
+            for workload, engines in engines_by_workload.items()
+        }
+
+    def workloads(self) -> dict[str, dict[str, list[str]]]:
+        """Return the versions of each engine benchmarked for each workload, in the order first seen.
+
+        Versions are sorted. The result is a new dictionary which can be modified by the caller.
+        """
+        return {
+            workload: {engine: list(versions) for engine, versions in engines.items()}
+            for workload, engines in self._workloads.items()
+        }
+
+    @cached_property
+    def runs(self) -> frozenset[RunKey]:
+        """Return the runs imported, identified like the runs of the files written by download-metrics.
+
+        The Resources and Saturation sheets only include these runs, so the same runs are compared as in Results.
+        """
+        return frozenset(
+            (_run_group(run_group), engine, version, workload, run)
+            for run_group, engine, version, workload, run in zip(
+                self.column("user-tags\\.run-group"),
+                self.column("user-tags\\.engine-type"),
+                self.column("distribution-version"),
+                self.column("workload"),
+                self.column("user-tags\\.run"),
+                strict=True,
+            )
+        )
+
+    @cached_property
+    def subtypes(self) -> tuple[str, ...]:
+        """Return all the workload subtypes, sorted."""
+        return tuple(sorted({subtype for subtype in self.column("workload_subtype") if subtype}))
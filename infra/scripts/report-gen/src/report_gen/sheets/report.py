@@ -0,0 +1,216 @@
+"""Create a summary report in Google Sheets."""
+
+import logging
+from collections.abc import Callable, Collection
+from dataclasses import dataclass, field, replace
+from datetime import date
+from pathlib import Path
+
+from googleapiclient.discovery import Resource
+
+from report_gen.cache import ParsedFileCache
+from report_gen.runs import RunSelection
+
+from .auth import authenticate
+from .categories import CategoryIndex, get_category_index
+from .checkpoint import DEFAULT_CHECKPOINT_DIR, Checkpoint
+from .client import ApiClient
+from .common import reset_sheet
+from .import_data import ImportData
+from .instrumentation import ApiStats
+from .layout import get_sheet, spreadsheet_body
+from .osversion import OSVersion
+from .overall import OverallSheet
+from .ratelimit import DEFAULT_REQUESTS_PER_MINUTE
+from .raw_data import RawData
+from .resources import Resources
+from .result import Result
+from .saturation import Saturation
+from .stages import DEFAULT_WORKERS, Stage, run_stages
+from .summary import Summary
+
+logger = logging.getLogger(__name__)
+
+# Sheets filled in by each stage, with the number of rows written when the spreadsheet is created
+STAGE_SHEETS: dict[str, dict[str, int]] = {
+    "Results": {"Results": 1},
+    "Summary": {"Summary": 0},
+    "OS versions": {"OS 2.19.1": 0, "OS 3.0.0": 0},
+    "Overall": {"Overall Spread": 0},
+    "Resources": {"Resources": 0},
+    "Saturation": {"Saturation": 0},
+}
+
+
+@dataclass
+class ReportOptions:
+    """Options of create_report.
+
+    runs selects the runs of each benchmark used in the report, by default all runs but the warmup run.
+    categories maps the operations of each workload to categories, by default the built-in map is used.
+    Independent sheets are created concurrently by up to workers threads, sharing a client sending at most
+    requests_per_minute requests per minute. The requests sent by each stage are recorded in stats.
+    The progress of the report is saved in checkpoint_dir. To complete a report which failed,
+    set resume to its spreadsheet ID.
+    If metrics_data is set to a folder downloaded by download-metrics, a Resources sheet compares
+    the resources used by each operation, and a Saturation sheet flags the operations which did not
+    reach their target throughput.
+    """
+
+    cache: ParsedFileCache | None = None
+    runs: RunSelection = field(default_factory=RunSelection)
+    categories: CategoryIndex = field(default_factory=get_category_index)
+    workers: int = DEFAULT_WORKERS
+    requests_per_minute: int = DEFAULT_REQUESTS_PER_MINUTE
+    stats: ApiStats = field(default_factory=ApiStats)
+    checkpoint_dir: Path = DEFAULT_CHECKPOINT_DIR
+    resume: str | None = None
+    metrics_data: Path | None = None
+
+
+def create_report(
+    benchmark_data: Path,
+    token_path: Path,
+    credential_path: Path | None,
+    options: ReportOptions | None = None,
+) -> str | None:
+    """Create a spreadsheet report form the provided benchmark data."""
+    options = options or ReportOptions()
+
+    # Authenticate credentials
+    creds = authenticate(credential_path, token_path)
+    if creds is None:
+        return None
+
+    # Initialize the api client
+    client = ApiClient(creds, requests_per_minute=options.requests_per_minute, stats=options.stats)
+    service: Resource = client.service
+    if service is None:
+        logger.error("Failed to initialize the API client")
+        return None
+
+    # Read the benchmark data, which all the sheets are computed from
+    data = ImportData(
+        service=service,
+        spreadsheet_id="",
+        folder=benchmark_data,
+        cache=options.cache,
+        runs=options.runs,
+        workers=options.workers,
+    )
+    raw_data = data.raw_data = data.read()
+
+    # Create a new spreadsheet
+    spreadsheet_id: str | None = options.resume
+    if spreadsheet_id is None:
+        current_date: str = date.today().strftime("%Y-%m-%d")  # noqa: DTZ011
+        title = f"{current_date} | Benchmark Results"
+        with client.stats.stage("setup"):
+            optional_sheets = () if options.metrics_data is None else ("Resources", "Saturation")
+            spreadsheet_id = _create_spreadsheet(service, title, options.categories, raw_data, optional_sheets)
+        if spreadsheet_id is None:
+            logger.error("Error, spreadsheet not created.")
+            return None
+    data.spreadsheet_id = spreadsheet_id
+    data.checkpoint = Checkpoint(options.checkpoint_dir, spreadsheet_id)
+
+    stages = _report_stages(data, raw_data, options.categories, data.checkpoint, options.metrics_data)
+    if not run_stages(stages, options.workers, client.stats):
+        logger.error(f"Error creating the report, resume it with --resume {spreadsheet_id}")
+        return None
+    data.checkpoint.remove()
+
+    # Output spreadsheet URL for ease
+    report_url = f"https://docs.google.com/spreadsheets/d/{spreadsheet_id}"
+    logger.info(f"Report URL: {report_url}")
+
+    return spreadsheet_id
+
+
+def _report_stages(
+    data: ImportData,
+    raw_data: RawData,
+    categories: CategoryIndex,
+    checkpoint: Checkpoint,
+    metrics_data: Path | None = None,
+) -> list[Stage]:
+    """Return the stages filling in the sheets of the report.
+
+    A sheet depends on the sheets its formulas reference. Stages completed by a previous run are skipped,
+    and the sheets of stages it started are reset before they are filled in again.
+    """
+    service, spreadsheet_id = data.service, data.spreadsheet_id
+    result = Result(
+        service=service,
+        spreadsheet_id=spreadsheet_id,
+        raw_data=raw_data,
+        categories=categories,
+    )
+    summary = Summary(service=service, spreadsheet_id=spreadsheet_id, raw_data=raw_data, categories=categories)
+    os_version = OSVersion(service=service, spreadsheet_id=spreadsheet_id, raw_data=raw_data, categories=categories)
+    overall_sheet = OverallSheet(
+        service=service, spreadsheet_id=spreadsheet_id, raw_data=raw_data, categories=categories
+    )
+
+    stages = [
+        # Import data to spreadsheet
+        Stage("raw", data.get),
+        # Create Results sheet
+        Stage("Results", result.get, depends_on=("raw",)),
+        # Create Summary sheet
+        Stage("Summary", summary.get, depends_on=("Results",)),
+        # Create OS version sheets for big5
+        Stage("OS versions", os_version.get, depends_on=("Results",)),
+        # Create Overall sheet for big5
+        Stage("Overall", overall_sheet.get, depends_on=("OS versions",)),
+    ]
+    if metrics_data is not None:
+        resources = Resources(
+            service=service, spreadsheet_id=spreadsheet_id, raw_data=raw_data, metrics_data=metrics_data
+        )
+        # Create Resources sheet, whose service times are read from the raw sheet
+        stages.append(Stage("Resources", resources.get, depends_on=("raw",)))
+        saturation = Saturation(
+            service=service, spreadsheet_id=spreadsheet_id, raw_data=raw_data, metrics_data=metrics_data
+        )
+        # Create Saturation sheet
+        stages.append(Stage("Saturation", saturation.get))
+    stages = [
+        replace(stage, run=_reset_before(service, spreadsheet_id, STAGE_SHEETS[stage.name], stage.run))
+        if stage.name in STAGE_SHEETS and checkpoint.started(stage.name) and not checkpoint.completed(stage.name)
+        else stage
+        for stage in stages
+    ]
+    return [replace(stage, run=checkpoint.wrap(stage.name, stage.run)) for stage in stages]
+
+
+def _reset_before(
+    service: Resource, spreadsheet_id: str, sheets: dict[str, int], run: Callable[[], bool]
+) -> Callable[[], bool]:
+    """Return a function resetting the sheets from their start rows, then running the stage."""
+
+    def reset_and_run() -> bool:
+        for sheet_name, start_row in sheets.items():
+            sheet = get_sheet(sheet_name)
+            if sheet is not None:
+                logger.info(f"Resetting sheet {sheet_name}, partly filled in by a previous run")
+                reset_sheet(service, spreadsheet_id, sheet.sheet_id, start_row)
+        return run()
+
+    return reset_and_run
+
+
+def _create_spreadsheet(
+    service: Resource,
+    title: str,
+    categories: CategoryIndex,
+    raw_data: RawData | None = None,
+    optional_sheets: Collection[str] = (),
+) -> str | None:
+    """Create a new spreadsheet with all the sheets of the report, the Results header and the Categories table."""
+    spreadsheet: dict = (
+        service.spreadsheets()
+        .create(body=spreadsheet_body(title, categories, raw_data, optional_sheets), fields="spreadsheetId")
+        .execute()
+    )
+    return spreadsheet.get("spreadsheetId")
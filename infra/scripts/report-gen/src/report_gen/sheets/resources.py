@@ -0,0 +1,286 @@
+"""Class for creating Resources sheet.
+
+The node stats recorded during each run are attributed to the operations running at the time,
+to compare the resources each engine uses per request, next to its service time.
+"""
+
+import csv
+import logging
+import statistics
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from googleapiclient.discovery import Resource
+
+from report_gen.run_files import NODE_STATS_SUFFIX, OPERATIONS_SUFFIX, RUN_GROUP_FORMAT, RunKey
+
+from .common import adjust_sheet_columns, version_key
+from .format.font import (
+    bold as format_font_bold,
+)
+from .format.number import (
+    format_float as format_number_float,
+)
+from .format.number import (
+    format_integer as format_number_integer,
+)
+from .format.plan import (
+    plan as format_plan,
+)
+from .grid import GridRange
+from .layout import SheetSpec, get_sheet
+from .raw_data import RawData
+
+logger = logging.getLogger(__name__)
+
+RESOURCES_HEADER: list[str] = [
+    "Workload",
+    "Operation",
+    "Engine",
+    "Version",
+    "Runs",
+    "Service time\nMedian 50 (ms)",
+    "CPU s\n/ 1000 ops",
+    "GC ms\n/ 1000 ops",
+    "GC ms\n/ CPU s",
+    "Search rejected\n/ 1000 ops",
+    "Search queue\nMax",
+    "Heap used %\nMax",
+]
+
+
+@dataclass(frozen=True)
+class NodeBucket:
+    """Node stats of a node over a time bucket, as written by dump_metrics_csv_files."""
+
+    start: datetime
+    seconds: int
+    stats: dict[str, float | None]
+
+    @property
+    def end(self) -> datetime:
+        """Return the end of the bucket."""
+        return self.start + timedelta(seconds=self.seconds)
+
+
+@dataclass(frozen=True)
+class ResourceCost:
+    """Resources used by all the nodes while an operation of a run was measured."""
+
+    run_group: datetime
+    engine: str
+    engine_version: str
+    workload: str
+    run: str
+    operation: str
+    # Number of requests measured
+    count: int
+    # CPU time, as a share of the CPUs of each node
+    cpu_seconds: float
+    gc_millis: float
+    search_rejected: float
+    max_search_queue: float | None
+    max_heap_used_percent: float | None
+
+    def run_key(self) -> RunKey:
+        """Return the fields identifying the run of the operation."""
+        return self.run_group, self.engine, self.engine_version, self.workload, self.run
+
+    def per_thousand(self, value: float) -> float:
+        """Return value per 1000 requests of the operation."""
+        return value * 1000 / self.count
+
+
+def _number(value: str) -> float | None:
+    return float(value) if value else None
+
+
+def read_node_buckets(path: Path) -> list[NodeBucket]:
+    """Read the node stats of a run."""
+    with path.open(newline="") as csv_file:
+        return [
+            NodeBucket(
+                start=datetime.fromisoformat(row.pop("timestamp")),
+                seconds=int(row.pop("seconds")),
+                stats={column: _number(value) for column, value in row.items() if column not in ("node", "documents")},
+            )
+            for row in csv.DictReader(csv_file)
+        ]
+
+
+def operation_cost(  # noqa: PLR0913
+    buckets: list[NodeBucket],
+    *,
+    run_group: datetime,
+    engine: str,
+    engine_version: str,
+    workload: str,
+    run: str,
+    operation: str,
+    start: datetime,
+    end: datetime,
+    count: int,
+) -> ResourceCost:
+    """Return the resources used by the nodes between start and end.
+
+    Buckets partially overlapping the window are attributed in proportion to the overlap.
+    Windows are at least a second long, so operations measured once are still attributed resources.
+    """
+    end = max(end, start + timedelta(seconds=1))
+    cpu_seconds = gc_millis = search_rejected = 0.0
+    search_queues: list[float] = []
+    heap_used: list[float] = []
+
+    for bucket in buckets:
+        overlap = (min(end, bucket.end) - max(start, bucket.start)).total_seconds()
+        if overlap <= 0:
+            continue
+        share = overlap / bucket.seconds
+        stats = bucket.stats
+
+        cpu_seconds += (stats["process_cpu_percent"] or 0) / 100 * overlap
+        gc_millis += ((stats["young_gc_millis"] or 0) + (stats["old_gc_millis"] or 0)) * share
+        search_rejected += (stats["search_rejected"] or 0) * share
+        if stats["search_queue"] is not None:
+            search_queues.append(stats["search_queue"])
+        if stats["heap_used_percent"] is not None:
+            heap_used.append(stats["heap_used_percent"])
+
+    return ResourceCost(
+        run_group=run_group,
+        engine=engine,
+        engine_version=engine_version,
+        workload=workload,
+        run=run,
+        operation=operation,
+        count=count,
+        cpu_seconds=cpu_seconds,
+        gc_millis=gc_millis,
+        search_rejected=search_rejected,
+        max_search_queue=max(search_queues, default=None),
+        max_heap_used_percent=max(heap_used, default=None),
+    )
+
+
+def read_resource_costs(folder: Path) -> list[ResourceCost]:
+    """Return the resources used by each operation of the runs downloaded to the folder by download-metrics."""
+    costs: list[ResourceCost] = []
+
+    for operations_path in sorted(folder.glob(f"*{OPERATIONS_SUFFIX}")):
+        node_stats_path = operations_path.with_name(operations_path.name.replace(OPERATIONS_SUFFIX, NODE_STATS_SUFFIX))
+        if not node_stats_path.exists():
+            logger.warning(f"Missing node stats {node_stats_path.name} of {operations_path.name}")
+            continue
+        buckets = read_node_buckets(node_stats_path)
+
+        with operations_path.open(newline="") as csv_file:
+            costs.extend(
+                operation_cost(
+                    buckets,
+                    run_group=datetime.strptime(row["run_group"], RUN_GROUP_FORMAT),  # noqa: DTZ007
+                    engine=row["engine"],
+                    engine_version=row["engine_version"],
+                    workload=row["workload"],
+                    run=row["run"],
+                    operation=row["operation"],
+                    start=datetime.fromisoformat(row["start"]),
+                    end=datetime.fromisoformat(row["end"]),
+                    count=int(row["count"]),
+                )
+                for row in csv.DictReader(csv_file)
+            )
+
+    return costs
+
+
+@dataclass
+class Resources:
+    """Class for creating Resources sheet."""
+
+    service: Resource
+    spreadsheet_id: str
+    raw_data: RawData
+    metrics_data: Path
+    sheet_name: str = "Resources"
+    sheet_id: int | None = None
+    sheet: SheetSpec | None = None
+
+    def rows(self) -> list[list[str | float]]:
+        """Return the rows of the sheet, comparing the median cost of each operation between engine versions.
+
+        Only the runs imported in the raw sheet are included.
+        """
+        costs_by_operation: dict[tuple[str, str, str, str], list[ResourceCost]] = {}
+        for cost in read_resource_costs(self.metrics_data):
+            if cost.run_key() in self.raw_data.runs and cost.count > 0:
+                key = (cost.workload, cost.operation, cost.engine, cost.engine_version)
+                costs_by_operation.setdefault(key, []).append(cost)
+
+        rows: list[list[str | float]] = []
+        # Engines are compared for each operation, OS before ES like in Results
+        for key in sorted(costs_by_operation, key=lambda k: (k[0], k[1], k[2] != "OS", k[2], version_key(k[3]))):
+            workload, operation, engine, version = key
+            costs = costs_by_operation[key]
+            cpu_seconds = statistics.median(cost.per_thousand(cost.cpu_seconds) for cost in costs)
+            gc_millis = statistics.median(cost.per_thousand(cost.gc_millis) for cost in costs)
+            search_queues = [cost.max_search_queue for cost in costs if cost.max_search_queue is not None]
+            heap_used = [cost.max_heap_used_percent for cost in costs if cost.max_heap_used_percent is not None]
+
+            service_time = (
+                f'raw!$C$2:$C="{engine}",raw!$D$2:$D="{version}",raw!$E$2:$E="{workload}",'
+                f'raw!$I$2:$I="{operation}",raw!$J$2:$J="service_time"'
+            )
+            rows.append(
+                [
+                    workload,
+                    operation,
+                    engine,
+                    version,
+                    len(costs),
+                    f'=IFERROR(MEDIAN(FILTER(raw!$K$2:$K, {service_time})), "")',
+                    cpu_seconds,
+                    gc_millis,
+                    gc_millis / cpu_seconds if cpu_seconds else "",
+                    statistics.median(cost.per_thousand(cost.search_rejected) for cost in costs),
+                    max(search_queues) if search_queues else "",
+                    max(heap_used) if heap_used else "",
+                ]
+            )
+
+        return rows
+
+    def format(self) -> None:
+        """Format Resources sheet."""
+        requests: list[dict] = [
+            format_font_bold(GridRange.from_a1("A1:L1", self.sheet_id).to_dict()),
+            format_number_integer(GridRange.from_a1("E2:E", self.sheet_id).to_dict()),
+            format_number_float(GridRange.from_a1("F2:L", self.sheet_id).to_dict()),
+        ]
+
+        body = {"requests": format_plan(requests)}
+        self.service.spreadsheets().batchUpdate(spreadsheetId=self.spreadsheet_id, body=body).execute()
+
+    def get(self) -> bool:
+        """Fill in Resources sheet from the node stats in the metrics data folder."""
+        self.sheet = get_sheet(self.sheet_name)
+        if self.sheet is None:
+            return False
+        self.sheet_id = self.sheet.sheet_id
+
+        rows = self.rows()
+        if not rows:
+            logger.warning(f"No node stats of the imported runs found in {self.metrics_data}")
+
+        self.service.spreadsheets().values().update(
+            spreadsheetId=self.spreadsheet_id,
+            range=f"{self.sheet_name}!A1",
+            valueInputOption="USER_ENTERED",
+            body={"values": [RESOURCES_HEADER, *rows]},
+        ).execute()
+
+        self.format()
+
+        adjust_sheet_columns(self.service, self.spreadsheet_id, self.sheet_id, len(RESOURCES_HEADER))
+
+        return True
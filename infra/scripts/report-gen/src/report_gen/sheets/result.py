@@ -1,17 +1,14 @@
 """Class for creating Result sheet."""
 
 import logging
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from itertools import product
 
 from googleapiclient.discovery import Resource
 
+from .categories import CategoryIndex, get_category_index
 from .common import (
     adjust_sheet_columns,
-    convert_range_to_dict,
-    get_sheet_id,
-    get_workload_operations,
-    get_workloads,
 )
 from .format.color import (
     comparison as format_color_comparison,
@@ -22,15 +19,15 @@ from .format.color import (
 from .format.font import (
     bold as format_font_bold,
 )
-from .format.freeze import (
-    col as format_freeze_col,
-)
-from .format.freeze import (
-    row as format_freeze_row,
-)
 from .format.number import (
     format_float as format_number_float,
 )
+from .format.plan import (
+    plan as format_plan,
+)
+from .grid import GridRange
+from .layout import SheetSpec, get_sheet
+from .raw_data import RawData
 
 logger = logging.getLogger(__name__)
 
@@ -41,9 +38,11 @@ class Result:
 
     service: Resource
     spreadsheet_id: str
+    raw_data: RawData
     sheet_name: str = "Results"
     sheet_id: int | None = None
-    sheet: dict | None = None
+    sheet: SheetSpec | None = None
+    categories: CategoryIndex = field(default_factory=get_category_index)
 
     def format(self) -> None:
         """Format Result sheet."""
@@ -51,39 +50,25 @@ class Result:
         range_dict: dict = {}
 
         # Bold first row
-        range_dict = convert_range_to_dict(f"{self.sheet_name}!A1:V1")
-        range_dict["sheetId"] = self.sheet_id
+        range_dict = GridRange.from_a1("A1:V1", self.sheet_id).to_dict()
         requests.append(format_font_bold(range_dict))
 
-        # Freeze first row
-        r = format_freeze_row(self.sheet_id, 1)
-        if r is not None:
-            requests.append(r)
-
-        # Freeze first four columns
-        r = format_freeze_col(self.sheet_id, 4)
-        if r is not None:
-            requests.append(r)
-
         # Format numbers
         for cells in ["D2:D", "H2:M", "Q2:V"]:
-            range_dict = convert_range_to_dict(f"{self.sheet_name}!{cells}")
-            range_dict["sheetId"] = self.sheet_id
+            range_dict = GridRange.from_a1(cells, self.sheet_id).to_dict()
             requests.append(format_number_float(range_dict))
 
         # Format ES/OS colors
         for cells in ["D2:D"]:
-            range_dict = convert_range_to_dict(f"{self.sheet_name}!{cells}")
-            range_dict["sheetId"] = self.sheet_id
+            range_dict = GridRange.from_a1(cells, self.sheet_id).to_dict()
             requests.extend(format_color_comparison(range_dict))
 
         # Format RSD colors
         for cells in ["L2:M", "U2:V"]:
-            range_dict = convert_range_to_dict(f"{self.sheet_name}!{cells}")
-            range_dict["sheetId"] = self.sheet_id
+            range_dict = GridRange.from_a1(cells, self.sheet_id).to_dict()
             requests.append(format_color_rsd(range_dict))
 
-        body = {"requests": requests}
+        body = {"requests": format_plan(requests)}
         self.service.spreadsheets().batchUpdate(spreadsheetId=self.spreadsheet_id, body=body).execute()
 
     def get_workload_operations(  # noqa: PLR0913
@@ -103,10 +88,10 @@ class Result:
         for op in operations:
             raw_sheet = "raw"
 
-            # Match workload name, non-zeroth run, operation name, and service_time
+            # Match workload name, operation name, and service_time
+            # Warmup runs are already excluded from the raw sheet by the run selection in ImportData
             base = (
                 f"{raw_sheet}!$E$2:$E=$A{index},"
-                f"{raw_sheet}!$H$2:$H<>0,"
                 f"{raw_sheet}!$I$2:$I=$C{index},"
                 f'{raw_sheet}!$J$2:$J="service_time"'
             )
@@ -139,7 +124,7 @@ class Result:
             cell_es_p50_rsd = f"U{index}"  # noqa: F841
             cell_es_p90_rsd = f"V{index}"  # noqa: F841
 
-            category = f"=VLOOKUP(C{index}, FILTER(Categories!$B$2:$C, Categories!$A2:$A = $A{index}), 2, FALSE)"
+            category = self.categories.category(workload, op) or ""
 
             row: list[str] = [
                 workload,  # Workload column
@@ -206,16 +191,8 @@ class Result:
             if workload == "vectorsearch":
                 es_workload_subtype = "lucene-cohere-"
 
-                # Retrieve operation comparison
-                result: dict = (
-                    self.service.spreadsheets()
-                    .values()
-                    .get(spreadsheetId=self.spreadsheet_id, range="raw!F2:F")
-                    .execute()
-                )
-                subtypes_array: list[list[str]] = result.get("values", [])
-                subtypes = sorted(set({x[0] for x in subtypes_array if x}))
-                logger.info(f"Subtypes: {subtypes}")
+                subtypes = self.raw_data.subtypes
+                logger.info(f"Subtypes: {list(subtypes)}")
                 for os_workload_subtype in subtypes:
                     # Get size to compare
                     size: str = ""
@@ -256,12 +233,13 @@ class Result:
     def get(self) -> bool:
         """Process data in raw sheet to fill in Results sheet."""
         # Get sheet ID for Results sheet
-        self.sheet_id, self.sheet = get_sheet_id(self.service, self.spreadsheet_id, self.sheet_name)
-        if self.sheet_id is None:
+        self.sheet = get_sheet(self.sheet_name)
+        if self.sheet is None:
             return False
+        self.sheet_id = self.sheet.sheet_id
 
         # Retrieve workload to process and compare
-        workloads: dict[str, dict[str, list[str]]] = get_workloads(self.service, self.spreadsheet_id)
+        workloads: dict[str, dict[str, list[str]]] = self.raw_data.workloads()
 
         # Offset for keeping track of the number of rows we've filled in
         # We start with 2 because the header row is already filled in
@@ -272,7 +250,7 @@ class Result:
             logger.info(f"Processing {workload}")
 
             # Retrieve operations for this workload
-            operations = get_workload_operations(workload)
+            operations = list(self.categories.operations(workload))
             if len(operations) == 0:
                 logger.error("Error, no operations found for workload")
                 continue
@@ -284,6 +262,6 @@ class Result:
         self.format()
 
         # Adjust columns
-        adjust_sheet_columns(self.service, self.spreadsheet_id, self.sheet_id, self.sheet)
+        adjust_sheet_columns(self.service, self.spreadsheet_id, self.sheet_id, self.sheet.column_count)
 
         return True
@@ -0,0 +1,139 @@
+"""Class for creating Saturation sheet.
+
+Lists the throttled operations of the imported runs with the share of their target throughput
+they achieved, so the operations whose latency is not comparable between engines can be told apart.
+"""
+
+import logging
+import statistics
+from dataclasses import dataclass
+from pathlib import Path
+
+from googleapiclient.discovery import Resource
+
+from report_gen.run_files import DEFAULT_TOLERANCE, OperationThroughput, read_throughput_files
+
+from .common import adjust_sheet_columns, version_key
+from .format.color import (
+    saturation as format_color_saturation,
+)
+from .format.font import (
+    bold as format_font_bold,
+)
+from .format.number import (
+    format_float as format_number_float,
+)
+from .format.number import (
+    format_integer as format_number_integer,
+)
+from .format.plan import (
+    plan as format_plan,
+)
+from .grid import GridRange
+from .layout import SheetSpec, get_sheet
+from .raw_data import RawData
+
+logger = logging.getLogger(__name__)
+
+SATURATION_HEADER: list[str] = [
+    "Workload",
+    "Operation",
+    "Engine",
+    "Version",
+    "Runs",
+    "Target\n(ops/s)",
+    "Throughput\nMedian (ops/s)",
+    "Achieved\n/ Target",
+    "Lowest sample\n/ Target",
+    "Saturated\nruns",
+]
+
+
+@dataclass
+class Saturation:
+    """Class for creating Saturation sheet."""
+
+    service: Resource
+    spreadsheet_id: str
+    raw_data: RawData
+    metrics_data: Path
+    tolerance: float = DEFAULT_TOLERANCE
+    sheet_name: str = "Saturation"
+    sheet_id: int | None = None
+    sheet: SheetSpec | None = None
+
+    def rows(self) -> list[list[str | float]]:
+        """Return the rows of the sheet, with the median throughput of each throttled operation of each engine version.
+
+        Only the runs imported in the raw sheet are included.
+        """
+        by_operation: dict[tuple[str, str, str, str], list[OperationThroughput]] = {}
+        for throughput in read_throughput_files(self.metrics_data):
+            if throughput.run_key() in self.raw_data.runs and throughput.ratio is not None:
+                key = (throughput.workload, throughput.operation, throughput.engine, throughput.engine_version)
+                by_operation.setdefault(key, []).append(throughput)
+
+        rows: list[list[str | float]] = []
+        # Engines are compared for each operation, OS before ES like in Results
+        for key in sorted(by_operation, key=lambda k: (k[0], k[1], k[2] != "OS", k[2], version_key(k[3]))):
+            workload, operation, engine, version = key
+            throughputs = by_operation[key]
+            min_ratios = [throughput.min_ratio for throughput in throughputs if throughput.min_ratio is not None]
+            rows.append(
+                [
+                    workload,
+                    operation,
+                    engine,
+                    version,
+                    len(throughputs),
+                    statistics.median(throughput.target for throughput in throughputs if throughput.target is not None),
+                    statistics.median(
+                        throughput.achieved for throughput in throughputs if throughput.achieved is not None
+                    ),
+                    statistics.median(throughput.ratio for throughput in throughputs if throughput.ratio is not None),
+                    min(min_ratios) if min_ratios else "",
+                    sum(throughput.saturated(self.tolerance) for throughput in throughputs),
+                ]
+            )
+
+        return rows
+
+    def format(self) -> None:
+        """Format Saturation sheet."""
+        requests: list[dict] = [
+            format_font_bold(GridRange.from_a1("A1:J1", self.sheet_id).to_dict()),
+            format_number_integer(GridRange.from_a1("E2:E", self.sheet_id).to_dict()),
+            format_number_float(GridRange.from_a1("F2:I", self.sheet_id).to_dict()),
+            format_color_saturation(GridRange.from_a1("H2:I", self.sheet_id).to_dict(), self.tolerance),
+            format_number_integer(GridRange.from_a1("J2:J", self.sheet_id).to_dict()),
+        ]
+
+        body = {"requests": format_plan(requests)}
+        self.service.spreadsheets().batchUpdate(spreadsheetId=self.spreadsheet_id, body=body).execute()
+
+    def get(self) -> bool:
+        """Fill in Saturation sheet from the throughputs in the metrics data folder."""
+        self.sheet = get_sheet(self.sheet_name)
+        if self.sheet is None:
+            return False
+        self.sheet_id = self.sheet.sheet_id
+
+        rows = self.rows()
+        saturated = sum(1 for row in rows if row[-1])
+        if not rows:
+            logger.warning(f"No throttled operations of the imported runs found in {self.metrics_data}")
+        elif saturated:
+            logger.warning(f"{saturated} operations did not reach their target throughput in some runs")
+
+        self.service.spreadsheets().values().update(
+            spreadsheetId=self.spreadsheet_id,
+            range=f"{self.sheet_name}!A1",
+            valueInputOption="USER_ENTERED",
+            body={"values": [SATURATION_HEADER, *rows]},
+        ).execute()
+
+        self.format()
+
+        adjust_sheet_columns(self.service, self.spreadsheet_id, self.sheet_id, len(SATURATION_HEADER))
+
+        return True
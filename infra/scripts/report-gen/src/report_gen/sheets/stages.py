@@ -0,0 +1,98 @@
+"""Concurrent execution of the stages creating a report."""
+
+import logging
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+
+from .instrumentation import ApiStats
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 4
+
+
+@dataclass(frozen=True)
+class Stage:
+    """A step of the report, run once all the stages it depends on succeeded.
+
+    run returns False on failure.
+    """
+
+    name: str
+    run: Callable[[], bool]
+    depends_on: tuple[str, ...] = ()
+
+
+def check_stages(stages: list[Stage]) -> None:
+    """Check that stage names are unique and that dependencies exist and have no cycle."""
+    names = [stage.name for stage in stages]
+    if len(set(names)) != len(names):
+        msg = f"Duplicate stage names in {names}"
+        raise ValueError(msg)
+
+    for stage in stages:
+        for dependency in stage.depends_on:
+            if dependency not in names:
+                msg = f"Stage {stage.name} depends on unknown stage {dependency}"
+                raise ValueError(msg)
+
+    # Repeatedly remove the stages whose dependencies were all removed
+    remaining = {stage.name: set(stage.depends_on) for stage in stages}
+    while remaining:
+        ready = {name for name, dependencies in remaining.items() if not dependencies}
+        if not ready:
+            msg = f"Dependency cycle between stages {sorted(remaining)}"
+            raise ValueError(msg)
+        remaining = {name: dependencies - ready for name, dependencies in remaining.items() if name not in ready}
+
+
+def _run_stage(stage: Stage, stats: ApiStats) -> bool:
+    logger.info(f"Starting stage {stage.name}")
+    try:
+        with stats.stage(stage.name):
+            return stage.run()
+    except Exception:
+        logger.exception(f"Stage {stage.name} raised an exception")
+        return False
+
+
+def run_stages(stages: list[Stage], workers: int = DEFAULT_WORKERS, stats: ApiStats | None = None) -> bool:
+    """Run the stages in a thread pool, each as soon as its dependencies succeeded.
+
+    Stages depending on a failed stage are skipped. Return True if all the stages succeeded.
+    The API requests sent by each stage are attributed to it in stats.
+    """
+    check_stages(stages)
+    stats = stats or ApiStats()
+
+    pending: list[Stage] = list(stages)
+    succeeded: set[str] = set()
+    failed: set[str] = set()
+    running: dict[Future[bool], Stage] = {}
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="stage") as executor:
+        while pending or running:
+            for stage in list(pending):
+                if any(dependency in failed for dependency in stage.depends_on):
+                    logger.error(f"Skipping stage {stage.name} because a stage it depends on failed")
+                    failed.add(stage.name)
+                    pending.remove(stage)
+                elif all(dependency in succeeded for dependency in stage.depends_on):
+                    running[executor.submit(_run_stage, stage, stats)] = stage
+                    pending.remove(stage)
+
+            if not running:
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                if future.result():
+                    logger.info(f"Stage {stage.name} processed successfully")
+                    succeeded.add(stage.name)
+                else:
+                    logger.error(f"Error in stage {stage.name}")
+                    failed.add(stage.name)
+
+    return not failed
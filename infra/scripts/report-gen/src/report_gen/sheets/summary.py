@@ -1,18 +1,13 @@
 """Class for creating Summary sheet."""
 
 import logging
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 from googleapiclient.discovery import Resource
 
+from .categories import CategoryIndex, get_category_index
 from .common import (
     adjust_sheet_columns,
-    column_add,
-    convert_range_to_dict,
-    get_sheet_id,
-    get_workload_operation_categories,
-    get_workload_operations,
-    get_workloads,
 )
 from .format.color import (
     color as format_color,
@@ -39,6 +34,12 @@ from .format.number import (
 from .format.number import (
     format_integer as format_number_integer,
 )
+from .format.plan import (
+    plan as format_plan,
+)
+from .grid import GridRange, column_add
+from .layout import SheetSpec, get_sheet
+from .raw_data import RawData
 
 logger = logging.getLogger(__name__)
 
@@ -49,9 +50,11 @@ class Summary:
 
     service: Resource
     spreadsheet_id: str
+    raw_data: RawData
     sheet_name: str = "Summary"
     sheet_id: int | None = None
-    sheet: dict | None = None
+    sheet: SheetSpec | None = None
+    categories: CategoryIndex = field(default_factory=get_category_index)
 
     def format_workload(self, ranges: list[str]) -> list[dict]:
         """Format workload rows."""
@@ -66,8 +69,7 @@ class Summary:
         # Format ranges with colors
         requests: list[dict] = []
         for e, range_str in enumerate(ranges):
-            range_dict = convert_range_to_dict(range_str)
-            range_dict["sheetId"] = self.sheet_id
+            range_dict = GridRange.from_a1(range_str, self.sheet_id).to_dict()
             color = colors[e % len(colors)]
             requests.append(format_color(range_dict, color))
         return requests
@@ -76,8 +78,7 @@ class Summary:
         """Format header rows."""
         requests: list[dict] = []
         for range_str in range_list:
-            range_dict = convert_range_to_dict(range_str)
-            range_dict["sheetId"] = self.sheet_id
+            range_dict = GridRange.from_a1(range_str, self.sheet_id).to_dict()
             requests.append(format_font_bold(range_dict))
             requests.append(format_color(range_dict, get_light_blue()))
         return requests
@@ -86,8 +87,7 @@ class Summary:
         """Format header rows."""
         requests: list[dict] = []
         for range_str in range_list:
-            range_dict = convert_range_to_dict(range_str)
-            range_dict["sheetId"] = self.sheet_id
+            range_dict = GridRange.from_a1(range_str, self.sheet_id).to_dict()
             requests.append(format_font_bold(range_dict))
             requests.append(format_merge(range_dict))
             requests.append(format_color(range_dict, get_light_blue()))
@@ -95,7 +95,7 @@ class Summary:
 
     def format(self, requests: list[dict]) -> None:
         """Format summary sheet."""
-        body = {"requests": requests}
+        body = {"requests": format_plan(requests)}
         self.service.spreadsheets().batchUpdate(spreadsheetId=self.spreadsheet_id, body=body).execute()
 
     def create_es_operation_compare_table(
@@ -158,18 +158,16 @@ class Summary:
         rows: list[list[str]] = []
 
         rows.append(["ES Version"] + workload["ES"])
-        operations = get_workload_operations(workload_str)
+        operations = self.categories.operations(workload_str)
         for op in sorted(operations):
             row: list[str] = []
             row.append(op)
 
-            for e, es_version in enumerate(workload["ES"]):
+            for es_version in workload["ES"]:
                 filter_str = (
                     f'Results!$A$2:$A="{workload_str}",Results!$F$2:$F="{os_version}",Results!$O$2:$O="{es_version}"'
                 )
-                row.append(
-                    f"=FILTER(Results!$D2:D, {filter_str}, Results!$C2:C = INDIRECT(ADDRESS(ROW(), COLUMN()-1-{e})))"
-                )
+                row.append(f'=FILTER(Results!$D2:D, {filter_str}, Results!$C2:C = "{op}")')
 
             rows.append(row)
 
@@ -193,8 +191,7 @@ class Summary:
         updated_range = result["updates"]["updatedRange"]
 
         # Add formula
-        range_dict = convert_range_to_dict(updated_range)
-        range_dict["sheetId"] = self.sheet_id
+        range_dict = GridRange.from_a1(updated_range, self.sheet_id).to_dict()
         requests.extend(format_color_comparison(range_dict))
 
         return rows_added, requests
@@ -367,18 +364,16 @@ class Summary:
         rows: list[list[str]] = []
 
         rows.append(["ES Version"] + workload["ES"])
-        categories = get_workload_operation_categories(workload_str)
+        categories = self.categories.categories(workload_str)
         for category in sorted(categories):
             row: list[str] = []
             row.append(category)
 
-            for e, es_version in enumerate(workload["ES"]):
+            for es_version in workload["ES"]:
                 count_str = (
                     f'Results!$A$2:$A,"{workload_str}",Results!$F$2:$F,"{os_version}",Results!$O$2:$O,"{es_version}"'
                 )
-                row.append(
-                    f'=COUNTIFS({count_str}, Results!$B$2:$B,INDIRECT(ADDRESS(ROW(),COLUMN()-1-{e})), Results!$D$2:$D,">1")'  # noqa: E501
-                )
+                row.append(f'=COUNTIFS({count_str}, Results!$B$2:$B,"{category}", Results!$D$2:$D,">1")')
 
             rows.append(row)
 
@@ -527,13 +522,12 @@ class Summary:
         updated_range = result["updates"]["updatedRange"]
 
         # Format numbers in table
-        range_dict = convert_range_to_dict(updated_range)
-        range_dict["sheetId"] = self.sheet_id
+        range_dict = GridRange.from_a1(updated_range, self.sheet_id).to_dict()
         requests.append(format_number_float(range_dict))
 
         return rows_added, requests
 
-    def create_all_categories_table(  # noqa: PLR0915
+    def create_all_categories_table(
         self, workloads: dict[str, dict[str, list[str]]], offset: int
     ) -> tuple[int, list[dict]]:
         """Create a table summarizing all categories."""
@@ -554,7 +548,7 @@ class Summary:
             # NOTE: Because ES does not support noaa-semantic-search, we skip this
             if workload == "noaa_semantic_search":
                 continue
-            categories = get_workload_operation_categories(workload)
+            categories = self.categories.categories(workload)
             all_categories.update(categories)
 
         count_str = f'Results!$F$2:$F,"{os_version}",Results!$O$2:$O,"{es_version}"'
@@ -604,25 +598,26 @@ class Summary:
         # Format header
         requests = self.format_headers_merge([updated_range])
 
-        # Add data
-        offset_tmp = offset + 1  # Save offset for percentage calculation
+        # Add data, written at a known row so the formulas can reference their cells directly
+        first_row = offset + 1
+        last_row = offset + len(all_categories)
         rows: list[list[str]] = []
         rows.append(["Category", "Count", "Total", "Percentage (%)"])
-        for category in sorted(all_categories):
+        for row_number, category in enumerate(sorted(all_categories), start=first_row):
             row: list[str] = []
             row.append(category)
-            row.append(
-                f'=COUNTIFS({count_str}, Results!$B$2:$B,INDIRECT(ADDRESS(ROW(),COLUMN()-1)), Results!$D$2:$D,">1")'
-            )
-            row.append(f"=COUNTIFS({count_str}, Results!$B$2:$B,INDIRECT(ADDRESS(ROW(),COLUMN()-2)))")
+            row.append(f'=COUNTIFS({count_str}, Results!$B$2:$B,"{category}", Results!$D$2:$D,">1")')
+            row.append(f'=COUNTIFS({count_str}, Results!$B$2:$B,"{category}")')
+            row.append(f"=B{row_number} * 100 / C{row_number}")
             rows.append(row)
 
-        size = len(all_categories)
+        total_row = last_row + 1
         rows.append(
             [
                 "Total",
-                f'=SUM(INDIRECT( ADDRESS(ROW()-{size},COLUMN())&":"&ADDRESS(ROW()-1,COLUMN()) ))',
-                f'=SUM(INDIRECT( ADDRESS(ROW()-{size},COLUMN())&":"&ADDRESS(ROW()-1,COLUMN()) ))',
+                f"=SUM(B{first_row}:B{last_row})",
+                f"=SUM(C{first_row}:C{last_row})",
+                f"=B{total_row} * 100 / C{total_row}",
             ]
         )
 
@@ -631,73 +626,36 @@ class Summary:
             "majorDimension": "ROWS",
             "values": rows,
         }
-        result = (
-            self.service.spreadsheets()
-            .values()
-            .append(
-                spreadsheetId=self.spreadsheet_id,
-                range=f"{self.sheet_name}!$A{offset}",
-                valueInputOption="USER_ENTERED",
-                body=request_properties,
-            )
-            .execute()
-        )
-        offset += result["updates"]["updatedRows"]
-        rows_added += result["updates"]["updatedRows"]
-        updated_range = result["updates"]["updatedRange"]
+        self.service.spreadsheets().values().update(
+            spreadsheetId=self.spreadsheet_id,
+            range=f"{self.sheet_name}!$A{offset}",
+            valueInputOption="USER_ENTERED",
+            body=request_properties,
+        ).execute()
+        offset += len(rows)
+        rows_added += len(rows)
 
         # Format numbers in table
-        range_dict = convert_range_to_dict(updated_range)
-        range_dict["sheetId"] = self.sheet_id
+        range_dict = GridRange(self.sheet_id, first_row - 1, total_row, 0, 3).to_dict()
         requests.append(format_number_integer(range_dict))
 
-        # Add data
-        rows: list[list[str]] = []
-        for _ in all_categories:
-            row = []
-            row.append("=INDIRECT(ADDRESS(ROW(),COLUMN()-2)) * 100 / INDIRECT(ADDRESS(ROW(),COLUMN()-1))")
-            rows.append(row)
-
-        rows.append(
-            [
-                "=INDIRECT(ADDRESS(ROW(),COLUMN()-2)) * 100 / INDIRECT(ADDRESS(ROW(),COLUMN()-1))",
-            ]
-        )
-
-        # Update table to Summary sheet
-        request_properties: dict = {
-            "majorDimension": "ROWS",
-            "values": rows,
-        }
-        result = (
-            self.service.spreadsheets()
-            .values()
-            .append(
-                spreadsheetId=self.spreadsheet_id,
-                range=f"{self.sheet_name}!$D{offset_tmp}",
-                valueInputOption="USER_ENTERED",
-                body=request_properties,
-            )
-            .execute()
-        )
-        updated_range = result["updates"]["updatedRange"]
-
-        # Format numbers in table
-        range_dict = convert_range_to_dict(updated_range)
-        range_dict["sheetId"] = self.sheet_id
+        range_dict = GridRange(self.sheet_id, first_row - 1, total_row, 3, 4).to_dict()
         requests.append(format_number_float(range_dict))
 
         return rows_added, requests
 
     def create_summary_table(
-        self, workload: str, os_version: str, es_version: str
+        self, workload: str, os_version: str, es_version: str, column: str, offset: int
     ) -> tuple[list[list[str]], list[int]]:
-        """Create a summary table for a workload and OS vs. ES engine version."""
+        """Create a summary table for a workload and OS vs. ES engine version.
+
+        The table is written with its top left cell at column and row offset, which its formulas reference.
+        """
         rows: list[list[str]] = []
         header_rows: list[int] = []
         header_row_count = 0
 
-        number_of_operations = len(get_workload_operations(workload))
+        number_of_operations = len(self.categories.operations(workload))
 
         filter_str = f'Results!$A$2:$A="{workload}",Results!$F$2:$F="{os_version}",Results!$O$2:$O="{es_version}"'
         count_str = f'Results!$A$2:$A,"{workload}",Results!$F$2:$F,"{os_version}",Results!$O$2:$O,"{es_version}"'
@@ -719,23 +677,26 @@ class Summary:
         rows.append(["", f"Categories: OS v{os_version} is Faster", ""])
         rows.append(["Category", "Count", "Total"])
 
-        categories = get_workload_operation_categories(workload)
+        categories = self.categories.categories(workload)
+        count_column = column_add(column, 1)
+        total_column = column_add(column, 2)
 
+        # The categories spill down from the first row, and are counted in the next columns of the same rows
+        first_row = offset + len(rows)
         row = [f'=SORT(UNIQUE(FILTER(Results!$B$2:$B,Results!$A$2:$A="{workload}")))']
         for _ in categories:
-            row.append(
-                f'=COUNTIFS({count_str}, Results!$B$2:$B,INDIRECT(ADDRESS(ROW(),COLUMN()-1)), Results!$D$2:$D,">1")'
-            )
-            row.append(f"=COUNTIFS({count_str}, Results!$B$2:$B,INDIRECT(ADDRESS(ROW(),COLUMN()-2)))")
+            category_cell = f"${column}{offset + len(rows)}"
+            row.append(f'=COUNTIFS({count_str}, Results!$B$2:$B,{category_cell}, Results!$D$2:$D,">1")')
+            row.append(f"=COUNTIFS({count_str}, Results!$B$2:$B,{category_cell})")
             rows.append(row)
             row = [""]
+        last_row = offset + len(rows) - 1
         rows.append([""])
-        size = len(categories) + 1
         rows.append(
             [
                 "Total",
-                f'=SUM(INDIRECT( ADDRESS(ROW()-{size},COLUMN())&":"&ADDRESS(ROW()-2,COLUMN()) ))',
-                f'=SUM(INDIRECT( ADDRESS(ROW()-{size},COLUMN())&":"&ADDRESS(ROW()-2,COLUMN()) ))',
+                f"=SUM({count_column}{first_row}:{count_column}{last_row})",
+                f"=SUM({total_column}{first_row}:{total_column}{last_row})",
             ]
         )
         rows.append([""])
@@ -797,7 +758,7 @@ class Summary:
         cell = "I"
         for es_version in engines["ES"]:
             # Retrieve operation comparison
-            col, header_rows = self.create_summary_table(workload, os_version, es_version)
+            col, header_rows = self.create_summary_table(workload, os_version, es_version, cell, offset)
 
             # Keep track of where headers are
             for h in header_rows:
@@ -916,12 +877,13 @@ class Summary:
     def get(self) -> bool:
         """Process data in Results sheet to fill in Summary sheet."""
         # Get sheet ID for Results sheet
-        self.sheet_id, self.sheet = get_sheet_id(self.service, self.spreadsheet_id, self.sheet_name)
-        if self.sheet_id is None:
+        self.sheet = get_sheet(self.sheet_name)
+        if self.sheet is None:
             return False
+        self.sheet_id = self.sheet.sheet_id
 
         # Retrieve workload to process and compare
-        workloads: dict[str, dict[str, list[str]]] = get_workloads(self.service, self.spreadsheet_id)
+        workloads: dict[str, dict[str, list[str]]] = self.raw_data.workloads()
 
         # Offset for keeping track of the number of rows we've filled in
         # We start with 1 because there is no header row for this sheet
@@ -965,6 +927,6 @@ class Summary:
         self.format(requests)
 
         # Adjust columns
-        adjust_sheet_columns(self.service, self.spreadsheet_id, self.sheet_id, self.sheet)
+        adjust_sheet_columns(self.service, self.spreadsheet_id, self.sheet_id, self.sheet.column_count)
 
         return True
@@ -0,0 +1,156 @@
+"""Mergeable sketch of a latency distribution, to compute percentiles of the samples of many runs.
+
+Samples are counted in buckets whose bounds grow geometrically, like DDSketch, so any percentile
+is estimated within a relative error, using a bounded amount of memory. Sketches of the same
+relative accuracy are merged by adding the counts of their buckets, which gives the same sketch
+as adding all the samples to a single sketch.
+"""
+
+import math
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+
+DEFAULT_RELATIVE_ACCURACY = 0.01
+
+# Maximum number of buckets. With a 1% relative accuracy, 2048 buckets span 17 orders of magnitude.
+DEFAULT_MAX_BUCKETS = 2048
+
+# Samples below this value are counted as zero
+MIN_VALUE = 1e-9
+
+
+@dataclass
+class LatencySketch:
+    """Counts of samples in buckets of geometrically growing size.
+
+    Percentiles are estimated within relative_accuracy of the actual sample. If more than
+    max_buckets buckets are needed, the lowest buckets are collapsed, so the accuracy of
+    the lowest percentiles is lost first and tail percentiles remain accurate.
+    """
+
+    relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY
+    max_buckets: int = DEFAULT_MAX_BUCKETS
+    count: int = 0
+    zero_count: int = 0
+    min: float = math.inf
+    max: float = -math.inf
+    buckets: dict[int, int] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        """Check the relative accuracy and compute the growth of the buckets."""
+        if not 0 < self.relative_accuracy < 1:
+            msg = f"Wrong relative accuracy {self.relative_accuracy}, it must be between 0 and 1"
+            raise ValueError(msg)
+        self._gamma = (1 + self.relative_accuracy) / (1 - self.relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+
+    def _index(self, value: float) -> int:
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _value(self, index: int) -> float:
+        """Return the value of a bucket, within relative_accuracy of all the values in it."""
+        return 2 * self._gamma**index / (self._gamma + 1)
+
+    def add(self, value: float, count: int = 1) -> None:
+        """Add count samples of the given value."""
+        if math.isnan(value):
+            return
+        if value < MIN_VALUE:
+            self.zero_count += count
+        else:
+            index = self._index(value)
+            self.buckets[index] = self.buckets.get(index, 0) + count
+            if len(self.buckets) > self.max_buckets:
+                self._collapse()
+        self.count += count
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def add_array(self, values: np.ndarray) -> None:
+        """Add all the samples of an array, without iterating over them in Python."""
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        positive = values[values >= MIN_VALUE]
+        indices, counts = np.unique(np.ceil(np.log(positive) / self._log_gamma).astype(np.int64), return_counts=True)
+        for index, count in zip(indices.tolist(), counts.tolist(), strict=True):
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+        self.zero_count += len(values) - len(positive)
+        self.count += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+    def _collapse(self) -> None:
+        """Merge the lowest buckets into one, to keep max_buckets buckets."""
+        indices = sorted(self.buckets)
+        excess = len(indices) - self.max_buckets
+        target = indices[excess]
+        self.buckets[target] += sum(self.buckets.pop(index) for index in indices[:excess])
+
+    def merge(self, other: "LatencySketch") -> None:
+        """Add the samples of another sketch of the same relative accuracy."""
+        if other.relative_accuracy != self.relative_accuracy:
+            msg = (
+                f"Cannot merge sketches of relative accuracies {self.relative_accuracy} "
+                f"and {other.relative_accuracy}"
+            )
+            raise ValueError(msg)
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> float:
+        """Return the estimated value below which a q fraction of the samples fall, or NaN without samples."""
+        if not 0 <= q <= 1:
+            msg = f"Wrong quantile {q}, it must be between 0 and 1"
+            raise ValueError(msg)
+        if self.count == 0:
+            return math.nan
+
+        # Rank of the sample, counting from 0
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if rank < seen:
+                return min(max(self._value(index), self.min), self.max)
+        return self.max
+
+    def percentile(self, p: float) -> float:
+        """Return the estimated p-th percentile, like 99.9."""
+        return self.quantile(p / 100)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the sketch as a JSON serializable dictionary."""
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "count": self.count,
+            "zero_count": self.zero_count,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "buckets": sorted(self.buckets.items()),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any], max_buckets: int = DEFAULT_MAX_BUCKETS) -> "LatencySketch":
+        """Create a sketch from a dictionary returned by to_dict."""
+        return cls(
+            relative_accuracy=data["relative_accuracy"],
+            max_buckets=max_buckets,
+            count=data["count"],
+            zero_count=data["zero_count"],
+            min=math.inf if data["min"] is None else data["min"],
+            max=-math.inf if data["max"] is None else data["max"],
+            buckets={int(index): count for index, count in data["buckets"]},
+        )
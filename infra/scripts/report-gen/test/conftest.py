@@ -0,0 +1,12 @@
+from collections.abc import Iterator
+
+import pytest
+
+from .datastore import Datastore
+
+
+@pytest.fixture(scope="module")
+def datastore_port(datastore: Datastore) -> Iterator[int]:
+    """Serve the datastore fixture of the test module, yielding its port."""
+    with datastore.serve() as port:
+        yield port
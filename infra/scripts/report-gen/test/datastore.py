@@ -0,0 +1,496 @@
+"""Local stand-in for the OpenSearch datastore holding the benchmark results.
+
+It implements the subset of the search API used by report-gen over plain HTTP: _count, _search
+with the bool, term, terms, prefix, exists and range queries, scroll, point in time with
+search_after, and composite aggregations.
+"""
+
+import contextlib
+import fnmatch
+import functools
+import gzip
+import json
+import multiprocessing
+import threading
+import uuid
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from report_gen.download import Source
+
+from .generate_results import START
+
+# Length of the date_histogram intervals, in milliseconds
+INTERVALS = {"s": 1000, "m": 60_000, "h": 3_600_000, "d": 86_400_000}
+
+
+def client_arguments(port: int) -> dict[str, Any]:
+    """Return the arguments connecting a datastore client to the datastore served on port."""
+    return {"host": "127.0.0.1", "port": port, "password": "", "use_ssl": False}
+
+
+def filter_arguments(port: int, **overrides: object) -> dict[str, Any]:
+    """Return the arguments of the download functions selecting the scheduled runs of the first 30 days.
+
+    overrides replaces some of them, or adds others like the pagination.
+    """
+    return (
+        client_arguments(port)
+        | {
+            "start_date": START,
+            "end_date": START + timedelta(days=30),
+            "engine_type": None,
+            "distribution_version": None,
+            "sources": [Source.Scheduled],
+        }
+        | overrides
+    )
+
+
+class QueryError(ValueError):
+    """A request the datastore does not support."""
+
+
+@dataclass(frozen=True)
+class Document:
+    index: str
+    id: str
+    source: dict
+
+
+@dataclass
+class _Cursor:
+    documents: list[tuple[Document, list]]
+    size: int
+    position: int = 0
+
+
+@dataclass
+class Datastore:
+    """Documents of some indices, served over HTTP with serve()."""
+
+    indices: dict[str, list[Document]] = field(default_factory=dict)
+    scrolls: dict[str, _Cursor] = field(default_factory=dict)
+    pits: dict[str, list[Document]] = field(default_factory=dict)
+    requests: list[tuple[str, str]] = field(default_factory=list)
+    searches: dict[tuple[str, str], list[tuple[Document, list]]] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+
+    def add(self, index: str, sources: Iterable[dict]) -> None:
+        documents = self.indices.setdefault(index, [])
+        documents.extend(Document(index, f"{index}-{len(documents) + n}", source) for n, source in enumerate(sources))
+
+    @contextlib.contextmanager
+    def serve(self, *, process: bool = False) -> Iterator[int]:
+        """Serve the documents on localhost, yielding the port.
+
+        With process, the server runs in a forked process, so it does not use the CPU and memory of the caller.
+        Its scroll and point in time contexts are then not visible to the caller.
+        """
+        server = _Server(self)
+        if process:
+            child = multiprocessing.get_context("fork").Process(target=server.serve_forever, daemon=True)
+            child.start()
+            server.server_close()
+            try:
+                yield server.server_address[1]
+            finally:
+                child.terminate()
+                child.join()
+            return
+
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            yield server.server_address[1]
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+
+    def handle(self, method: str, path: str, params: dict[str, str], body: dict) -> dict:
+        with self._lock:
+            self.requests.append((method, path))
+
+        parts = [unquote(part) for part in path.strip("/").split("/") if part]
+        index = "*"
+        if parts and not parts[0].startswith("_"):
+            index = parts.pop(0)
+        endpoint = parts
+
+        if not endpoint:
+            return {"version": {"distribution": "opensearch", "number": "2.17.0"}}
+        if endpoint == ["_count"]:
+            return {"count": len(self._search(self._documents(index), body))}
+        if endpoint == ["_search"] and method in ("GET", "POST"):
+            return self._search_request(index, params, body)
+        if endpoint == ["_search", "scroll"]:
+            if method == "DELETE":
+                return self._clear_scroll(body)
+            return self._scroll(params.get("scroll_id") or body["scroll_id"])
+        if endpoint == ["_search", "point_in_time"]:
+            if method == "DELETE":
+                return self._delete_pits(body["pit_id"])
+            pit_id = uuid.uuid4().hex
+            with self._lock:
+                self.pits[pit_id] = self._documents(index)
+            return {"pit_id": pit_id, "creation_time": 0}
+
+        msg = f"Unsupported request {method} {path}"
+        raise QueryError(msg)
+
+    def _documents(self, pattern: str) -> list[Document]:
+        patterns = pattern.split(",")
+        return [
+            document
+            for index, documents in self.indices.items()
+            if any(fnmatch.fnmatchcase(index, p) for p in patterns)
+            for document in documents
+        ]
+
+    def _search(self, documents: list[Document], body: dict, pit_id: str | None = None) -> list[tuple[Document, list]]:
+        query = body.get("query", {"match_all": {}})
+        sort = body.get("sort", [])
+        fields = [_sort_field(spec) for spec in (sort if isinstance(sort, list) else [sort])]
+
+        # The documents of a point in time do not change, so its sorted matches are reused for each page
+        cache_key = (pit_id, json.dumps([query, sort], sort_keys=True)) if pit_id is not None else None
+        with self._lock:
+            keyed = self.searches.get(cache_key) if cache_key is not None else None
+
+        if keyed is None:
+            positions = {id(document): n for n, document in enumerate(documents)}
+            keyed = [
+                (document, [_sort_value(document, name, positions) for name, _ in fields])
+                for document in documents
+                if _matches(document, query)
+            ]
+            if fields:
+
+                def by_sort_values(a: tuple[Document, list], b: tuple[Document, list]) -> int:
+                    return _compare(a[1], b[1], fields)
+
+                keyed.sort(key=functools.cmp_to_key(by_sort_values))
+            if cache_key is not None:
+                with self._lock:
+                    self.searches[cache_key] = keyed
+
+        search_after = body.get("search_after")
+        if search_after is not None:
+            # Binary search of the first document sorted after search_after
+            low, high = 0, len(keyed)
+            while low < high:
+                middle = (low + high) // 2
+                if _compare(keyed[middle][1], search_after, fields) <= 0:
+                    low = middle + 1
+                else:
+                    high = middle
+            keyed = keyed[low:]
+        return keyed
+
+    def _search_request(self, index: str, params: dict[str, str], body: dict) -> dict:
+        pit = body.get("pit")
+        if pit is not None:
+            with self._lock:
+                documents = self.pits.get(pit["id"])
+            if documents is None:
+                msg = f"No point in time {pit['id']}"
+                raise QueryError(msg)
+        else:
+            documents = self._documents(index)
+
+        matches = self._search(documents, body, pit["id"] if pit is not None else None)
+        size = int(params.get("size", body.get("size", 10)))
+        start = int(params.get("from", body.get("from", 0)))
+        response = _hits(matches, start, size, sort="sort" in body)
+
+        aggregations = body.get("aggs", body.get("aggregations"))
+        if aggregations is not None:
+            response["aggregations"] = {
+                name: _aggregate([document for document, _ in matches], spec) for name, spec in aggregations.items()
+            }
+
+        if "scroll" in params:
+            scroll_id = uuid.uuid4().hex
+            with self._lock:
+                self.scrolls[scroll_id] = _Cursor(matches, size, start + size)
+            response["_scroll_id"] = scroll_id
+        if pit is not None:
+            response["pit_id"] = pit["id"]
+        return response
+
+    def _scroll(self, scroll_id: str) -> dict:
+        with self._lock:
+            cursor = self.scrolls.get(scroll_id)
+        if cursor is None:
+            msg = f"No scroll {scroll_id}"
+            raise QueryError(msg)
+
+        response = _hits(cursor.documents, cursor.position, cursor.size, sort=False)
+        cursor.position += cursor.size
+        response["_scroll_id"] = scroll_id
+        return response
+
+    def _clear_scroll(self, body: dict) -> dict:
+        scroll_ids = body["scroll_id"]
+        if not isinstance(scroll_ids, list):
+            scroll_ids = [scroll_ids]
+        with self._lock:
+            freed = [self.scrolls.pop(scroll_id, None) for scroll_id in scroll_ids]
+        return {"succeeded": True, "num_freed": sum(cursor is not None for cursor in freed)}
+
+    def _delete_pits(self, pit_ids: list[str]) -> dict:
+        with self._lock:
+            for pit_id in pit_ids:
+                self.pits.pop(pit_id, None)
+            self.searches = {key: value for key, value in self.searches.items() if key[0] not in pit_ids}
+        return {"pits": [{"pit_id": pit_id, "successful": True} for pit_id in pit_ids]}
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, datastore: Datastore) -> None:
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.datastore = datastore
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: _Server
+
+    def do_GET(self) -> None:  # noqa: N802
+        self._handle("GET")
+
+    def do_POST(self) -> None:  # noqa: N802
+        self._handle("POST")
+
+    def do_DELETE(self) -> None:  # noqa: N802
+        self._handle("DELETE")
+
+    def do_HEAD(self) -> None:  # noqa: N802
+        self._handle("HEAD")
+
+    def log_message(self, *_: object) -> None:
+        pass
+
+    def _handle(self, method: str) -> None:
+        url = urlsplit(self.path)
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+
+        content = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.headers.get("Content-Encoding") == "gzip":
+            content = gzip.decompress(content)
+
+        try:
+            response = self.server.datastore.handle(method, url.path, params, json.loads(content) if content else {})
+            status = 200
+        except (QueryError, KeyError) as e:
+            response = {"error": {"type": "illegal_argument_exception", "reason": str(e)}, "status": 400}
+            status = 400
+
+        data = json.dumps(response).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        if method != "HEAD":
+            self.wfile.write(data)
+
+
+def _hits(matches: list[tuple[Document, list]], start: int, size: int, *, sort: bool) -> dict:
+    hits = []
+    for document, sort_values in matches[start : start + size]:
+        hit: dict[str, Any] = {"_index": document.index, "_id": document.id, "_score": None, "_source": document.source}
+        if sort:
+            hit["sort"] = sort_values
+        hits.append(hit)
+    return {"hits": {"total": {"value": len(matches), "relation": "eq"}, "hits": hits}}
+
+
+def _values(document: Document, name: str) -> list:
+    value: Any = document.source
+    for part in name.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return []
+        value = value[part]
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def _epoch_millis(value: object) -> float:
+    if isinstance(value, int | float):
+        return float(value)
+    date = datetime.fromisoformat(str(value))
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=UTC)
+    return date.timestamp() * 1000
+
+
+def _in_range(value: object, bounds: dict) -> bool:
+    checks: dict[str, Callable[[Any, Any], bool]] = {
+        "gt": lambda a, b: a > b,
+        "gte": lambda a, b: a >= b,
+        "lt": lambda a, b: a < b,
+        "lte": lambda a, b: a <= b,
+    }
+    for name, check in checks.items():
+        if name not in bounds:
+            continue
+        bound = bounds[name]
+        if isinstance(value, int | float) and isinstance(bound, int | float):
+            if not check(value, bound):
+                return False
+        elif not check(_epoch_millis(value), _epoch_millis(bound)):
+            return False
+    return True
+
+
+def _single(query: dict) -> tuple[str, Any]:
+    ((name, value),) = query.items()
+    return name, value
+
+
+def _matches(document: Document, query: dict) -> bool:
+    kind, spec = _single(query)
+
+    if kind == "match_all":
+        return True
+    if kind == "bool":
+        must, filters, should, must_not = (
+            [clauses] if isinstance(clauses, dict) else clauses
+            for clauses in (spec.get(name, []) for name in ("must", "filter", "should", "must_not"))
+        )
+        must = must + filters
+        minimum = int(spec.get("minimum_should_match", 0 if must else 1)) if should else 0
+        return (
+            all(_matches(document, q) for q in must)
+            and not any(_matches(document, q) for q in must_not)
+            and sum(_matches(document, q) for q in should) >= minimum
+        )
+    if kind == "exists":
+        return bool(_values(document, spec["field"]))
+
+    name, value = _single(spec)
+    values = _values(document, name)
+    if kind == "term":
+        expected = value["value"] if isinstance(value, dict) else value
+        return expected in values
+    if kind == "terms":
+        return any(v in values for v in value)
+    if kind == "prefix":
+        prefix = value["value"] if isinstance(value, dict) else value
+        return any(isinstance(v, str) and v.startswith(prefix) for v in values)
+    if kind == "range":
+        return any(_in_range(v, value) for v in values)
+
+    msg = f"Unsupported query {kind}"
+    raise QueryError(msg)
+
+
+def _sort_field(spec: str | dict) -> tuple[str, str]:
+    if isinstance(spec, str):
+        return spec, "asc"
+    name, order = _single(spec)
+    return name, order["order"] if isinstance(order, dict) else order
+
+
+def _sort_value(document: Document, name: str, positions: dict[int, int]) -> object:
+    if name == "_id":
+        return document.id
+    if name in ("_doc", "_shard_doc"):
+        return positions[id(document)]
+    values = _values(document, name)
+    return values[0] if values else None
+
+
+def _compare(a: list, b: list, fields: list[tuple[str, str]]) -> int:
+    for x, y, (_, order) in zip(a, b, fields, strict=True):
+        if x == y:
+            continue
+        # Missing values sort last
+        if x is None or y is None:
+            return 1 if x is None else -1
+        result = -1 if x < y else 1
+        return result if order == "asc" else -result
+    return 0
+
+
+def _bucket_key(document: Document, source: dict) -> object:
+    kind, spec = _single(source)
+    values = _values(document, spec["field"])
+    if not values:
+        return None
+    if kind == "terms":
+        return values[0]
+    if kind == "date_histogram":
+        interval = spec.get("fixed_interval") or spec.get("calendar_interval") or spec["interval"]
+        length = int(interval[:-1] or 1) * INTERVALS[interval[-1]]
+        return int(_epoch_millis(values[0]) // length * length)
+
+    msg = f"Unsupported composite source {kind}"
+    raise QueryError(msg)
+
+
+def _metric(documents: list[Document], spec: dict) -> dict:
+    kind, options = _single(spec)
+    values = [v for document in documents for v in _values(document, options["field"])]
+    numbers = [float(v) for v in values if isinstance(v, int | float)]
+
+    if kind == "value_count":
+        return {"value": len(values)}
+    if kind == "sum":
+        return {"value": sum(numbers)}
+    if kind in ("avg", "min", "max"):
+        if not numbers:
+            return {"value": None}
+        functions: dict[str, Callable[[list[float]], float]] = {
+            "avg": lambda v: sum(v) / len(v),
+            "min": min,
+            "max": max,
+        }
+        return {"value": functions[kind](numbers)}
+
+    msg = f"Unsupported aggregation {kind}"
+    raise QueryError(msg)
+
+
+def _aggregate(documents: list[Document], spec: dict) -> dict:
+    composite = spec.get("composite")
+    if composite is None:
+        return _metric(documents, {k: v for k, v in spec.items() if k not in ("aggs", "aggregations")})
+
+    sources = [_single(source) for source in composite["sources"]]
+    buckets: dict[tuple, list[Document]] = {}
+    for document in documents:
+        key = tuple(_bucket_key(document, source) for _, source in sources)
+        if None not in key:
+            buckets.setdefault(key, []).append(document)
+
+    keys = sorted(buckets)
+    after = composite.get("after")
+    if after is not None:
+        after_key = tuple(after[name] for name, _ in sources)
+        keys = [key for key in keys if key > after_key]
+    keys = keys[: composite.get("size", 10)]
+
+    sub_aggregations = spec.get("aggs", spec.get("aggregations", {}))
+    result_buckets = []
+    for key in keys:
+        bucket: dict[str, Any] = {
+            "key": dict(zip((name for name, _ in sources), key, strict=True)),
+            "doc_count": len(buckets[key]),
+        }
+        for name, sub_spec in sub_aggregations.items():
+            bucket[name] = _aggregate(buckets[key], sub_spec)
+        result_buckets.append(bucket)
+
+    response: dict[str, Any] = {"buckets": result_buckets}
+    if result_buckets:
+        response["after_key"] = result_buckets[-1]["key"]
+    return response
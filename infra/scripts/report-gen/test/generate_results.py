@@ -0,0 +1,201 @@
+"""Generator of synthetic benchmark-results documents, like those stored by OpenSearch Benchmark.
+
+The fields match those described in infra/results_metadata.md and read by report_gen.download.
+"""
+
+import itertools
+import random
+from collections.abc import Iterator, Sequence
+from datetime import UTC, datetime, timedelta
+
+from report_gen.sheets.common import get_category_operation_map
+
+ENGINES: tuple[tuple[str, str], ...] = (("OS", "2.19.1"), ("OS", "3.0.0"), ("ES", "8.15.0"))
+WORKLOADS: tuple[str, ...] = ("big5", "noaa", "nyc_taxis", "pmc")
+
+# Metrics recorded with percentiles for each operation
+PERCENTILE_METRICS: tuple[str, ...] = ("latency", "service_time", "client_processing_time", "processing_time")
+
+# Start of the first run group
+START = datetime(2025, 1, 1, tzinfo=UTC)
+
+WORKLOAD_PARAMS = {
+    "bulk_indexing_clients": "1",
+    "max_num_segments": "10",
+    "number_of_replicas": "0",
+    "target_throughput": "0",
+}
+
+
+def operations(workload: str) -> list[str]:
+    """Return the operations of a workload."""
+    for spec in get_category_operation_map():
+        if spec["workload"] == workload:
+            return sorted({operation for names in spec["categories"].values() for operation in names})
+    return ["default"]
+
+
+def generate_results(  # noqa: PLR0913
+    *,
+    run_groups: int | None = 1,
+    runs: int = 5,
+    engines: Sequence[tuple[str, str]] = ENGINES,
+    workloads: Sequence[str] = WORKLOADS,
+    start: datetime = START,
+    run_type: str = "official",
+    workload_params: dict[str, str] = WORKLOAD_PARAMS,
+    seed: int = 0,
+) -> Iterator[dict]:
+    """Yield the documents of the runs of each engine and workload, for a number of daily run groups.
+
+    With run_groups None, documents are generated indefinitely. Each run records percentiles of
+    PERCENTILE_METRICS and the throughput of each operation of the workload.
+    """
+    rng = random.Random(seed)  # noqa: S311
+    workload_operations = {workload: operations(workload) for workload in workloads}
+    sources = ("scheduled", "manual", None)
+
+    run_group_numbers = itertools.count() if run_groups is None else range(run_groups)
+    for group in run_group_numbers:
+        run_group = start + timedelta(days=group)
+        source = sources[group % len(sources)]
+
+        for (engine, version), workload in itertools.product(engines, workloads):
+            user_tags = {
+                "run-group": run_group.strftime("%Y_%m_%d_%H_%M_%S"),
+                "engine-type": engine,
+                "cluster-version": version,
+                "shard-count": 1,
+                "replica-count": 0,
+                "run-type": run_type,
+                "snapshot-s3-bucket": "benchmark-snapshots",
+                "snapshot-base-path": f"{engine}/{version}/{workload}/1",
+            }
+            if source is not None:
+                user_tags["ci"] = source
+
+            for run in range(runs):
+                timestamp = run_group + timedelta(minutes=10 * run)
+                base = {
+                    "environment": f"gh-nightly-{int(run_group.timestamp())}",
+                    "test-execution-id": f"cluster-{user_tags['run-group']}-{run}",
+                    "test-execution-timestamp": timestamp.strftime("%Y%m%dT%H%M%SZ"),
+                    "benchmark-version": "1.12.0",
+                    "distribution-version": version,
+                    "workload": workload,
+                    "test_procedure": workload,
+                    "workload-params": workload_params,
+                    "user-tags": {**user_tags, "run": run},
+                }
+
+                for operation in workload_operations[workload]:
+                    median = rng.lognormvariate(1, 1)
+                    for name in PERCENTILE_METRICS:
+                        p50 = median * rng.uniform(0.9, 1.1)
+                        yield {
+                            **base,
+                            "operation": operation,
+                            "name": name,
+                            "unit": "ms",
+                            "value": {"50_0": p50, "90_0": p50 * rng.uniform(1.05, 1.5), "100_0": p50 * 2},
+                        }
+
+                    # Throughput has no percentiles, so it is not downloaded
+                    throughput = rng.uniform(1, 100)
+                    yield {
+                        **base,
+                        "operation": operation,
+                        "name": "throughput",
+                        "unit": "ops/s",
+                        "value": {"min": throughput * 0.9, "mean": throughput, "median": throughput, "max": throughput},
+                    }
+
+
+def generate_node_stats(  # noqa: PLR0913
+    *,
+    run_groups: int = 1,
+    runs: int = 2,
+    engines: Sequence[tuple[str, str]] = ENGINES,
+    workloads: Sequence[str] = WORKLOADS,
+    nodes: int = 2,
+    samples: int = 12,
+    start: datetime = START,
+    run_type: str = "official",
+    seed: int = 0,
+) -> Iterator[dict]:
+    """Yield node-stats documents recorded every 10 seconds on each node during the runs.
+
+    Garbage collection counters are cumulative from the start of each run. The first two
+    operations of each workload run one after the other for a minute, each recording a
+    service_time and a throughput sample per second, the first of which are warmup samples.
+    """
+    rng = random.Random(seed)  # noqa: S311
+    sources = ("scheduled", "manual", None)
+
+    for group in range(run_groups):
+        run_group = start + timedelta(days=group)
+        source = sources[group % len(sources)]
+
+        for (engine, version), workload, run in itertools.product(engines, workloads, range(runs)):
+            timestamp = run_group + timedelta(minutes=10 * run)
+            meta = {
+                "tag_run-group": run_group.strftime("%Y_%m_%d_%H_%M_%S"),
+                "tag_engine-type": engine,
+                "tag_run-type": run_type,
+                "tag_run": str(run),
+                "distribution_version": version,
+            }
+            if source is not None:
+                meta["tag_ci"] = source
+            base = {
+                "environment": f"gh-nightly-{int(run_group.timestamp())}",
+                "test-execution-timestamp": timestamp.strftime("%Y%m%dT%H%M%SZ"),
+                "workload": workload,
+            }
+
+            for index, operation in enumerate(operations(workload)[:2]):
+                for second in range(60):
+                    yield {
+                        **base,
+                        "@timestamp": int((timestamp + timedelta(seconds=60 * index + second)).timestamp() * 1000),
+                        "name": "service_time",
+                        "operation": operation,
+                        "sample-type": "warmup" if second == 0 else "normal",
+                        "meta": meta,
+                        "value": rng.lognormvariate(1, 1),
+                    }
+                    yield {
+                        **base,
+                        "@timestamp": int((timestamp + timedelta(seconds=60 * index + second)).timestamp() * 1000),
+                        "name": "throughput",
+                        "operation": operation,
+                        "sample-type": "warmup" if second == 0 else "normal",
+                        "meta": meta,
+                        "unit": "ops/s",
+                        "value": rng.uniform(1, 100),
+                    }
+
+            for node in range(nodes):
+                young_count, young_millis = 0, 0
+                for sample in range(samples):
+                    young_count += rng.randint(0, 3)
+                    young_millis += rng.randint(0, 30)
+                    yield {
+                        **base,
+                        "@timestamp": int((timestamp + timedelta(seconds=10 * sample)).timestamp() * 1000),
+                        "name": "node-stats",
+                        "meta": {**meta, "node_name": f"node-{node}"},
+                        "jvm_mem_heap_used_percent": rng.randint(20, 90),
+                        "jvm_mem_heap_used_in_bytes": rng.randint(2**28, 2**30),
+                        "jvm_gc_collectors_young_collection_count": young_count,
+                        "jvm_gc_collectors_young_collection_time_in_millis": young_millis,
+                        "jvm_gc_collectors_old_collection_count": 0,
+                        "jvm_gc_collectors_old_collection_time_in_millis": 0,
+                        "thread_pool_search_active": rng.randint(0, 8),
+                        "thread_pool_search_queue": rng.randint(0, 4),
+                        "thread_pool_search_rejected": 0,
+                        "thread_pool_write_queue": 0,
+                        "thread_pool_write_rejected": 0,
+                        "process_cpu_percent": rng.randint(0, 100),
+                        "indices_segments_count": rng.randint(10, 50),
+                    }
@@ -0,0 +1,66 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from report_gen.archive import ALIGNMENT, ArchiveWriter, SampleArchive
+
+RUN = {"run_group": "2025_01_01_00_00_00", "engine": "OS", "engine_version": "3.0.0", "workload": "pmc", "run": "1"}
+
+
+def test_round_trip(tmp_path: Path) -> None:
+    writer = ArchiveWriter(RUN)
+    for timestamp in (30, 10, 20):
+        writer.add("service_time", "term", timestamp, timestamp / 10)
+        writer.add("latency", "term", timestamp, timestamp / 5)
+    writer.add("service_time", "match-all", 5, 0.5)
+    path = tmp_path / "run.samples"
+    writer.write(path)
+
+    archive = SampleArchive.open(path)
+
+    assert archive.run == RUN
+    assert len(archive) == 7  # noqa: PLR2004
+    assert sorted(archive.series()) == [("latency", "term"), ("service_time", "match-all"), ("service_time", "term")]
+    timestamps, values = archive.samples("term")
+    assert timestamps.tolist() == [10, 20, 30]
+    assert values.tolist() == [1.0, 2.0, 3.0]
+    assert archive.samples("term", "latency")[1].tolist() == [2.0, 4.0, 6.0]
+    assert archive.samples("missing")[1].size == 0
+
+
+def test_samples_are_memory_mapped(tmp_path: Path) -> None:
+    writer = ArchiveWriter(RUN)
+    for timestamp in range(1000):
+        writer.add("service_time", "term", timestamp, float(timestamp))
+    path = tmp_path / "run.samples"
+    writer.write(path)
+
+    archive = SampleArchive.open(path)
+    timestamps, values = archive.samples("term")
+
+    assert isinstance(archive.measurements, np.memmap)
+    assert isinstance(archive.timestamps, np.memmap)
+    assert np.shares_memory(values, archive.measurements)
+    assert np.shares_memory(timestamps, archive.timestamps)
+    assert archive.measurements.offset % ALIGNMENT == 0
+    assert archive.timestamps.offset % ALIGNMENT == 0
+    assert float(values.sum()) == sum(range(1000))
+
+
+def test_empty_archive(tmp_path: Path) -> None:
+    path = tmp_path / "run.samples"
+    ArchiveWriter(RUN).write(path)
+
+    archive = SampleArchive.open(path)
+
+    assert len(archive) == 0
+    assert list(archive.series()) == []
+
+
+def test_not_an_archive(tmp_path: Path) -> None:
+    path = tmp_path / "run.samples"
+    path.write_bytes(b"not an archive")
+
+    with pytest.raises(ValueError, match="not a samples archive"):
+        SampleArchive.open(path)
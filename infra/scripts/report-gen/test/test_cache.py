@@ -0,0 +1,63 @@
+import os
+from pathlib import Path
+
+from report_gen.cache import ParsedFileCache
+from report_gen.diff import get_metrics, load_metrics
+
+TEST_FILE = Path(__file__).parent / "data" / "test_data" / "2024-10-25T000224Z-OS-2.16.0-big5-big5.csv"
+
+
+def test_cache_hit(tmp_path: Path) -> None:
+    cache = ParsedFileCache(directory=tmp_path / "cache")
+    calls: list[Path] = []
+
+    def parser(path: Path) -> list[str]:
+        calls.append(path)
+        return path.read_text().splitlines()
+
+    first = cache.load(TEST_FILE, "lines", parser)
+    second = cache.load(TEST_FILE, "lines", parser)
+
+    assert first == second
+    assert calls == [TEST_FILE]
+
+    # Different parsers do not share entries
+    cache.load(TEST_FILE, "other", parser)
+    assert len(calls) == 2  # noqa: PLR2004
+
+
+def test_cache_invalidated_on_change(tmp_path: Path) -> None:
+    cache = ParsedFileCache(directory=tmp_path / "cache")
+    data = tmp_path / "data.csv"
+    data.write_text("a\n")
+
+    assert cache.load(data, "text", Path.read_text) == "a\n"
+
+    data.write_text("ab\n")
+    assert cache.load(data, "text", Path.read_text) == "ab\n"
+
+
+def test_cache_eviction(tmp_path: Path) -> None:
+    cache = ParsedFileCache(directory=tmp_path / "cache", max_size=3000)
+    files = []
+    for i in range(3):
+        data = tmp_path / f"data-{i}.csv"
+        data.write_text("x" * 1000)
+        files.append(data)
+        cache.load(data, "text", Path.read_text)
+        # Make sure entries have distinct access times
+        for entry in cache.directory.glob("*.pickle"):
+            os.utime(entry, (entry.stat().st_mtime - 10,) * 2)
+
+    entries = list(cache.directory.glob("*.pickle"))
+    assert len(entries) == 2  # noqa: PLR2004
+    assert not (cache.directory / f"{cache.key(files[0], 'text')}.pickle").exists()
+
+
+def test_cached_metrics(tmp_path: Path) -> None:
+    cache = ParsedFileCache(directory=tmp_path / "cache")
+    expected = get_metrics(TEST_FILE, ["service_time"], ["50", "90"])
+
+    assert load_metrics(TEST_FILE, ["service_time"], ["50", "90"], cache=cache) == expected
+    assert load_metrics(TEST_FILE, ["service_time"], ["50", "90"], cache=cache) == expected
+    assert len(list(cache.directory.glob("*.pickle"))) == 1
@@ -0,0 +1,50 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from report_gen.sheets.categories import CategoryIndex, get_category_index
+from report_gen.sheets.common import get_category_operation_map
+
+
+def test_index_matches_map() -> None:
+    index = get_category_index()
+
+    for spec in get_category_operation_map():
+        workload = spec["workload"]
+        assert index.categories(workload) == tuple(sorted(spec["categories"]))
+        assert index.operations(workload) == tuple(sorted(op for ops in spec["categories"].values() for op in ops))
+        for category, operations in spec["categories"].items():
+            assert index.category_operations(workload)[category] == tuple(operations)
+
+    assert index.category("big5", "term") == "Text Querying"
+    assert index.category("big5", "unknown") is None
+    assert index.operations("unknown") == ()
+
+
+def test_index_is_cached() -> None:
+    assert get_category_index() is get_category_index()
+
+
+def test_index_rows() -> None:
+    index = CategoryIndex([{"workload": "w", "categories": {"b": ["op2"], "a": ["op1", "op3"]}}])
+
+    assert index.rows() == [
+        ["Workload", "Operation", "Category"],
+        ["w", "op2", "b"],
+        ["w", "op1", "a"],
+        ["w", "op3", "a"],
+    ]
+
+
+def test_index_from_file(tmp_path: Path) -> None:
+    path = tmp_path / "categories.json"
+    path.write_text(json.dumps([{"workload": "new", "categories": {"Search": ["match"]}}]))
+
+    index = CategoryIndex.from_file(path)
+    assert index.workloads == ("new",)
+    assert index.category("new", "match") == "Search"
+
+    path.write_text(json.dumps([{"workload": "new", "categories": ["match"]}]))
+    with pytest.raises(TypeError):
+        CategoryIndex.from_file(path)
@@ -0,0 +1,59 @@
+from pathlib import Path
+
+import pretend
+
+from report_gen.sheets.checkpoint import Checkpoint
+from report_gen.sheets.report import STAGE_SHEETS, _reset_before
+
+
+def test_checkpoint_stages(tmp_path: Path) -> None:
+    runs: list[str] = []
+
+    def run() -> bool:
+        runs.append("run")
+        return True
+
+    checkpoint = Checkpoint(tmp_path, "id")
+    assert not checkpoint.started("Results")
+    assert checkpoint.wrap("Results", run)()
+    assert checkpoint.wrap("Summary", lambda: False)() is False
+
+    # A new run skips the completed stage, and knows the failed one was started
+    checkpoint = Checkpoint(tmp_path, "id")
+    assert checkpoint.completed("Results")
+    assert checkpoint.wrap("Results", run)()
+    assert runs == ["run"]
+    assert checkpoint.started("Summary")
+    assert not checkpoint.completed("Summary")
+
+    checkpoint.remove()
+    assert not Checkpoint(tmp_path, "id").completed("Results")
+
+
+def test_checkpoint_unreadable(tmp_path: Path) -> None:
+    (tmp_path / "id.json").write_text("{")
+
+    checkpoint = Checkpoint(tmp_path, "id")
+    assert not checkpoint.completed("Results")
+    checkpoint.add_chunk("key")
+    assert Checkpoint(tmp_path, "id").chunk_uploaded("key")
+
+
+def test_reset_before() -> None:
+    request = pretend.stub(execute=lambda: {"sheets": [{"properties": {"sheetId": 3}, "conditionalFormats": [{}, {}]}]})
+    spreadsheets = pretend.stub(
+        get=pretend.call_recorder(lambda **_: request), batchUpdate=pretend.call_recorder(lambda **_: request)
+    )
+    service = pretend.stub(spreadsheets=lambda: spreadsheets)
+    run = pretend.call_recorder(lambda: True)
+
+    assert _reset_before(service, "id", STAGE_SHEETS["Summary"], run)()
+
+    assert run.calls == [pretend.call()]
+    (update,) = spreadsheets.batchUpdate.calls
+    assert update.kwargs["body"]["requests"] == [
+        {"updateCells": {"range": {"sheetId": 3, "startRowIndex": 0}, "fields": "userEnteredValue"}},
+        {"unmergeCells": {"range": {"sheetId": 3}}},
+        {"deleteConditionalFormatRule": {"sheetId": 3, "index": 1}},
+        {"deleteConditionalFormatRule": {"sheetId": 3, "index": 0}},
+    ]
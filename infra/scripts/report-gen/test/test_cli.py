@@ -0,0 +1,127 @@
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from report_gen._cli import int_parser
+
+TEST_DATA = Path(__file__).parent / "data" / "test_data"
+
+# Packages which must only be imported by the commands which need them
+HEAVY_PACKAGES = {"googleapiclient", "google", "httplib2", "opensearchpy", "numpy"}
+
+
+def imported_packages(code: str, cwd: Path) -> set[str]:
+    """Run code with -X importtime and return the top level packages it imported."""
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=cwd,
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+    )
+
+    # Lines look like: "import time:       self [us] |  cumulative | imported package"
+    packages: set[str] = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        module = line.rsplit("|", 1)[-1].strip()
+        packages.add(module.split(".")[0])
+    return packages
+
+
+def test_cli_import_is_light(tmp_path: Path) -> None:
+    packages = imported_packages("import report_gen._cli", tmp_path)
+
+    assert "report_gen" in packages
+    assert not packages & HEAVY_PACKAGES
+
+
+def test_diff_command_import_is_light(tmp_path: Path) -> None:
+    code = (
+        "import sys\n"
+        "from report_gen._cli import main\n"
+        f"sys.argv = ['report-gen', 'diff', '--no-cache', '--a', {str(TEST_DATA)!r}, '--b', {str(TEST_DATA)!r}]\n"
+        "main()\n"
+    )
+    packages = imported_packages(code, tmp_path)
+
+    assert not packages & HEAVY_PACKAGES
+
+
+def run_cli(*args: str, cwd: Path) -> subprocess.CompletedProcess:
+    argv = ["report-gen", *args]
+    return subprocess.run(  # noqa: S603
+        [sys.executable, "-c", f"import sys\nfrom report_gen._cli import main\nsys.argv = {argv!r}\nmain()\n"],
+        capture_output=True,
+        text=True,
+        check=False,
+        cwd=cwd,
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+    )
+
+
+def run_diff(*args: str, cwd: Path) -> subprocess.CompletedProcess:
+    return run_cli("diff", "--no-cache", "--a", str(TEST_DATA), "--b", str(TEST_DATA), *args, cwd=cwd)
+
+
+def test_diff_command_nothing_compared(tmp_path: Path) -> None:
+    # A mistyped metric compares nothing, which must not pass a gate
+    result = run_diff("--metric", "service-time", "--max-ratio", "1.5", cwd=tmp_path)
+    assert result.returncode == 1
+    assert "No operations were compared" in result.stdout
+
+    # Without a gate, an empty report is only reported
+    assert run_diff("--metric", "service-time", cwd=tmp_path).returncode == 0
+
+
+def test_diff_command_negative_runs(tmp_path: Path) -> None:
+    result = run_diff("--skip-runs", "-1", cwd=tmp_path)
+
+    assert result.returncode == 2  # noqa: PLR2004
+    assert "Must be at least 0" in result.stderr
+
+
+def test_create_command_import_is_light(tmp_path: Path) -> None:
+    # Creating a report needs the Google API client, but not the datastore client
+    code = (
+        "from report_gen.sheets import ReportOptions, create_report\n"
+        "import report_gen.sheets.resources, report_gen.sheets.saturation\n"
+    )
+    packages = imported_packages(code, tmp_path)
+
+    assert "googleapiclient" in packages
+    assert not packages & {"opensearchpy", "numpy"}
+
+
+def test_create_command_failure(tmp_path: Path) -> None:
+    # Scripts resuming reports rely on the exit code
+    result = run_cli(
+        "create", "--benchmark-data", str(TEST_DATA), "--token", str(tmp_path / "token.json"), cwd=tmp_path
+    )
+
+    assert result.returncode == 1
+    assert "is not a file" in result.stdout
+
+
+def test_create_command_no_workers(tmp_path: Path) -> None:
+    result = run_cli(
+        "create", "--benchmark-data", str(TEST_DATA), "--token", "token.json", "--workers", "0", cwd=tmp_path
+    )
+
+    assert result.returncode == 2  # noqa: PLR2004
+    assert "Must be at least 1" in result.stderr
+
+
+def test_int_parser() -> None:
+    parse = int_parser(2)
+
+    assert parse("2") == 2  # noqa: PLR2004
+    for user_input in ("1", "-5", "two"):
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse(user_input)
@@ -0,0 +1,111 @@
+import json
+from pathlib import Path
+
+import pretend
+import pytest
+from google.oauth2.credentials import Credentials
+from googleapiclient.errors import HttpError
+from googleapiclient.http import HttpMockSequence, HttpRequest
+
+from report_gen.sheets import client as client_module
+from report_gen.sheets.client import ApiClient, sheets_discovery_document
+from report_gen.sheets.instrumentation import ApiStats
+from report_gen.sheets.ratelimit import RateLimiter
+
+CREDENTIALS = Credentials(token=None)
+
+
+def make_request(http: HttpMockSequence) -> HttpRequest:
+    return HttpRequest(http, lambda _, content: content, "https://sheets.googleapis.com/", methodId="sheets.test")
+
+
+@pytest.fixture
+def sleep(monkeypatch: pytest.MonkeyPatch) -> pretend.stub:
+    sleep = pretend.call_recorder(lambda _: None)
+    monkeypatch.setattr(client_module.time, "sleep", sleep)
+    return sleep
+
+
+def test_rate_limiter(sleep: pretend.stub) -> None:
+    limiter = RateLimiter(rate=2, burst=3)
+
+    assert [limiter.acquire() for _ in range(3)] == [0, 0, 0]
+    assert limiter.acquire() > 0
+    assert len(sleep.calls) == 1
+    assert sleep.calls[0].args[0] <= 0.5  # noqa: PLR2004
+
+
+def test_retry_too_many_requests(sleep: pretend.stub) -> None:
+    client = ApiClient(credentials=CREDENTIALS, max_retries=2)
+    http = HttpMockSequence([({"status": "429"}, b""), ({"status": "200"}, b"done")])
+
+    assert client.execute(make_request(http), http, 0) == b"done"
+    assert len(sleep.calls) == 1
+
+
+def test_retry_limit(sleep: pretend.stub) -> None:
+    client = ApiClient(credentials=CREDENTIALS, max_retries=1)
+    http = HttpMockSequence([({"status": "429"}, b""), ({"status": "429"}, b"")])
+
+    with pytest.raises(HttpError):
+        client.execute(make_request(http), http, 0)
+    assert len(sleep.calls) == 1
+
+
+def test_no_retry_on_other_errors(sleep: pretend.stub) -> None:
+    client = ApiClient(credentials=CREDENTIALS)
+    http = HttpMockSequence([({"status": "400"}, b"")])
+
+    with pytest.raises(HttpError):
+        client.execute(make_request(http), http, 0)
+    assert not sleep.calls
+
+
+def test_stats(sleep: pretend.stub) -> None:
+    stats = ApiStats()
+    client = ApiClient(credentials=CREDENTIALS, stats=stats)
+    http = HttpMockSequence([({"status": "429"}, b"busy"), ({"status": "200"}, b"done")])
+
+    with stats.stage("Results"):
+        client.execute(make_request(http), http, 0)
+
+    (call,) = stats.calls
+    assert call.stage == "Results"
+    assert call.method == "sheets.test"
+    assert call.retries == 1
+    assert call.status == 200  # noqa: PLR2004
+    assert call.response_bytes == len(b"done")
+    assert call.throttle_wait >= sleep.calls[0].args[0]
+
+    summary = stats.summary().splitlines()
+    assert summary[0].split()[:3] == ["Stage", "Method", "Calls"]
+    assert summary[1].split()[:5] == ["Results", "sheets.test", "1", "0", "1"]
+    assert summary[2].startswith("Total")
+
+    events = stats.trace()["traceEvents"]
+    assert [(event["name"], event["cat"]) for event in events] == [("Results", "stage"), ("sheets.test", "Results")]
+
+
+def test_stats_write_trace(tmp_path: Path) -> None:
+    stats = ApiStats()
+    with stats.stage("setup"):
+        pass
+
+    path = tmp_path / "trace.json"
+    stats.write_trace(path)
+    assert json.loads(path.read_text())["traceEvents"][0]["name"] == "setup"
+
+
+def test_service_from_cached_discovery_document() -> None:
+    client = ApiClient(credentials=CREDENTIALS)
+
+    assert client.service is client.service
+    assert sheets_discovery_document() is sheets_discovery_document()
+    request = client.service.spreadsheets().values().get(spreadsheetId="id", range="raw!A1")
+    assert request.methodId == "sheets.spreadsheets.values.get"
+    assert request.uri.startswith("https://sheets.googleapis.com/v4/spreadsheets/id/values/")
+
+
+def test_requests_per_minute_too_low() -> None:
+    with pytest.raises(ValueError, match="at least 2"):
+        ApiClient(credentials=CREDENTIALS, requests_per_minute=1)
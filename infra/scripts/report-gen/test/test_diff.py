@@ -0,0 +1,125 @@
+import json
+import shutil
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+from report_gen.diff import DiffReport, compare_operations, diff_folders, is_regression, percentile_column
+from report_gen.run_files import OperationThroughput
+from report_gen.saturation import dump_throughput_csv_files
+
+TEST_DATA = Path(__file__).parent / "data" / "test_data"
+
+
+def copy_run_groups(destination: Path, prefix: str) -> Path:
+    destination.mkdir()
+    for file in TEST_DATA.glob(f"{prefix}*.csv"):
+        shutil.copy(file, destination / file.name)
+    return destination
+
+
+@pytest.fixture
+def folders(tmp_path: Path) -> tuple[Path, Path]:
+    return copy_run_groups(tmp_path / "a", "2024-10-25"), copy_run_groups(tmp_path / "b", "2024-10-26")
+
+
+def test_diff_report(folders: tuple[Path, Path]) -> None:
+    report = diff_folders(*folders)
+
+    assert report.operations
+    assert not report.regressions
+    for op in report.operations:
+        assert op.samples_a > 0
+        assert op.samples_b > 0
+        assert op.ratio == pytest.approx(op.median_b / op.median_a)
+        assert op.workload in {"big5", "noaa", "nyc_taxis", "pmc"}
+
+
+def test_diff_regressions(folders: tuple[Path, Path]) -> None:
+    report = diff_folders(*folders, max_ratio=1.0)
+
+    assert report.regressions
+    assert all(op.ratio > 1.0 for op in report.regressions)
+    assert all(op.verdict == "regression" for op in report.regressions)
+
+
+def test_diff_json(folders: tuple[Path, Path]) -> None:
+    report = diff_folders(*folders, max_ratio=1.0)
+    data = json.loads(report.to_json())
+
+    assert data["max_ratio"] == 1.0
+    assert len(data["operations"]) == len(report.operations)
+    assert sum(op["verdict"] == "regression" for op in data["operations"]) == len(report.regressions)
+
+
+def test_diff_zero_median() -> None:
+    data_a = {"zero": [0.0], "both_zero": [0.0], "other": [2.0]}
+    data_b = {"zero": [1.0], "both_zero": [0.0], "other": [1.0]}
+
+    report = DiffReport(folder_a="a", folder_b="b", max_ratio=1.5)
+    report.operations = compare_operations("big5", "service_time", "90", Path("a"), Path("b"), data_a, data_b, 1.5)
+    ratios = {op.operation: op.ratio for op in report.operations}
+
+    assert ratios == {"zero": float("inf"), "both_zero": 1.0, "other": 0.5}
+    assert [op.operation for op in report.regressions] == ["zero"]
+    # Infinity is written as null, which strict JSON parsers accept
+    operations = json.loads(report.to_json(), parse_constant=pytest.fail)["operations"]
+    assert {op["operation"]: op["ratio"] for op in operations} == {"zero": None, "both_zero": 1.0, "other": 0.5}
+
+
+def test_diff_junit(folders: tuple[Path, Path]) -> None:
+    report = diff_folders(*folders, max_ratio=1.0)
+    root = ET.fromstring(report.to_junit())  # noqa: S314
+
+    assert root.tag == "testsuites"
+    assert int(root.get("tests", "0")) == len(report.operations)
+    assert len(root.findall(".//failure")) == len(report.regressions)
+
+
+def test_diff_metrics_and_percentiles(folders: tuple[Path, Path]) -> None:
+    report = diff_folders(*folders, metrics=["latency", "service_time"], percentiles=["50", "90"])
+
+    selections = {(op.metric, op.percentile) for op in report.operations}
+    assert selections == {("latency", "50"), ("latency", "90"), ("service_time", "50"), ("service_time", "90")}
+
+
+def write_throughputs(folder: Path, medians: dict[str, float]) -> Path:
+    folder.mkdir()
+    run_group = datetime(2025, 1, 1)  # noqa: DTZ001
+    dump_throughput_csv_files(
+        [
+            OperationThroughput(run_group, "OS", "3.0.0", "big5", run, "term", None, median, median)
+            for run, median in sorted(medians.items())
+        ],
+        folder,
+    )
+    return folder
+
+
+def test_diff_higher_is_better(tmp_path: Path) -> None:
+    folder_a = write_throughputs(tmp_path / "a", {"0": 1.0, "1": 100.0, "2": 100.0})
+    folder_b = write_throughputs(tmp_path / "b", {"0": 1.0, "1": 50.0, "2": 60.0})
+
+    (op,) = diff_folders(folder_a, folder_b, max_ratio=1.5, metrics=["throughput"]).operations
+    # The warmup run is excluded
+    assert (op.workload, op.operation, op.percentile, op.samples_a, op.samples_b) == ("big5", "term", "50", 2, 2)
+    assert op.ratio == pytest.approx(0.55)
+    assert op.regression
+    assert op.file_a == "2025-01-01T000000Z-OS-3.0.0-big5-throughput.csv"
+
+    # A higher throughput is not a regression
+    (op,) = diff_folders(folder_b, folder_a, max_ratio=1.5, metrics=["throughput"]).operations
+    assert not op.regression
+    # Throughput files are not compared as benchmark results
+    assert not diff_folders(folder_a, folder_b, max_ratio=1.5).operations
+
+    assert is_regression("throughput", 0.5, 1.5)
+    assert not is_regression("throughput", 2.0, 1.5)
+    assert is_regression("service_time", 2.0, 1.5)
+
+
+def test_percentile_column() -> None:
+    assert percentile_column("90") == "value\\.90_0"
+    assert percentile_column("99.9") == "value\\.99_9"
@@ -0,0 +1,113 @@
+import base64
+from datetime import timedelta
+from pathlib import Path
+
+import pytest
+
+from report_gen.download import BenchmarkResult, Pagination, Source, create_client, download, dump_csv_files
+
+from .datastore import Datastore, filter_arguments
+from .generate_results import PERCENTILE_METRICS, START, generate_results
+
+DOCUMENTS = list(generate_results(run_groups=3, runs=2, workloads=("nyc_taxis", "pmc")))
+
+
+@pytest.fixture(scope="module")
+def datastore() -> Datastore:
+    datastore = Datastore()
+    datastore.add("benchmark-results-2025-01", DOCUMENTS)
+    # Only the results indices are searched
+    datastore.add("benchmark-metrics-2025-01", DOCUMENTS)
+    return datastore
+
+
+def expected(sources: set[str | None], engine_type: str | None = None) -> list[tuple]:
+    return sorted(
+        (
+            document["user-tags"]["run-group"],
+            document["user-tags"]["engine-type"],
+            document["distribution-version"],
+            document["workload"],
+            document["user-tags"]["run"],
+            document["operation"],
+            document["name"],
+            document["value"]["50_0"],
+        )
+        for document in DOCUMENTS
+        if document["name"] in PERCENTILE_METRICS
+        and document["user-tags"].get("ci") in sources
+        and engine_type in (None, document["user-tags"]["engine-type"])
+    )
+
+
+def keys(results: list[BenchmarkResult]) -> list[tuple]:
+    return sorted(
+        (
+            result.RunGroup.strftime("%Y_%m_%d_%H_%M_%S"),
+            result.Engine,
+            result.EngineVersion,
+            result.Workload,
+            result.Run,
+            result.Operation,
+            result.MetricName,
+            result.P50,
+        )
+        for result in results
+    )
+
+
+def download_from(port: int, **kwargs: object) -> list[BenchmarkResult]:
+    return download(**filter_arguments(port, **kwargs))
+
+
+def test_download_single_search(datastore: Datastore, datastore_port: int) -> None:
+    datastore.requests.clear()
+
+    results = download_from(datastore_port)
+
+    assert keys(results) == expected({"scheduled"})
+    assert [path for _, path in datastore.requests] == ["/benchmark-results*/_count", "/benchmark-results*/_search"]
+
+
+@pytest.mark.parametrize("pagination", list(Pagination))
+def test_download_pages(datastore: Datastore, datastore_port: int, pagination: Pagination) -> None:
+    datastore.requests.clear()
+
+    results = download_from(
+        datastore_port,
+        sources=[Source.Scheduled, Source.Manual, Source.Other],
+        pagination=pagination,
+        page_size=100,
+    )
+
+    assert keys(results) == expected({"scheduled", "manual", None})
+    assert len(datastore.requests) > len(results) / 100
+    # The scroll or point in time was released
+    assert not datastore.scrolls
+    assert not datastore.pits
+
+
+def test_download_filters(datastore_port: int) -> None:
+    results = download_from(datastore_port, sources=[Source.Manual, Source.Other], engine_type="ES")
+    assert keys(results) == expected({"manual", None}, engine_type="ES")
+
+    assert download_from(datastore_port, start_date=START + timedelta(days=10)) == []
+
+
+def test_dump_csv_files(datastore_port: int, tmp_path: Path) -> None:
+    results = download_from(datastore_port, sources=[Source.Scheduled, Source.Manual, Source.Other])
+
+    dump_csv_files(results, tmp_path)
+
+    files = sorted(path.name for path in tmp_path.glob("*.csv"))
+    assert files[0] == "2025-01-01T000000Z-ES-8.15.0-nyc_taxis--nyc_taxis.csv"
+    # One file per run group, engine version and workload
+    assert len(files) == 3 * 3 * 2
+
+
+@pytest.mark.parametrize(("kwargs", "username"), [({}, "admin"), ({"username": "reader"}, "reader")])
+def test_create_client_username(kwargs: dict[str, str], username: str) -> None:
+    client = create_client("127.0.0.1", 9200, "secret", use_ssl=False, **kwargs)
+
+    credentials = base64.b64encode(f"{username}:secret".encode()).decode()
+    assert client.transport.get_connection().headers["authorization"] == f"Basic {credentials}"
@@ -0,0 +1,69 @@
+import itertools
+import os
+import time
+import tracemalloc
+from collections.abc import Iterator
+from datetime import UTC, datetime
+
+import pytest
+
+from report_gen.download import Pagination, Source, download
+
+from .datastore import Datastore, filter_arguments
+from .generate_results import PERCENTILE_METRICS, generate_results
+
+# Number of documents to generate, e.g. REPORT_GEN_BENCHMARK_DOCUMENTS=1000000
+DOCUMENTS = int(os.environ.get("REPORT_GEN_BENCHMARK_DOCUMENTS", "0"))
+
+pytestmark = pytest.mark.skipif(not DOCUMENTS, reason="set REPORT_GEN_BENCHMARK_DOCUMENTS to benchmark downloads")
+
+
+@pytest.fixture(scope="module")
+def served() -> Iterator[tuple[int, int]]:
+    """Serve the generated documents from another process, yielding its port and the number of results."""
+    datastore = Datastore()
+    documents = itertools.islice(generate_results(run_groups=None), DOCUMENTS)
+    datastore.add("benchmark-results-2025", documents)
+    results = sum(
+        document.source["name"] in PERCENTILE_METRICS for document in datastore.indices["benchmark-results-2025"]
+    )
+
+    with datastore.serve(process=True) as port:
+        # The forked server has its own copy of the documents
+        datastore.indices.clear()
+        yield port, results
+
+
+def download_all(port: int, pagination: Pagination) -> int:
+    results = download(
+        **filter_arguments(
+            port,
+            end_date=datetime(2100, 1, 1, tzinfo=UTC),
+            sources=[Source.Scheduled, Source.Manual, Source.Other],
+            pagination=pagination,
+        )
+    )
+    return len(results)
+
+
+@pytest.mark.parametrize("pagination", list(Pagination))
+def test_download_throughput(served: tuple[int, int], pagination: Pagination) -> None:
+    port, expected = served
+
+    start, cpu_start = time.perf_counter(), time.process_time()
+    assert download_all(port, pagination) == expected
+    duration, cpu = time.perf_counter() - start, time.process_time() - cpu_start
+
+    # Tracing allocations slows the download down, so memory is measured by a second download
+    tracemalloc.start()
+    try:
+        assert download_all(port, pagination) == expected
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    per_100k = 100_000 / expected
+    print(  # noqa: T201
+        f"\n{pagination.value}: {expected} documents in {duration:.1f}s, {expected / duration:.0f} documents/s, "
+        f"per 100k documents: {cpu * per_100k:.2f} CPU s, {peak * per_100k / 2**20:.0f} MiB peak"
+    )
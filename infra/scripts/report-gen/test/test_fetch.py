@@ -0,0 +1,80 @@
+import json
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from report_gen.download import Pagination
+from report_gen.fetch import dump_run_group, fetch_run_group, validate_run_group
+
+from .datastore import Datastore, client_arguments
+from .generate_results import generate_results, operations
+
+RUN_GROUP = "2025_01_02_00_00_00"
+
+RESULTS = list(generate_results(run_groups=2, runs=3, engines=(("OS", "3.0.0"),), workloads=("pmc",)))
+
+
+def generate_test_executions() -> Iterator[dict]:
+    for run_group in ("2025_01_01_00_00_00", RUN_GROUP):
+        for run in range(3):
+            yield {
+                "test-execution-id": f"cluster-{run_group}-{run}",
+                "user-tags": {"run-group": run_group, "run": str(run)},
+                "results": {"op_metrics": [{"task": "default", "throughput": {"median": run}}]},
+            }
+
+
+@pytest.fixture(scope="module")
+def datastore() -> Datastore:
+    datastore = Datastore()
+    datastore.add("benchmark-test-executions-2025-01", generate_test_executions())
+    datastore.add("benchmark-results-2025-01", RESULTS)
+    return datastore
+
+
+def test_validate_run_group() -> None:
+    assert validate_run_group(RUN_GROUP) == RUN_GROUP
+    with pytest.raises(ValueError, match="Wrong run group"):
+        validate_run_group("2025-01-02")
+
+
+@pytest.mark.parametrize("pagination", [Pagination.Scroll, Pagination.PointInTime])
+def test_fetch_run_group(datastore_port: int, pagination: Pagination) -> None:
+    executions, results = fetch_run_group(
+        RUN_GROUP, **client_arguments(datastore_port), pagination=pagination, page_size=7
+    )
+
+    assert sorted(executions) == ["0", "1", "2"]
+    assert executions["1"]["test-execution-id"] == f"cluster-{RUN_GROUP}-1"
+    assert sorted(results) == ["0", "1", "2"]
+    # Every metric of every operation of the run is fetched, across pages
+    documents_per_run = len(operations("pmc")) * 5
+    assert all(len(documents) == documents_per_run for documents in results.values())
+    assert all(
+        document["user-tags"]["run-group"] == RUN_GROUP for documents in results.values() for document in documents
+    )
+
+
+def test_fetch_missing_run_group(datastore_port: int) -> None:
+    assert fetch_run_group("2024_01_01_00_00_00", **client_arguments(datastore_port)) == ({}, {})
+
+
+def test_dump_run_group(datastore_port: int, tmp_path: Path) -> None:
+    executions, results = fetch_run_group(RUN_GROUP, **client_arguments(datastore_port))
+    # A run whose test execution was not stored
+    results["3"] = results["2"]
+
+    assert dump_run_group(executions, results, tmp_path) == 4  # noqa: PLR2004
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "res-0-results.json",
+        "res-0.json",
+        "res-1-results.json",
+        "res-1.json",
+        "res-2-results.json",
+        "res-2.json",
+        "res-3-results.json",
+    ]
+    assert json.loads((tmp_path / "res-2.json").read_text()) == executions["2"]
+    assert json.loads((tmp_path / "res-0-results.json").read_text()) == results["0"]
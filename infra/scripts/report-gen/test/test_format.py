@@ -0,0 +1,54 @@
+from report_gen.sheets.format.color import color, comparison, get_light_blue, get_light_gray, relative_difference, rsd
+from report_gen.sheets.format.font import bold
+from report_gen.sheets.format.plan import plan
+
+
+def grid_range(sheet_id: int, column: int) -> dict:
+    return {"sheetId": sheet_id, "startRowIndex": 1, "startColumnIndex": column, "endColumnIndex": column + 1}
+
+
+def rules(requests: list[dict]) -> list[dict]:
+    return [request["addConditionalFormatRule"] for request in requests if "addConditionalFormatRule" in request]
+
+
+def test_plan_merges_rule_ranges() -> None:
+    first, second = grid_range(0, 3), grid_range(0, 7)
+    requests = comparison(first) + comparison(second) + comparison(first)
+
+    planned = rules(plan(requests))
+
+    assert [rule["index"] for rule in planned] == [0, 1, 2, 3]
+    assert all(rule["rule"]["ranges"] == [first, second] for rule in planned)
+    assert [rule["rule"]["booleanRule"] for rule in planned] == [
+        rule["rule"]["booleanRule"] for rule in rules(comparison(first))
+    ]
+
+
+def test_plan_keeps_rule_order() -> None:
+    first, second = grid_range(0, 3), grid_range(0, 7)
+    requests = relative_difference(first) + relative_difference(second)
+
+    planned = rules(plan(requests))
+
+    assert [rule["rule"]["booleanRule"] for rule in planned] == [
+        rule["rule"]["booleanRule"] for rule in rules(relative_difference(first))
+    ]
+    assert all(rule["rule"]["ranges"] == [first, second] for rule in planned)
+
+
+def test_plan_does_not_merge_across_sheets() -> None:
+    requests = [rsd(grid_range(0, 3)), rsd(grid_range(1, 3)), rsd(grid_range(0, 4))]
+
+    planned = rules(plan(requests))
+
+    assert [rule["rule"]["ranges"] for rule in planned] == [[grid_range(0, 3), grid_range(0, 4)], [grid_range(1, 3)]]
+
+
+def test_plan_removes_duplicates() -> None:
+    header = grid_range(0, 0)
+    blue = color(header, get_light_blue())
+    gray = color(header, get_light_gray())
+    requests = [bold(header), blue, gray, blue, bold(header)]
+
+    # The last of the duplicates is kept, so the header stays blue
+    assert plan(requests) == [gray, blue, bold(header)]
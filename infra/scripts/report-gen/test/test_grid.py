@@ -0,0 +1,46 @@
+import pytest
+
+from report_gen.sheets.grid import GridRange, column_add, column_index, column_letter
+
+
+def test_column_letters() -> None:
+    for index, letters in [(0, "A"), (25, "Z"), (26, "AA"), (51, "AZ"), (52, "BA"), (701, "ZZ"), (702, "AAA")]:
+        assert column_letter(index) == letters
+        assert column_index(letters) == index
+
+    with pytest.raises(ValueError, match="Invalid column"):
+        column_index("A1")
+
+
+def test_column_add() -> None:
+    assert column_add("I", 4) == "M"
+    assert column_add("Z", 1) == "AA"
+    assert column_add("AZ", 1) == "BA"
+    assert column_add("ZZ", 1) == "AAA"
+
+
+def test_from_a1() -> None:
+    assert GridRange.from_a1("Sheet1!A5:D5").to_dict() == {
+        "startRowIndex": 4,
+        "endRowIndex": 5,
+        "startColumnIndex": 0,
+        "endColumnIndex": 4,
+    }
+    assert GridRange.from_a1("'OS 3.0.0'!$B$3:AB20", 2) == GridRange(2, 2, 20, 1, 28)
+    assert GridRange.from_a1("D2:D", 4).to_dict() == {
+        "sheetId": 4,
+        "startRowIndex": 1,
+        "startColumnIndex": 3,
+        "endColumnIndex": 4,
+    }
+    assert GridRange.from_a1("C7") == GridRange.cells(6, 2)
+
+    with pytest.raises(ValueError, match="Invalid A1 range"):
+        GridRange.from_a1("A1:B2:C3")
+
+
+def test_a1() -> None:
+    for a1 in ["A5:D5", "B3:AB20", "D2:D", "C7", "A:B"]:
+        assert GridRange.from_a1(a1).a1() == a1
+
+    assert GridRange.cells(1, 26, rows=2, columns=3).a1("Summary") == "Summary!AA2:AC3"
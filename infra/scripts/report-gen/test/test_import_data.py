@@ -0,0 +1,82 @@
+import json
+from pathlib import Path
+
+import pretend
+
+from report_gen.sheets.checkpoint import Checkpoint
+from report_gen.sheets.import_data import ImportData, chunk_rows, to_number
+
+TEST_DATA = Path(__file__).parent / "data" / "test_data"
+
+
+def fake_service() -> pretend.stub:
+    request = pretend.stub(execute=dict)
+    values = pretend.stub(update=pretend.call_recorder(lambda **_: request))
+    return pretend.stub(spreadsheets=lambda: pretend.stub(values=lambda: values))
+
+
+def uploaded_rows(service: pretend.stub) -> list[list]:
+    calls = sorted(service.spreadsheets().values().update.calls, key=lambda call: int(call.kwargs["range"][5:]))
+    return [row for call in calls for row in call.kwargs["body"]["values"]]
+
+
+def test_to_number() -> None:
+    assert to_number("1") == 1
+    assert to_number("0.5") == 0.5  # noqa: PLR2004
+    assert to_number("") == ""
+    assert to_number("nan") == "nan"
+    assert to_number("(null)") == "(null)"
+
+
+def test_chunk_rows() -> None:
+    rows = [["a" * 10] for _ in range(10)]
+    chunks = chunk_rows(rows, 50)
+
+    assert len(chunks) > 1
+    assert all(len(json.dumps(chunk)) <= 50 for _, chunk in chunks)  # noqa: PLR2004
+    assert [start for start, _ in chunks] == [
+        1 + sum(len(chunk) for _, chunk in chunks[:i]) for i in range(len(chunks))
+    ]
+    assert [row for _, chunk in chunks for row in chunk] == rows
+
+
+def test_upload_in_chunks() -> None:
+    service = fake_service()
+    data = ImportData(service=service, spreadsheet_id="id", folder=TEST_DATA, chunk_bytes=100_000)
+
+    assert data.get()
+    assert data.raw_data is not None
+    calls = service.spreadsheets().values().update.calls
+    assert len(calls) > 1
+    assert all(call.kwargs["valueInputOption"] == "RAW" for call in calls)
+
+    rows = uploaded_rows(service)
+    assert rows == data.typed_values(data.raw_data)
+    value_column = data.raw_data.columns.index("value\\.90_0")
+    assert all(isinstance(row[value_column], float) for row in rows[1:])
+
+
+def test_upload_resume(tmp_path: Path) -> None:
+    service = fake_service()
+    data = ImportData(
+        service=service,
+        spreadsheet_id="id",
+        folder=TEST_DATA,
+        chunk_bytes=100_000,
+        checkpoint=Checkpoint(tmp_path, "id"),
+    )
+    assert data.get()
+    uploaded = len(service.spreadsheets().values().update.calls)
+
+    # A new run with the same checkpoint has nothing left to upload
+    service = fake_service()
+    data = ImportData(
+        service=service,
+        spreadsheet_id="id",
+        folder=TEST_DATA,
+        chunk_bytes=100_000,
+        checkpoint=Checkpoint(tmp_path, "id"),
+    )
+    assert data.get()
+    assert uploaded > 1
+    assert not service.spreadsheets().values().update.calls
@@ -0,0 +1,63 @@
+import pretend
+
+from report_gen.sheets.categories import get_category_index
+from report_gen.sheets.layout import SHEETS, get_sheet, spreadsheet_body
+from report_gen.sheets.report import _create_spreadsheet
+
+
+def cell_values(sheet: dict) -> list[list[str]]:
+    return [
+        [value["userEnteredValue"]["stringValue"] for value in row["values"]] for row in sheet["data"][0]["rowData"]
+    ]
+
+
+def test_sheet_ids_are_unique() -> None:
+    assert len({sheet.sheet_id for sheet in SHEETS}) == len(SHEETS)
+    assert len({sheet.title for sheet in SHEETS}) == len(SHEETS)
+
+
+def test_get_sheet() -> None:
+    results = get_sheet("Results")
+
+    assert results is not None
+    assert results.frozen_row_count == 1
+    assert results.frozen_column_count == 4  # noqa: PLR2004
+    assert get_sheet("missing") is None
+
+
+def test_spreadsheet_body() -> None:
+    categories = get_category_index()
+    body = spreadsheet_body("title", categories)
+    sheets = {sheet["properties"]["title"]: sheet for sheet in body["sheets"]}
+
+    assert body["properties"]["title"] == "title"
+    assert [sheet["properties"]["sheetId"] for sheet in body["sheets"]] == [
+        sheet.sheet_id for sheet in SHEETS if not sheet.optional
+    ]
+    assert cell_values(sheets["Results"])[0][:3] == ["Workload", "Category", "Operation"]
+    assert cell_values(sheets["Categories"]) == categories.rows()
+    assert len(sheets["Categories"]["data"][0]["columnMetadata"]) == len(categories.rows()[0])
+    assert sheets["Categories"]["properties"]["gridProperties"]["rowCount"] >= len(categories.rows())
+    assert "data" not in sheets["raw"]
+
+
+def test_spreadsheet_body_optional_sheets() -> None:
+    body = spreadsheet_body("title", get_category_index(), optional_sheets=("Resources", "Saturation"))
+    titles = [sheet["properties"]["title"] for sheet in body["sheets"]]
+
+    assert titles == [sheet.title for sheet in SHEETS]
+    assert titles.index("Resources") == titles.index("Results") + 1
+    assert titles.index("Saturation") == titles.index("Resources") + 1
+
+    body = spreadsheet_body("title", get_category_index(), optional_sheets=("Resources",))
+    assert "Saturation" not in [sheet["properties"]["title"] for sheet in body["sheets"]]
+
+
+def test_create_spreadsheet_single_request() -> None:
+    request = pretend.stub(execute=pretend.call_recorder(lambda: {"spreadsheetId": "id"}))
+    spreadsheets = pretend.stub(create=pretend.call_recorder(lambda **_: request))
+    service = pretend.stub(spreadsheets=lambda: spreadsheets)
+
+    assert _create_spreadsheet(service, "title", get_category_index()) == "id"
+    assert len(spreadsheets.create.calls) == 1
+    assert len(request.execute.calls) == 1
@@ -0,0 +1,132 @@
+import csv
+from datetime import timedelta
+from pathlib import Path
+
+import pytest
+
+from report_gen.download import Source
+from report_gen.metrics import (
+    NodeStatsSample,
+    download_metrics,
+    download_operation_windows,
+    dump_metrics_csv_files,
+    dump_operation_csv_files,
+)
+
+from .datastore import Datastore, filter_arguments
+from .generate_results import START, generate_node_stats, generate_results, operations
+
+DOCUMENTS = list(generate_node_stats(run_groups=3, workloads=("nyc_taxis", "pmc")))
+
+
+@pytest.fixture(scope="module")
+def datastore() -> Datastore:
+    datastore = Datastore()
+    datastore.add("benchmark-metrics-2025-01", DOCUMENTS)
+    # Only node-stats documents are aggregated
+    datastore.add("benchmark-metrics-2025-01", generate_results(runs=2, workloads=("pmc",)))
+    return datastore
+
+
+def node_documents(sample: NodeStatsSample) -> list[dict]:
+    return [
+        document
+        for document in DOCUMENTS
+        if document["name"] == "node-stats"
+        and document["meta"]["tag_run-group"] == sample.run_group.strftime("%Y_%m_%d_%H_%M_%S")
+        and document["meta"]["tag_engine-type"] == sample.engine
+        and document["meta"]["distribution_version"] == sample.engine_version
+        and document["workload"] == sample.workload
+        and document["meta"]["tag_run"] == sample.run
+        and document["meta"]["node_name"] == sample.node
+    ]
+
+
+def download_from(port: int, **kwargs: object) -> list[NodeStatsSample]:
+    return list(download_metrics(**filter_arguments(port, **kwargs)))
+
+
+def test_download_metrics_buckets(datastore_port: int) -> None:
+    samples = download_from(datastore_port)
+
+    # 3 engines, 2 workloads, 2 runs, 2 nodes, 12 samples every 10s in 4 buckets of 30s
+    assert len(samples) == 3 * 2 * 2 * 2 * 4
+    assert {sample.documents for sample in samples} == {3}
+    assert samples == sorted(samples, key=lambda sample: (*sample.run_key(), sample.node, sample.timestamp))
+
+    first = samples[0]
+    documents = node_documents(first)[:3]
+    assert first.stats["heap_used_percent"] == max(d["jvm_mem_heap_used_percent"] for d in documents)
+    assert first.stats["process_cpu_percent"] == pytest.approx(
+        sum(d["process_cpu_percent"] for d in documents) / len(documents)
+    )
+
+
+def test_download_metrics_filters(datastore_port: int) -> None:
+    samples = download_from(datastore_port, sources=[Source.Manual, Source.Other], engine_type="ES", interval="1m")
+
+    assert {sample.run_group.day for sample in samples} == {2, 3}
+    assert {sample.engine for sample in samples} == {"ES"}
+    assert {sample.documents for sample in samples} == {6}
+
+    assert download_from(datastore_port, start_date=START + timedelta(days=10)) == []
+
+    with pytest.raises(ValueError, match="interval"):
+        download_from(datastore_port, interval="30 seconds")
+
+
+def test_download_metrics_pages(datastore: Datastore, datastore_port: int, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("report_gen.metrics.PAGE_SIZE", 10)
+    datastore.requests.clear()
+
+    samples = download_from(datastore_port)
+
+    assert len(samples) == 96  # noqa: PLR2004
+    assert len(datastore.requests) == 10  # noqa: PLR2004
+    assert all(path == "/benchmark-metrics*/_search" for _, path in datastore.requests)
+
+
+def test_dump_metrics_csv_files(datastore_port: int, tmp_path: Path) -> None:
+    samples = download_from(datastore_port)
+
+    assert dump_metrics_csv_files(samples, tmp_path) == 3 * 2 * 2
+
+    path = tmp_path / "2025-01-01T000000Z-ES-8.15.0-nyc_taxis-0-node-stats.csv"
+    with path.open() as f:
+        rows = list(csv.DictReader(f))
+
+    assert [row["node"] for row in rows] == ["node-0"] * 4 + ["node-1"] * 4
+    # Cumulative counters are written as the increase over each bucket
+    young_gc = [row["young_gc_count"] for row in rows]
+    assert young_gc[0] == young_gc[4] == ""
+    assert all(int(count) >= 0 for count in young_gc[1:4] + young_gc[5:])
+    documents = node_documents(samples[0])
+    assert samples[0].node == "node-0"
+    assert sum(int(count) for count in young_gc[1:4]) == (
+        documents[-1]["jvm_gc_collectors_young_collection_count"]
+        - documents[2]["jvm_gc_collectors_young_collection_count"]
+    )
+
+
+def test_download_operation_windows(datastore_port: int, tmp_path: Path) -> None:
+    windows = list(
+        download_operation_windows(**filter_arguments(datastore_port, engine_type="OS", distribution_version="3.0.0"))
+    )
+
+    assert [(window.workload, window.run, window.operation) for window in windows] == [
+        (workload, run, operation)
+        for workload in ("nyc_taxis", "pmc")
+        for run in ("0", "1")
+        for operation in sorted(operations(workload)[:2])
+    ]
+    # Warmup samples are excluded
+    assert {window.count for window in windows} == {59}
+    first = min(windows, key=lambda window: (window.workload, window.run, window.start))
+    assert first.start == START + timedelta(seconds=1)
+    assert first.end == START + timedelta(seconds=59)
+
+    assert dump_operation_csv_files(windows, tmp_path) == 4  # noqa: PLR2004
+    with (tmp_path / "2025-01-01T000000Z-OS-3.0.0-pmc-1-operations.csv").open() as f:
+        rows = list(csv.DictReader(f))
+    assert [row["operation"] for row in rows] == sorted(operations("pmc")[:2])
+    assert rows[0]["count"] == "59"
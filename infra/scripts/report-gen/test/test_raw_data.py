@@ -0,0 +1,81 @@
+from datetime import datetime
+from pathlib import Path
+
+from packaging.version import Version
+
+from report_gen.sheets.import_data import ImportData
+from report_gen.sheets.raw_data import RawData
+
+TEST_DATA = Path(__file__).parent / "data" / "test_data"
+
+
+def read_test_data() -> RawData:
+    return ImportData(service=None, spreadsheet_id="", folder=TEST_DATA).read()
+
+
+def test_raw_data_values() -> None:
+    values = [["a", "b"], ["1", "2"], ["3", "4"]]
+    raw_data = RawData.from_values(values)
+
+    assert raw_data.values() == values
+    assert raw_data.column("b") == ("2", "4")
+    assert RawData.from_values([]).values() == [[]]
+
+
+def test_raw_data_workloads() -> None:
+    raw_data = read_test_data()
+    workloads = raw_data.workloads()
+
+    triples = set(
+        zip(
+            raw_data.column("workload"),
+            raw_data.column("user-tags\\.engine-type"),
+            raw_data.column("distribution-version"),
+            strict=True,
+        )
+    )
+    assert triples == {
+        (workload, engine, version)
+        for workload, engines in workloads.items()
+        for engine, versions in engines.items()
+        for version in versions
+    }
+    for engines in workloads.values():
+        for versions in engines.values():
+            assert versions == sorted(versions, key=Version)
+
+    # Callers get their own copy
+    workloads.clear()
+    assert raw_data.workloads()
+
+
+def test_raw_data_empty() -> None:
+    raw_data = RawData.from_values([])
+
+    assert raw_data.column("workload") == ()
+    assert raw_data.workloads() == {}
+    assert raw_data.subtypes == ()
+
+
+def test_raw_data_runs() -> None:
+    raw_data = RawData.from_values(
+        [
+            ["user-tags\\.run-group", "user-tags\\.engine-type", "distribution-version", "workload", "user-tags\\.run"],
+            ["2025-01-01 00:00:00", "OS", "3.0.0", "big5", "1"],
+            ["2025_01_02_00_00_00", "OS", "3.0.0", "big5", "1"],
+        ]
+    )
+
+    assert raw_data.runs == {
+        (datetime(2025, 1, 1), "OS", "3.0.0", "big5", "1"),  # noqa: DTZ001
+        (datetime(2025, 1, 2), "OS", "3.0.0", "big5", "1"),  # noqa: DTZ001
+    }
+    assert read_test_data().runs
+    assert RawData.from_values([]).runs == frozenset()
+
+
+def test_raw_data_subtypes() -> None:
+    raw_data = read_test_data()
+
+    assert raw_data.subtypes == tuple(sorted({s for s in raw_data.column("workload_subtype") if s}))
+    assert "" not in raw_data.subtypes
@@ -0,0 +1,130 @@
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+import pretend
+import pytest
+
+from report_gen.metrics import (
+    NODE_STATS_COLUMNS,
+    NodeStatsSample,
+    OperationWindow,
+    dump_metrics_csv_files,
+    dump_operation_csv_files,
+)
+from report_gen.sheets.raw_data import RawData
+from report_gen.sheets.resources import RESOURCES_HEADER, NodeBucket, Resources, operation_cost
+
+START = datetime(2025, 1, 1, tzinfo=UTC)
+RUN_GROUP = datetime(2025, 1, 1)  # noqa: DTZ001
+
+RAW_HEADER = ["user-tags\\.run-group", "user-tags\\.engine-type", "distribution-version", "workload", "user-tags\\.run"]
+# Run groups are written to the benchmark data as datetimes
+RAW_RUN_GROUP = str(RUN_GROUP)
+
+
+def stats(cpu: float, young_gc_millis: float | None) -> dict[str, float | None]:
+    return {column: 0.0 for column in NODE_STATS_COLUMNS} | {
+        "process_cpu_percent": cpu,
+        "young_gc_millis": young_gc_millis,
+        "heap_used_percent": 50.0,
+    }
+
+
+def test_operation_cost_overlapping_buckets() -> None:
+    buckets = [
+        NodeBucket(START, 30, stats(50, 30)),
+        NodeBucket(START + timedelta(seconds=30), 30, stats(100, 60)),
+        NodeBucket(START + timedelta(seconds=60), 30, stats(100, 90)),
+    ]
+
+    cost = operation_cost(
+        buckets,
+        run_group=RUN_GROUP,
+        engine="OS",
+        engine_version="3.0.0",
+        workload="big5",
+        run="1",
+        operation="term",
+        start=START + timedelta(seconds=15),
+        end=START + timedelta(seconds=45),
+        count=100,
+    )
+
+    assert cost.cpu_seconds == pytest.approx(0.5 * 15 + 1.0 * 15)
+    assert cost.gc_millis == pytest.approx(30 / 2 + 60 / 2)
+    assert cost.per_thousand(cost.cpu_seconds) == pytest.approx(225)
+    assert cost.max_heap_used_percent == 50  # noqa: PLR2004
+
+
+def write_run(  # noqa: PLR0913
+    folder: Path, engine: str, version: str, run: str, cpu: float, run_group: datetime = RUN_GROUP
+) -> None:
+    samples = [
+        NodeStatsSample(run_group, engine, version, "big5", run, node, START + timedelta(seconds=s), 30, 3, node_stats)
+        for node in ("node-0", "node-1")
+        for s, node_stats in ((0, stats(cpu, 0)), (30, stats(cpu, 100)))
+    ]
+    dump_metrics_csv_files(samples, folder)
+    window = OperationWindow(
+        run_group, engine, version, "big5", run, "term", START, START + timedelta(seconds=60), count=1000
+    )
+    dump_operation_csv_files([window], folder)
+
+
+def test_resources_rows(tmp_path: Path) -> None:
+    write_run(tmp_path, "ES", "8.15.0", "1", cpu=20)
+    write_run(tmp_path, "OS", "3.0.0", "1", cpu=10)
+    write_run(tmp_path, "OS", "3.0.0", "2", cpu=30)
+    # Warmup runs are not imported
+    write_run(tmp_path, "OS", "3.0.0", "0", cpu=100)
+    raw_data = RawData.from_values(
+        [
+            RAW_HEADER,
+            [RAW_RUN_GROUP, "OS", "3.0.0", "big5", "1"],
+            [RAW_RUN_GROUP, "OS", "3.0.0", "big5", "2"],
+            [RAW_RUN_GROUP, "ES", "8.15.0", "big5", "1"],
+        ]
+    )
+
+    rows = Resources(service=None, spreadsheet_id="id", raw_data=raw_data, metrics_data=tmp_path).rows()
+
+    assert [row[:5] for row in rows] == [["big5", "term", "OS", "3.0.0", 2], ["big5", "term", "ES", "8.15.0", 1]]
+    assert all(len(row) == len(RESOURCES_HEADER) for row in rows)
+    # 2 nodes at 20% of their CPUs for 60s, over 1000 requests
+    assert rows[0][6] == pytest.approx(2 * 0.2 * 60)
+    # Only the second bucket of each node has a GC delta
+    assert rows[0][7] == pytest.approx(2 * 100)
+    assert 'raw!$C$2:$C="OS",raw!$D$2:$D="3.0.0"' in str(rows[0][5])
+
+
+def test_resources_rows_run_groups(tmp_path: Path) -> None:
+    write_run(tmp_path, "OS", "3.0.0", "1", cpu=10)
+    # Another run group downloaded to the same folder, with the same run numbers
+    write_run(tmp_path, "OS", "3.0.0", "1", cpu=90, run_group=RUN_GROUP + timedelta(days=1))
+    raw_data = RawData.from_values([RAW_HEADER, [RAW_RUN_GROUP, "OS", "3.0.0", "big5", "1"]])
+
+    rows = Resources(service=None, spreadsheet_id="id", raw_data=raw_data, metrics_data=tmp_path).rows()
+
+    assert [row[:5] for row in rows] == [["big5", "term", "OS", "3.0.0", 1]]
+    assert rows[0][6] == pytest.approx(2 * 0.1 * 60)
+
+
+def test_resources_get(tmp_path: Path) -> None:
+    write_run(tmp_path, "OS", "3.0.0", "1", cpu=10)
+    raw_data = RawData.from_values(
+        [
+            RAW_HEADER,
+            [RAW_RUN_GROUP, "OS", "3.0.0", "big5", "1"],
+        ]
+    )
+    request = pretend.stub(execute=dict)
+    values = pretend.stub(update=pretend.call_recorder(lambda **_: request))
+    spreadsheets = pretend.stub(values=lambda: values, batchUpdate=pretend.call_recorder(lambda **_: request))
+    service = pretend.stub(spreadsheets=lambda: spreadsheets)
+
+    assert Resources(service=service, spreadsheet_id="id", raw_data=raw_data, metrics_data=tmp_path).get()
+
+    (update,) = values.update.calls
+    assert update.kwargs["range"] == "Resources!A1"
+    assert update.kwargs["body"]["values"][0] == RESOURCES_HEADER
+    assert len(update.kwargs["body"]["values"]) == 2  # noqa: PLR2004
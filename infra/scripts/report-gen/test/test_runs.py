@@ -0,0 +1,62 @@
+import pytest
+
+from report_gen.runs import RunSelection
+
+# Rows of run, operation and value
+ROWS = [
+    ("0", "term", 100.0),
+    ("1", "term", 10.0),
+    ("2", "term", 12.0),
+    ("3", "term", 11.0),
+    ("4", "term", 50.0),
+    ("0", "range", 200.0),
+    ("1", "range", 20.0),
+    ("2", "range", 1.0),
+    ("3", "range", 21.0),
+    ("4", "range", 22.0),
+]
+
+
+def select(runs: RunSelection) -> list[tuple[str, str, float]]:
+    return runs.filter_rows(ROWS, run=lambda row: row[0], series=lambda row: row[1], value=lambda row: row[2])
+
+
+def test_default_skips_warmup() -> None:
+    assert all(row[0] != "0" for row in select(RunSelection()))
+    assert len(select(RunSelection())) == 8  # noqa: PLR2004
+
+
+def test_keep_last() -> None:
+    assert {row[0] for row in select(RunSelection(keep_last=2))} == {"3", "4"}
+    assert select(RunSelection(keep_last=0)) == []
+
+
+def test_skip_more_warmup_runs() -> None:
+    assert {row[0] for row in select(RunSelection(skip_first=2))} == {"3", "4"}
+    assert {row[0] for row in select(RunSelection(warmup_run=None, skip_first=3))} == {"3", "4"}
+    assert len(select(RunSelection(warmup_run=None))) == len(ROWS)
+
+
+def test_warmup_run_by_tag() -> None:
+    # Runs numbered from 1 are all kept, and the warmup run is dropped wherever it sorts
+    assert RunSelection().select(["1", "2", "3"]) == {"1", "2", "3"}
+    assert RunSelection().select(["warmup", "0", "1"]) == {"1", "warmup"}
+    assert RunSelection(warmup_run="warmup").select(["warmup", "0", "1"]) == {"0", "1"}
+
+
+def test_trim() -> None:
+    rows = select(RunSelection(trim=1))
+    assert [(row[0], row[1]) for row in rows] == [("2", "term"), ("3", "term"), ("1", "range"), ("3", "range")]
+
+
+def test_trim_not_enough_runs() -> None:
+    assert len(select(RunSelection(keep_last=2, trim=1))) == 4  # noqa: PLR2004
+
+
+def test_negative_counts() -> None:
+    with pytest.raises(ValueError, match="must not be negative"):
+        RunSelection(skip_first=-1)
+    with pytest.raises(ValueError, match="must not be negative"):
+        RunSelection(keep_last=-1)
+    with pytest.raises(ValueError, match="must not be negative"):
+        RunSelection(trim=-1)
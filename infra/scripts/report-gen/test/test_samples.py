@@ -0,0 +1,101 @@
+import csv
+from pathlib import Path
+
+import pytest
+
+from report_gen.download import Pagination
+from report_gen.runs import RunSelection
+from report_gen.samples import (
+    RunSketches,
+    download_sketches,
+    dump_percentile_csv_files,
+    dump_sketch_files,
+    load_sketch_files,
+    merge_runs,
+    sketches_from_archives,
+)
+from report_gen.sketch import LatencySketch
+
+from .datastore import Datastore, filter_arguments
+from .generate_results import generate_node_stats
+
+DOCUMENTS = list(generate_node_stats(runs=3, engines=(("OS", "3.0.0"), ("ES", "8.15.0")), workloads=("pmc",)))
+
+
+@pytest.fixture(scope="module")
+def datastore() -> Datastore:
+    datastore = Datastore()
+    datastore.add("benchmark-metrics-2025-01", DOCUMENTS)
+    return datastore
+
+
+def download_from(port: int, **kwargs: object) -> RunSketches:
+    return download_sketches(**filter_arguments(port, **kwargs))
+
+
+def samples(engine: str, operation: str, runs: set[str]) -> list[float]:
+    return [
+        document["value"]
+        for document in DOCUMENTS
+        if document["name"] == "service_time"
+        and document["sample-type"] == "normal"
+        and document["meta"]["tag_engine-type"] == engine
+        and document["meta"]["tag_run"] in runs
+        and document["operation"] == operation
+    ]
+
+
+@pytest.mark.parametrize("pagination", list(Pagination))
+def test_download_sketches(datastore_port: int, pagination: Pagination) -> None:
+    sketches = download_from(datastore_port, pagination=pagination, page_size=100)
+
+    assert len(sketches) == 2 * 2
+    for key, runs in sketches.items():
+        assert key.metric == "service_time"
+        assert sorted(runs) == ["0", "1", "2"]
+        assert all(sketch.count == 59 for sketch in runs.values())  # noqa: PLR2004
+
+
+def test_merge_runs(datastore_port: int) -> None:
+    sketches = download_from(datastore_port)
+
+    merged = merge_runs(sketches)
+
+    for key, sketch in merged.items():
+        # The warmup run is excluded
+        expected = LatencySketch()
+        for value in samples(key.engine, key.operation, {"1", "2"}):
+            expected.add(value)
+        assert sketch == expected
+
+    trimmed = merge_runs(sketches, RunSelection(warmup_run=None, trim=1))
+    assert {sketch.count for sketch in trimmed.values()} == {59}
+
+
+def test_dump_and_load_files(datastore_port: int, tmp_path: Path) -> None:
+    sketches = download_from(datastore_port)
+
+    assert dump_sketch_files(sketches, tmp_path) == 2  # noqa: PLR2004
+    assert load_sketch_files(sorted(tmp_path.glob("*-sketches.json"))) == sketches
+
+    assert dump_percentile_csv_files(merge_runs(sketches), tmp_path, [50, 99.9]) == 2  # noqa: PLR2004
+    with (tmp_path / "2025-01-01T000000Z-OS-3.0.0-pmc-percentiles.csv").open() as f:
+        rows = list(csv.DictReader(f))
+    assert list(rows[0]) == ["operation", "name", "count", "p50", "p99.9"]
+    assert [row["count"] for row in rows] == ["118", "118"]
+    assert float(rows[0]["p99.9"]) >= float(rows[0]["p50"])
+
+
+def test_archive_samples(datastore_port: int, tmp_path: Path) -> None:
+    sketches = download_from(datastore_port, archive=tmp_path)
+
+    paths = sorted(tmp_path.glob("*.samples"))
+    assert paths[0].name == "2025-01-01T000000Z-ES-8.15.0-pmc-0.samples"
+    assert len(paths) == 2 * 3
+
+    archived = sketches_from_archives(paths)
+    assert archived.keys() == sketches.keys()
+    for key, runs in archived.items():
+        for run, sketch in runs.items():
+            assert sketch.count == sketches[key][run].count
+            assert sketch.percentile(99) == pytest.approx(sketches[key][run].percentile(99))
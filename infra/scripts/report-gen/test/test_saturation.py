@@ -0,0 +1,187 @@
+import statistics
+from dataclasses import replace
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pretend
+import pytest
+
+from report_gen.run_files import OperationThroughput, read_throughput_files
+from report_gen.saturation import download_throughput, dump_throughput_csv_files, target_throughput
+from report_gen.sheets.raw_data import RawData
+from report_gen.sheets.saturation import SATURATION_HEADER, Saturation
+
+from .datastore import Datastore, filter_arguments
+from .generate_results import WORKLOAD_PARAMS, generate_node_stats, generate_results, operations
+
+RUN_GROUP = datetime(2025, 1, 1)  # noqa: DTZ001
+
+RAW_HEADER = ["user-tags\\.run-group", "user-tags\\.engine-type", "distribution-version", "workload", "user-tags\\.run"]
+RAW_RUN_GROUP = str(RUN_GROUP)
+
+ENGINES = (("OS", "3.0.0"), ("ES", "8.15.0"))
+RESULTS = list(
+    generate_results(
+        runs=2, engines=ENGINES, workloads=("pmc",), workload_params=WORKLOAD_PARAMS | {"target_throughput": "50"}
+    )
+)
+SAMPLES = list(generate_node_stats(runs=2, engines=ENGINES, workloads=("pmc",)))
+
+
+@pytest.fixture(scope="module")
+def datastore() -> Datastore:
+    datastore = Datastore()
+    datastore.add("benchmark-results-2025-01", RESULTS)
+    datastore.add("benchmark-metrics-2025-01", SAMPLES)
+    return datastore
+
+
+def download_from(port: int) -> list[OperationThroughput]:
+    return download_throughput(**filter_arguments(port))
+
+
+def throughput(
+    run: str, target: float | None, median: float | None, samples_min: float | None = None
+) -> OperationThroughput:
+    return OperationThroughput(
+        RUN_GROUP, "OS", "3.0.0", "big5", run, "term", target, median, median, 10, samples_min, median
+    )
+
+
+def test_target_throughput() -> None:
+    assert target_throughput({"target_throughput": "2.5"}) == 2.5  # noqa: PLR2004
+    assert target_throughput({"target_throughput": "0"}) is None
+    assert target_throughput({"target_throughput": "none"}) is None
+    assert target_throughput({}) is None
+
+
+def test_operation_throughput_ratio() -> None:
+    assert throughput("1", 10, 9.8).ratio == pytest.approx(0.98)
+    assert not throughput("1", 10, 9.8).saturated()
+    assert throughput("1", 10, 5).saturated()
+    assert throughput("1", 10, 9.8).saturated(tolerance=0.99)
+    assert throughput("1", 10, 9.8, samples_min=2).min_ratio == pytest.approx(0.2)
+    # Unthrottled operations are never saturated
+    assert throughput("1", None, 5).ratio is None
+    assert not throughput("1", None, 5).saturated()
+    # Without results, the throughput is taken from the samples
+    sampled = OperationThroughput(RUN_GROUP, "OS", "3.0.0", "big5", "1", "term", 10, None, None, 3, 4, 8)
+    assert sampled.ratio == pytest.approx(0.8)
+
+
+def test_download_throughput(datastore_port: int) -> None:
+    throughputs = download_from(datastore_port)
+
+    # 2 engines, 2 runs, each operation of pmc
+    assert len(throughputs) == 2 * 2 * len(operations("pmc"))
+    assert throughputs == sorted(throughputs, key=lambda t: (*t.run_key(), t.operation))
+    assert {t.target for t in throughputs} == {50}
+
+    first = throughputs[0]
+    (result,) = [
+        document
+        for document in RESULTS
+        if document["name"] == "throughput"
+        and document["user-tags"]["engine-type"] == first.engine
+        and str(document["user-tags"]["run"]) == first.run
+        and document["operation"] == first.operation
+    ]
+    assert first.median == pytest.approx(result["value"]["median"])
+
+    # The first two operations recorded throughput samples, excluding the warmup sample
+    samples = [
+        document["value"]
+        for document in SAMPLES
+        if document["name"] == "throughput"
+        and document["sample-type"] == "normal"
+        and document["meta"]["tag_engine-type"] == first.engine
+        and document["meta"]["tag_run"] == first.run
+        and document["operation"] == first.operation
+    ]
+    sampled = [t for t in throughputs if t.samples > 0]
+    assert len(sampled) == 2 * 2 * 2
+    assert first in sampled
+    assert first.samples == len(samples) == 59  # noqa: PLR2004
+    assert first.samples_min == pytest.approx(min(samples))
+    assert first.samples_mean == pytest.approx(statistics.mean(samples))
+
+
+def test_dump_throughput_csv_files(datastore_port: int, tmp_path: Path) -> None:
+    throughputs = download_from(datastore_port)
+
+    assert dump_throughput_csv_files(throughputs, tmp_path) == 2 * 2
+    assert read_throughput_files(tmp_path) == sorted(throughputs, key=lambda t: (t.engine, *t.run_key(), t.operation))
+
+
+def test_saturation_rows(tmp_path: Path) -> None:
+    dump_throughput_csv_files(
+        [throughput("1", 10, 9.9), throughput("2", 10, 6, samples_min=1), throughput("0", 10, 1)], tmp_path
+    )
+    # Unthrottled operations are left out
+    dump_throughput_csv_files(
+        [OperationThroughput(RUN_GROUP, "ES", "8.15.0", "big5", "1", "term", None, 20, 20)], tmp_path
+    )
+    raw_data = RawData.from_values(
+        [
+            RAW_HEADER,
+            [RAW_RUN_GROUP, "OS", "3.0.0", "big5", "1"],
+            [RAW_RUN_GROUP, "OS", "3.0.0", "big5", "2"],
+            [RAW_RUN_GROUP, "ES", "8.15.0", "big5", "1"],
+        ]
+    )
+
+    rows = Saturation(service=None, spreadsheet_id="id", raw_data=raw_data, metrics_data=tmp_path).rows()
+
+    # The warmup run 0 is not imported
+    assert rows == [["big5", "term", "OS", "3.0.0", 2, 10, pytest.approx(7.95), pytest.approx(0.795), 0.1, 1]]
+    assert len(rows[0]) == len(SATURATION_HEADER)
+
+
+def test_saturation_rows_run_groups(tmp_path: Path) -> None:
+    dump_throughput_csv_files([throughput("1", 10, 9.9)], tmp_path)
+    # A saturated run of another run group, with the same run number
+    other = replace(throughput("1", 10, 1), run_group=RUN_GROUP + timedelta(days=1))
+    dump_throughput_csv_files([other], tmp_path)
+    raw_data = RawData.from_values([RAW_HEADER, [RAW_RUN_GROUP, "OS", "3.0.0", "big5", "1"]])
+
+    rows = Saturation(service=None, spreadsheet_id="id", raw_data=raw_data, metrics_data=tmp_path).rows()
+
+    assert rows == [["big5", "term", "OS", "3.0.0", 1, 10, 9.9, pytest.approx(0.99), "", 0]]
+
+
+def test_saturation_rows_zero_throughput(tmp_path: Path) -> None:
+    # An operation which achieved no throughput at all is the most saturated
+    dump_throughput_csv_files([throughput("1", 2, 0)], tmp_path)
+    raw_data = RawData.from_values(
+        [
+            RAW_HEADER,
+            [RAW_RUN_GROUP, "OS", "3.0.0", "big5", "1"],
+        ]
+    )
+
+    rows = Saturation(service=None, spreadsheet_id="id", raw_data=raw_data, metrics_data=tmp_path).rows()
+
+    assert rows == [["big5", "term", "OS", "3.0.0", 1, 2, 0, 0, "", 1]]
+
+
+def test_saturation_get(tmp_path: Path) -> None:
+    dump_throughput_csv_files([throughput("1", 10, 5)], tmp_path)
+    raw_data = RawData.from_values(
+        [
+            RAW_HEADER,
+            [RAW_RUN_GROUP, "OS", "3.0.0", "big5", "1"],
+        ]
+    )
+    request = pretend.stub(execute=dict)
+    values = pretend.stub(update=pretend.call_recorder(lambda **_: request))
+    spreadsheets = pretend.stub(values=lambda: values, batchUpdate=pretend.call_recorder(lambda **_: request))
+    service = pretend.stub(spreadsheets=lambda: spreadsheets)
+
+    assert Saturation(service=service, spreadsheet_id="id", raw_data=raw_data, metrics_data=tmp_path).get()
+
+    (update,) = values.update.calls
+    assert update.kwargs["range"] == "Saturation!A1"
+    assert update.kwargs["body"]["values"][0] == SATURATION_HEADER
+    assert len(update.kwargs["body"]["values"]) == 2  # noqa: PLR2004
+    format_requests = spreadsheets.batchUpdate.calls[0].kwargs["body"]["requests"]
+    assert any("addConditionalFormatRule" in request for request in format_requests)
@@ -0,0 +1,76 @@
+import math
+import random
+
+import pytest
+
+from report_gen.sketch import LatencySketch
+
+
+def exact_percentile(values: list[float], percentile: float) -> float:
+    ordered = sorted(values)
+    return ordered[round(percentile / 100 * (len(ordered) - 1))]
+
+
+@pytest.fixture(scope="module")
+def values() -> list[float]:
+    rng = random.Random(0)  # noqa: S311
+    return [rng.lognormvariate(1, 1.5) for _ in range(20_000)]
+
+
+@pytest.mark.parametrize("percentile", [0, 1, 50, 90, 99, 99.9, 100])
+def test_percentile_relative_accuracy(values: list[float], percentile: float) -> None:
+    sketch = LatencySketch(relative_accuracy=0.01)
+    for value in values:
+        sketch.add(value)
+
+    assert sketch.count == len(values)
+    assert sketch.percentile(percentile) == pytest.approx(exact_percentile(values, percentile), rel=0.01)
+
+
+def test_merge_equals_single_sketch(values: list[float]) -> None:
+    single = LatencySketch()
+    parts = [LatencySketch() for _ in range(4)]
+    for index, value in enumerate(values):
+        single.add(value)
+        parts[index % 4].add(value)
+
+    merged = LatencySketch()
+    for part in parts:
+        merged.merge(part)
+
+    assert merged == single
+
+
+def test_merge_different_accuracy() -> None:
+    with pytest.raises(ValueError, match="relative accuracies"):
+        LatencySketch(relative_accuracy=0.01).merge(LatencySketch(relative_accuracy=0.02))
+
+
+def test_bounded_buckets_keep_tail(values: list[float]) -> None:
+    sketch = LatencySketch(max_buckets=100)
+    for value in values:
+        sketch.add(value)
+
+    assert len(sketch.buckets) == 100  # noqa: PLR2004
+    assert sketch.count == len(values)
+    assert sketch.percentile(99.9) == pytest.approx(exact_percentile(values, 99.9), rel=0.01)
+
+
+def test_zeros_and_empty() -> None:
+    sketch = LatencySketch()
+    assert math.isnan(sketch.percentile(50))
+
+    for value in (0.0, 0.0, 0.0, 10.0):
+        sketch.add(value)
+
+    assert sketch.percentile(50) == 0
+    assert sketch.percentile(100) == 10  # noqa: PLR2004
+
+
+def test_dict_round_trip(values: list[float]) -> None:
+    sketch = LatencySketch()
+    for value in values[:1000]:
+        sketch.add(value)
+
+    assert LatencySketch.from_dict(sketch.to_dict()) == sketch
+    assert LatencySketch.from_dict(LatencySketch().to_dict()) == LatencySketch()
@@ -0,0 +1,72 @@
+import threading
+from collections.abc import Callable
+
+import pytest
+
+from report_gen.sheets.stages import Stage, check_stages, run_stages
+
+
+def test_run_stages_order() -> None:
+    order: list[str] = []
+    lock = threading.Lock()
+
+    def stage(name: str) -> Stage:
+        def run() -> bool:
+            with lock:
+                order.append(name)
+            return True
+
+        return Stage(name, run)
+
+    stages = [
+        Stage("c", stage("c").run, depends_on=("b",)),
+        Stage("b", stage("b").run, depends_on=("a",)),
+        Stage("a", stage("a").run),
+        Stage("d", stage("d").run, depends_on=("a",)),
+    ]
+
+    assert run_stages(stages)
+    assert order.index("a") < order.index("b") < order.index("c")
+    assert order.index("a") < order.index("d")
+
+
+def test_run_stages_concurrently() -> None:
+    barrier = threading.Barrier(2, timeout=5)
+
+    def run() -> bool:
+        barrier.wait()
+        return True
+
+    assert run_stages([Stage("a", run), Stage("b", run)], workers=2)
+
+
+def test_run_stages_failure() -> None:
+    ran: list[str] = []
+
+    def fail() -> bool:
+        raise RuntimeError
+
+    def record(name: str) -> Callable[[], bool]:
+        def run() -> bool:
+            ran.append(name)
+            return True
+
+        return run
+
+    stages = [
+        Stage("a", fail),
+        Stage("b", record("b"), depends_on=("a",)),
+        Stage("c", record("c")),
+    ]
+
+    assert not run_stages(stages)
+    assert ran == ["c"]
+
+
+def test_check_stages() -> None:
+    with pytest.raises(ValueError, match="unknown"):
+        check_stages([Stage("a", lambda: True, depends_on=("b",))])
+    with pytest.raises(ValueError, match="cycle"):
+        check_stages([Stage("a", lambda: True, depends_on=("b",)), Stage("b", lambda: True, depends_on=("a",))])
+    with pytest.raises(ValueError, match="Duplicate"):
+        check_stages([Stage("a", lambda: True), Stage("a", lambda: True)])
@@ -0,0 +1,72 @@
+import re
+from pathlib import Path
+
+import pretend
+
+from report_gen.sheets.import_data import ImportData
+from report_gen.sheets.summary import Summary
+
+TEST_DATA = Path(__file__).parent / "data" / "test_data"
+
+# Functions recalculated on every change of the spreadsheet, rather than when their inputs change
+VOLATILE_FUNCTIONS = ("INDIRECT", "OFFSET", "NOW", "TODAY", "RAND", "RANDBETWEEN")
+VOLATILE = re.compile(rf"\b({'|'.join(VOLATILE_FUNCTIONS)})\s*\(", re.IGNORECASE)
+
+
+def fake_service() -> pretend.stub:
+    def append(range: str, body: dict, **_: object) -> pretend.stub:  # noqa: A002
+        start = int(re.findall(r"\d+", range)[-1])
+        rows = len(body["values"])
+        updates = {"updatedRows": rows, "updatedRange": f"{range}:D{start + rows - 1}"}
+        return pretend.stub(execute=lambda: {"updates": updates})
+
+    request = pretend.stub(execute=dict)
+    values = pretend.stub(
+        append=pretend.call_recorder(append),
+        update=pretend.call_recorder(lambda **_: request),
+    )
+    spreadsheets = pretend.stub(values=lambda: values, batchUpdate=lambda **_: request)
+    return pretend.stub(spreadsheets=lambda: spreadsheets)
+
+
+def written_formulas(service: pretend.stub) -> list[str]:
+    values = service.spreadsheets().values()
+    calls = values.append.calls + values.update.calls
+    return [
+        value
+        for call in calls
+        for row in call.kwargs["body"]["values"]
+        for value in row
+        if isinstance(value, str) and value.startswith("=")
+    ]
+
+
+def test_summary_formulas_are_not_volatile() -> None:
+    raw_data = ImportData(service=None, spreadsheet_id="", folder=TEST_DATA).read()
+    service = fake_service()
+    summary = Summary(service=service, spreadsheet_id="id", raw_data=raw_data)
+
+    assert summary.get()
+    summary.create_es_compare_tables("big5", {"OS": ["2.16.0"], "ES": ["7.10.2", "8.15.0"]}, 100)
+
+    formulas = written_formulas(service)
+    assert formulas
+    assert [formula for formula in formulas if VOLATILE.search(formula)] == []
+
+
+def test_summary_table_references_its_rows() -> None:
+    raw_data = ImportData(service=None, spreadsheet_id="", folder=TEST_DATA).read()
+    summary = Summary(service=fake_service(), spreadsheet_id="id", raw_data=raw_data)
+    categories = summary.categories.categories("pmc")
+
+    rows, _ = summary.create_summary_table("pmc", "2.16.0", "8.15.0", "M", 10)
+
+    # The category counts of each row reference the category spilled in that row
+    first = next(index for index, row in enumerate(rows) if row[0].startswith("=SORT(UNIQUE("))
+    for index in range(first, first + len(categories)):
+        assert f"$M{10 + index}" in rows[index][1]
+        assert f"$M{10 + index}" in rows[index][2]
+
+    total = rows[first + len(categories) + 1]
+    assert total[1] == f"=SUM(N{10 + first}:N{10 + first + len(categories) - 1})"
+    assert total[2] == f"=SUM(O{10 + first}:O{10 + first + len(categories) - 1})"
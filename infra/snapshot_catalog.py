@@ -0,0 +1,200 @@
+"""Catalog of the snapshot versions stored in the snapshot S3 bucket.
+
+Snapshots are stored under <cluster type>/<cluster version>/<workload>/<snapshot version>/, where the
+snapshot version is the time the snapshot was taken, like 2024-09-20_13-56-42. The versions under a prefix
+are listed with paginated ListObjectsV2 requests delimited by "/", so only the version folders are returned,
+not the files of the snapshots.
+
+Listings are cached in a JSON file per bucket for a few minutes, so the many Terraform runs of a benchmark,
+one per workload and version, share them. boto3 is used when it is installed, otherwise the AWS CLI is run
+once per listing. Set AWS_ENDPOINT_URL to list the snapshots of a local S3 stand-in.
+"""
+
+import json
+import os
+import re
+import subprocess
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+VERSION_FORMAT = "%Y-%m-%d_%H-%M-%S"
+VERSION_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2}")
+
+# How long listings are cached, in seconds
+DEFAULT_TTL = int(os.environ.get("SNAPSHOT_CATALOG_TTL", "300"))
+DEFAULT_CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "benchmark-snapshots"
+
+
+class SnapshotCatalogError(Exception):
+    """Raised when the snapshot bucket cannot be listed."""
+
+
+class SnapshotNotFoundError(SnapshotCatalogError):
+    """Raised when a requested snapshot version does not exist."""
+
+
+def new_snapshot_version() -> str:
+    return datetime.now().strftime(VERSION_FORMAT)
+
+
+def is_version_format(version: str) -> bool:
+    return VERSION_PATTERN.fullmatch(version) is not None
+
+
+def snapshot_prefix(cluster_type: str, cluster_version: str, workload: str) -> str:
+    return f"{cluster_type}/{cluster_version}/{workload}/"
+
+
+def _boto3_client() -> Any:
+    try:
+        import boto3
+    except ImportError:
+        return None
+    return boto3.client("s3")
+
+
+class SnapshotCatalog:
+    """Snapshot versions of a bucket, listed on demand and cached for ttl seconds.
+
+    client is an S3 client of boto3. By default a boto3 client is created if boto3 is installed,
+    otherwise the bucket is listed with the AWS CLI. Set cache_dir to None to disable the cache.
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        *,
+        client: Any = None,
+        cache_dir: Path | None = DEFAULT_CACHE_DIR,
+        ttl: float = DEFAULT_TTL,
+    ) -> None:
+        self.bucket = bucket
+        self.client = client if client is not None else _boto3_client()
+        self.cache_path = None if cache_dir is None else cache_dir / f"{bucket}.json"
+        self.ttl = ttl
+        self._tree: dict[str, dict[str, Any]] | None = None
+
+    def list_prefixes(self, prefix: str) -> list[str]:
+        """Return the names of the folders directly under prefix, requesting the bucket."""
+        if self.client is not None:
+            return self._list_prefixes_boto3(prefix)
+        return self._list_prefixes_cli(prefix)
+
+    def _list_prefixes_boto3(self, prefix: str) -> list[str]:
+        from botocore.exceptions import BotoCoreError, ClientError
+
+        names: list[str] = []
+        try:
+            paginator = self.client.get_paginator("list_objects_v2")
+            for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix, Delimiter="/"):
+                names.extend(common["Prefix"][len(prefix) :].rstrip("/") for common in page.get("CommonPrefixes", []))
+        except (BotoCoreError, ClientError) as e:
+            raise SnapshotCatalogError(f"Error while listing s3://{self.bucket}/{prefix}: {e}") from e
+        return names
+
+    def _list_prefixes_cli(self, prefix: str) -> list[str]:
+        # The AWS CLI pages through all the results itself
+        cmd = [
+            "aws",
+            "s3api",
+            "list-objects-v2",
+            "--bucket",
+            self.bucket,
+            "--prefix",
+            prefix,
+            "--delimiter",
+            "/",
+            "--query",
+            "CommonPrefixes[].Prefix",
+            "--output",
+            "json",
+        ]
+        try:
+            res = subprocess.check_output(cmd, universal_newlines=True, stderr=subprocess.PIPE)
+        except (OSError, subprocess.CalledProcessError) as e:
+            details = getattr(e, "stderr", None) or e
+            raise SnapshotCatalogError(f"Error while calling aws s3api list-objects-v2: {details}") from e
+        # No CommonPrefixes is printed as null
+        return [name[len(prefix) :].rstrip("/") for name in json.loads(res or "null") or []]
+
+    def _load_tree(self) -> dict[str, dict[str, Any]]:
+        if self._tree is None:
+            self._tree = {}
+            if self.cache_path is not None and self.cache_path.exists():
+                try:
+                    self._tree = json.loads(self.cache_path.read_text())
+                except (OSError, ValueError):
+                    # A corrupted cache is listed again
+                    self._tree = {}
+        return self._tree
+
+    def _save_tree(self) -> None:
+        if self.cache_path is None or self._tree is None:
+            return
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            # Write to a temporary file, so concurrent Terraform runs never read a partial cache
+            temporary = self.cache_path.with_name(f".{self.cache_path.name}.{os.getpid()}.tmp")
+            temporary.write_text(json.dumps(self._tree))
+            temporary.replace(self.cache_path)
+        except OSError:
+            pass
+
+    def folders(self, prefix: str, *, refresh: bool = False) -> list[str]:
+        """Return the names of the folders directly under prefix, from the cache if it was listed recently."""
+        tree = self._load_tree()
+        entry = tree.get(prefix)
+        if not refresh and entry is not None and time.time() - entry["listed_at"] < self.ttl:
+            return entry["folders"]
+
+        folders = self.list_prefixes(prefix)
+        tree[prefix] = {"listed_at": time.time(), "folders": folders}
+        self._save_tree()
+        return folders
+
+    def invalidate(self, prefix: str) -> None:
+        """Drop the cached listing of prefix, so the next lookup lists the bucket again."""
+        tree = self._load_tree()
+        if tree.pop(prefix, None) is not None:
+            self._save_tree()
+
+    def versions(self, cluster_type: str, cluster_version: str, workload: str, *, refresh: bool = False) -> list[str]:
+        """Return the snapshot versions of a workload on a cluster, oldest first."""
+        folders = self.folders(snapshot_prefix(cluster_type, cluster_version, workload), refresh=refresh)
+        # The version format sorts in time order
+        return sorted(folder for folder in folders if is_version_format(folder))
+
+    def latest(self, cluster_type: str, cluster_version: str, workload: str) -> str | None:
+        """Return the latest snapshot version of a workload on a cluster, None if there is none."""
+        versions = self.versions(cluster_type, cluster_version, workload)
+        return versions[-1] if versions else None
+
+    def exists(self, cluster_type: str, cluster_version: str, workload: str, version: str) -> bool:
+        """Return whether a snapshot version exists, listing the bucket again if the cached listing misses it."""
+        prefix = snapshot_prefix(cluster_type, cluster_version, workload)
+        return version in self.folders(prefix) or version in self.folders(prefix, refresh=True)
+
+    def resolve(self, cluster_type: str, cluster_version: str, workload: str, snapshot_version: str) -> str:
+        """Return the snapshot version to use for a requested version.
+
+        "latest" is the latest snapshot, "new" is a new version, and any other version is returned if it
+        exists, else SnapshotNotFoundError is raised. If the workload has no snapshot yet on the cluster,
+        a new version is returned, to take the first snapshot.
+
+        A new version is about to be snapshotted, so the cached listing of the workload is dropped: the
+        following runs must not resolve "latest" to an older version until the cache expires.
+        """
+        if snapshot_version == "latest":
+            latest = self.latest(cluster_type, cluster_version, workload)
+            if latest is not None:
+                return latest
+        elif snapshot_version != "new":
+            if self.exists(cluster_type, cluster_version, workload, snapshot_version):
+                return snapshot_version
+            if self.versions(cluster_type, cluster_version, workload):
+                raise SnapshotNotFoundError(f"Snapshot version {snapshot_version} not found")
+
+        self.invalidate(snapshot_prefix(cluster_type, cluster_version, workload))
+        return new_snapshot_version()
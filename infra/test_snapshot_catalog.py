@@ -0,0 +1,90 @@
+from pathlib import Path
+
+import pytest
+
+import snapshot_catalog
+from snapshot_catalog import SnapshotCatalog, SnapshotNotFoundError, is_version_format
+
+# Listing the bucket through a client catches the botocore exceptions
+pytest.importorskip("botocore")
+
+PREFIX = "OS/3.0.0/big5/"
+
+
+class FakePaginator:
+    def __init__(self, client: "FakeS3Client") -> None:
+        self.client = client
+
+    def paginate(self, *, Bucket: str, Prefix: str, Delimiter: str) -> list[dict]:  # noqa: N803
+        assert Delimiter == "/"
+        self.client.listings.append(Prefix)
+        folders = self.client.buckets.get(Bucket, {}).get(Prefix, [])
+        # One folder per page, like a listing of more than 1000 versions
+        return [{"CommonPrefixes": [{"Prefix": f"{Prefix}{folder}/"}]} for folder in folders] or [{}]
+
+
+class FakeS3Client:
+    def __init__(self, buckets: dict[str, dict[str, list[str]]]) -> None:
+        self.buckets = buckets
+        self.listings: list[str] = []
+
+    def get_paginator(self, operation: str) -> FakePaginator:
+        assert operation == "list_objects_v2"
+        return FakePaginator(self)
+
+
+@pytest.fixture
+def client() -> FakeS3Client:
+    return FakeS3Client({"bucket": {PREFIX: ["2024-09-20_13-56-42", "2024-10-01_00-00-00", "README"]}})
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> list[float]:
+    now = [1000.0]
+    monkeypatch.setattr(snapshot_catalog.time, "time", lambda: now[0])
+    return now
+
+
+def catalog(client: FakeS3Client, cache_dir: Path) -> SnapshotCatalog:
+    return SnapshotCatalog("bucket", client=client, cache_dir=cache_dir, ttl=300)
+
+
+def test_resolve_latest(client: FakeS3Client, tmp_path: Path, clock: list[float]) -> None:
+    assert catalog(client, tmp_path).resolve("OS", "3.0.0", "big5", "latest") == "2024-10-01_00-00-00"
+    # Another run reads the listing from the cache
+    assert catalog(client, tmp_path).resolve("OS", "3.0.0", "big5", "latest") == "2024-10-01_00-00-00"
+    assert client.listings == [PREFIX]
+
+    # Once the cache expires, the bucket is listed again
+    client.buckets["bucket"][PREFIX].append("2024-11-01_00-00-00")
+    clock[0] += 301
+    assert catalog(client, tmp_path).resolve("OS", "3.0.0", "big5", "latest") == "2024-11-01_00-00-00"
+    assert client.listings == [PREFIX, PREFIX]
+
+
+def test_resolve_latest_without_snapshots(client: FakeS3Client, tmp_path: Path, clock: list[float]) -> None:
+    assert is_version_format(catalog(client, tmp_path).resolve("ES", "8.15.0", "big5", "latest"))
+
+
+def test_resolve_new(client: FakeS3Client, tmp_path: Path, clock: list[float]) -> None:
+    assert catalog(client, tmp_path).resolve("OS", "3.0.0", "big5", "latest") == "2024-10-01_00-00-00"
+
+    new = catalog(client, tmp_path).resolve("OS", "3.0.0", "big5", "new")
+    assert is_version_format(new)
+
+    # The new snapshot is found by the next runs, even though the cached listing has not expired
+    client.buckets["bucket"][PREFIX].append(new)
+    assert catalog(client, tmp_path).resolve("OS", "3.0.0", "big5", "latest") == new
+    assert client.listings == [PREFIX, PREFIX]
+
+
+def test_resolve_version(client: FakeS3Client, tmp_path: Path, clock: list[float]) -> None:
+    assert catalog(client, tmp_path).resolve("OS", "3.0.0", "big5", "2024-09-20_13-56-42") == "2024-09-20_13-56-42"
+
+    # A version missing from the cached listing is listed again before failing
+    with pytest.raises(SnapshotNotFoundError):
+        catalog(client, tmp_path).resolve("OS", "3.0.0", "big5", "2023-01-01_00-00-00")
+    assert client.listings == [PREFIX, PREFIX]
+
+    # Without any snapshot, the requested version is replaced by a new one
+    assert is_version_format(catalog(client, tmp_path).resolve("ES", "8.15.0", "big5", "2023-01-01_00-00-00"))